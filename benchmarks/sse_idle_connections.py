@@ -0,0 +1,120 @@
+"""
+This is the script for measuring how many idle SSE connections a process holds.
+
+It opens `--connections` event streams to the gateway(or flask) with a signed
+session cookie each, keeps them idle, and prints how many are still open along
+with the subscriber count and max RSS reported by `/stream/stats`. The gateway
+only serves stats to connections from its own host, so run it next to it.
+
+    python -m flow2and4.pyduck.sse.gateway --port 8001 &
+    python benchmarks/sse_idle_connections.py --port 8001 --connections 10000
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+
+
+def signed_cookies(secret_key: str, users: int) -> dict[int, str]:
+    """Sign session cookie of each user the way flask does."""
+
+    app = Flask(__name__)
+    app.secret_key = secret_key
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+
+    return {
+        user_id: f"session={serializer.dumps({'_user_id': str(user_id)})}"
+        for user_id in range(1, users + 1)
+    }
+
+
+async def hold(host: str, port: int, user_id: int, cookie: str, opened: list):
+    """Open an event stream and read it until the server closes it."""
+
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return
+
+    writer.write(
+        (
+            f"GET /stream/users/{user_id} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "Accept: text/event-stream\r\n"
+            f"Cookie: {cookie}\r\n"
+            "\r\n"
+        ).encode()
+    )
+    await writer.drain()
+
+    status = await reader.readline()
+    if b"200" not in status:
+        writer.close()
+        return
+
+    opened.append(user_id)
+    try:
+        while await reader.read(1024):
+            pass
+    finally:
+        opened.remove(user_id)
+        writer.close()
+
+
+async def stats(host: str, port: int) -> dict:
+    """Fetch `/stream/stats` of the server."""
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /stream/stats HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+async def main(args):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    cookies = signed_cookies(args.secret_key, args.users)
+    opened = []
+    tasks = []
+    started = time.perf_counter()
+    for i in range(args.connections):
+        user_id = i % args.users + 1
+        tasks.append(
+            asyncio.create_task(
+                hold(args.host, args.port, user_id, cookies[user_id], opened)
+            )
+        )
+        if i % args.batch == args.batch - 1:
+            await asyncio.sleep(0.1)
+
+    print(f"opened {len(opened)} streams in {time.perf_counter() - started:.1f}s")
+
+    for _ in range(args.duration // 5):
+        await asyncio.sleep(5)
+        print(f"open: {len(opened)}, server: {await stats(args.host, args.port)}")
+
+    for task in tasks:
+        task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hold idle SSE connections.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--secret-key", required=True)
+
+    asyncio.run(main(parser.parse_args()))
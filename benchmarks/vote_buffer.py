@@ -0,0 +1,176 @@
+"""
+This is the script for measuring sustained votes per second on a trending post.
+
+It creates a post and `--users` users in a fresh SQLite file, and has
+`--clients` threads toggle votes of their users on the post through the vote
+endpoint for `--duration` seconds, with and without the write-behind buffer.
+With the buffer, a background thread plays the celery worker, flushing every
+`--flush-delay` seconds, and the backlog left after the run is flushed and
+timed too.
+
+Run it with the same environment(.env) as the tests, and a local redis:
+
+    PYTHONPATH=. python benchmarks/vote_buffer.py --users 200 --clients 16 --duration 10
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def create_app(database: str, buffer_url: str | None, flush_delay: float):
+    """Create the test app on a fresh SQLite file, with or without the buffer."""
+
+    os.environ["SQLALCHEMY_BINDS"] = json.dumps(
+        {"pyduck": f"sqlite:///{database}", "faduck": "sqlite://"}
+    )
+    os.environ["CELERY"] = json.dumps({"broker_url": "memory://"})
+
+    from flow2and4.app import create_app
+
+    app = create_app(mode="test")
+    app.config["SERVER_NAME"] = "localhost"
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.config["REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER"] = buffer_url
+    app.config["WRITE_BEHIND_FLUSH_DELAY"] = flush_delay
+
+    return app
+
+
+def populate(app, users: int) -> int:
+    """Create users and a post, return id of the post."""
+
+    from flow2and4.database import db
+    from flow2and4.pyduck.auth.models import User, UserAvatar
+    from flow2and4.pyduck.community.models import Post
+
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.create_all()
+        for i in range(users):
+            user = User(
+                username=f"bench{i}@pyduck.com",
+                nickname=f"bench{i}",
+                password="bench",
+                active=True,
+                verified=True,
+                role="user",
+                created_at=now,
+            )
+            user.avatar = UserAvatar(
+                url="/a.png",
+                filename="a.png",
+                original_filename="a.png",
+                created_at=now,
+            )
+            db.session.add(user)
+        post = Post(
+            user_id=1,
+            category="tech",
+            title="trending",
+            content="trending",
+            view_count=0,
+            vote_count=0,
+            comment_count=0,
+            created_at=now,
+        )
+        db.session.add(post)
+        db.session.commit()
+
+        return post.id
+
+
+def toggle(app, post_id: int, user_ids: list[int], deadline: float, counts: list):
+    """Vote and unvote the post as each user in turn until the deadline."""
+
+    client = app.test_client()
+    url = f"/community/posts/{post_id}/vote"
+    done = errors = 0
+    while time.perf_counter() < deadline:
+        for user_id in user_ids:
+            with client.session_transaction(base_url="http://pyduck.localhost") as s:
+                s["_user_id"] = str(user_id)
+            for method in (client.post, client.delete):
+                res = method(url, base_url="http://pyduck.localhost")
+                if res.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+
+    counts.append((done, errors))
+
+
+def run(args, buffer_url: str | None) -> None:
+    """Toggle votes for the duration and print votes per second."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app(f"{directory}/pyduck.db", buffer_url, args.flush_delay)
+        post_id = populate(app, args.users)
+
+        from flow2and4.pyduck.community.buffer import buffer
+        from flow2and4.pyduck.community.tasks import flush_buffer
+
+        if buffer_url is not None:
+            with app.app_context():
+                keys = buffer.redis.keys("buffer:*")
+                if keys:
+                    buffer.redis.delete(*keys)
+
+        stop = threading.Event()
+
+        def flush():
+            while not stop.wait(args.flush_delay):
+                flush_buffer()
+
+        flusher = threading.Thread(target=flush)
+        if buffer_url is not None:
+            flusher.start()
+
+        counts = []
+        deadline = time.perf_counter() + args.duration
+        threads = []
+        for i in range(args.clients):
+            user_ids = list(range(i + 1, args.users + 1, args.clients))
+            threads.append(
+                threading.Thread(
+                    target=toggle, args=(app, post_id, user_ids, deadline, counts)
+                )
+            )
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        done = sum(done for done, _ in counts)
+        errors = sum(errors for _, errors in counts)
+        mode = "buffer" if buffer_url is not None else "direct"
+        print(f"{mode}: {done / elapsed:.0f} votes/s ({done} ok, {errors} failed)")
+
+        if buffer_url is not None:
+            stop.set()
+            flusher.join()
+            started = time.perf_counter()
+            flushed = flush_buffer()
+            print(
+                f"{mode}: flushed backlog of {flushed} toggles in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Toggle votes on a trending post.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=int, default=10)
+    parser.add_argument("--flush-delay", type=float, default=2.0)
+    parser.add_argument("--redis", default="redis://localhost:6379/1")
+
+    args = parser.parse_args()
+    run(args, buffer_url=None)
+    run(args, buffer_url=args.redis)
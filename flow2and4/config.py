@@ -31,6 +31,44 @@ class WebConfig(BaseSettings):
 
     # Redis for Server-Sent Events.
     REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS: str
+    # Connection pool shared by publishing and subscribing in each process.
+    # The listener of each process holds one connection of the pool.
+    REDIS_MAX_CONNECTIONS_FOR_SERVER_SENT_EVENTS: int = 50
+    REDIS_SOCKET_TIMEOUT_FOR_SERVER_SENT_EVENTS: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT_FOR_SERVER_SENT_EVENTS: float = 2.0
+
+    # Seconds between keepalive comments sent to an idle event stream. It must
+    # be shorter than any proxy's read timeout sitting in front of the stream.
+    SSE_HEARTBEAT_INTERVAL: float = 25.0
+
+    # Recent events of each user are kept in a capped redis stream, so that a
+    # reconnecting client can replay what it missed by `Last-Event-ID`.
+    SSE_STREAM_MAXLEN: int = 100
+    SSE_STREAM_TTL: int = 86400
+
+    # Redis for write-behind buffer of post votes and reactions. When it's set,
+    # they're recorded in redis and served from there, and `flush_buffer` task
+    # writes them to database in batches of `WRITE_BEHIND_BATCH_SIZE`, at most
+    # `WRITE_BEHIND_FLUSH_DELAY` seconds after they're recorded.
+    REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER: str | None = None
+    # Page reads wait on this pool, so it gives up rather than hanging them.
+    REDIS_MAX_CONNECTIONS_FOR_WRITE_BEHIND_BUFFER: int = 50
+    REDIS_POOL_TIMEOUT_FOR_WRITE_BEHIND_BUFFER: float = 1.0
+    REDIS_SOCKET_TIMEOUT_FOR_WRITE_BEHIND_BUFFER: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT_FOR_WRITE_BEHIND_BUFFER: float = 1.0
+    WRITE_BEHIND_FLUSH_DELAY: float = 2.0
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    # Page views of posts and questions are always counted in the buffer, once
+    # per viewer(user or address) in each window of this many seconds. Without
+    # the redis above, the one for server sent events is used.
+    WRITE_BEHIND_VIEW_WINDOW: int = 3600
+
+    # Votes(and reactions of a code) notified to the same user on the same target
+    # within this many seconds are coalesced into one notification(None doesn't),
+    # and its SSE is pushed at most once every `NOTIFICATION_PUSH_INTERVAL`
+    # seconds.
+    NOTIFICATION_COALESCE_WINDOW: int | None = None
+    NOTIFICATION_PUSH_INTERVAL: int = 10
 
     # Celery.
     CELERY: dict
@@ -2,6 +2,10 @@
 This is the module for defining database.
 """
 
+from contextlib import contextmanager
+from typing import Callable
+
+from flask import current_app
 from sqlalchemy import MetaData
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -21,3 +25,61 @@ metadata = MetaData(naming_convention=naming_convention)
 db = SQLAlchemy(metadata=metadata)
 
 migrate = Migrate()
+
+
+def commit() -> None:
+    """Commit the session, or only flush it inside a unit of work.
+
+    Services call this instead of `db.session.commit()`, so they commit on
+    their own unless the caller groups them with `unit_of_work()`.
+    """
+
+    if db.session.info.get("unit_of_work"):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Commit everything written in the block at once, or roll all of it back.
+
+    e.g. a vote, its user action, its notification and the bumped vote count
+    go in a single transaction(one write lock, one fsync on SQLite). A nested
+    unit of work joins the outer one.
+    """
+
+    if db.session.info.get("unit_of_work"):
+        yield
+        return
+
+    db.session.info["unit_of_work"] = True
+    try:
+        yield
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        db.session.info.pop("on_commit", None)
+        raise
+    finally:
+        db.session.info.pop("unit_of_work", None)
+
+    # what's committed stays committed, so a failing callback doesn't fail it.
+    for callback in db.session.info.pop("on_commit", []):
+        try:
+            callback()
+        except Exception:
+            current_app.logger.exception("on commit callback %r failed.", callback)
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """Call back once the unit of work has committed, or right away outside of it.
+
+    e.g. a background task is enqueued only after what it reads has committed,
+    and not at all when the unit of work is rolled back.
+    """
+
+    if db.session.info.get("unit_of_work"):
+        db.session.info.setdefault("on_commit", []).append(callback)
+    else:
+        callback()
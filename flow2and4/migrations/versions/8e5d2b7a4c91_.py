@@ -0,0 +1,166 @@
+"""store timestamps as epoch milliseconds
+
+Revision ID: 8e5d2b7a4c91
+Revises: 6f3a9c1d8e52
+Create Date: 2026-10-17 16:42:09.530217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e5d2b7a4c91'
+down_revision = '6f3a9c1d8e52'
+branch_labels = None
+depends_on = None
+
+# timestamp columns of pyduck, and whether they're nullable.
+TIMESTAMPS = {
+    'user': {'created_at': False, 'deleted_at': True},
+    'notification': {'created_at': False, 'updated_at': True},
+    'post': {'created_at': False, 'updated_at': True, 'deleted_at': True},
+    'question': {'created_at': False, 'updated_at': True, 'deleted_at': True},
+    'reaction': {'created_at': False},
+    'user_action': {'created_at': False},
+    'user_avatar': {'created_at': False},
+    'user_backdrop': {'created_at': False},
+    'user_forgot_password_email_verification': {'created_at': False},
+    'user_sns': {'created_at': False},
+    'user_verification_email': {'created_at': False},
+    'vote': {'created_at': False},
+    'answer': {'created_at': False, 'updated_at': True, 'deleted_at': True},
+    'post_comment': {'created_at': False, 'updated_at': True, 'deleted_at': True},
+    'post_history': {'created_at': False},
+    'post_image_upload': {'created_at': False},
+    'question_history': {'created_at': False},
+    'question_image_upload': {'created_at': False},
+    'answer_comment': {'created_at': False, 'updated_at': True, 'deleted_at': True},
+    'answer_history': {'created_at': False},
+    'post_comment_history': {'created_at': False},
+    'answer_comment_history': {'created_at': False},
+}
+
+BATCH_SIZE = 1000
+
+
+def _backfill(table, column, value, where):
+    """Convert values of the column batch by batch, each batch in a statement."""
+
+    connection = op.get_bind()
+    statement = sa.text(
+        f'UPDATE "{table}" SET {column} = {value} WHERE rowid IN '
+        f'(SELECT rowid FROM "{table}" WHERE {where} LIMIT :size)'
+    )
+    while connection.execute(statement, {'size': BATCH_SIZE}).rowcount:
+        pass
+
+
+def _foreign_keys(on):
+    """Switch enforcement of foreign keys on the connection.
+
+    sqlite ignores the pragma within a transaction, so the one in progress is
+    committed first.
+    """
+
+    connection = op.get_bind().connection.dbapi_connection
+    if connection.in_transaction:
+        connection.commit()
+    connection.execute(f"PRAGMA foreign_keys={'ON' if on else 'OFF'}")
+
+
+def _check_foreign_keys():
+    """Fail if rebuilding tables left any row referring to a missing one."""
+
+    violations = op.get_bind().exec_driver_sql('PRAGMA foreign_key_check').all()
+    if violations:
+        raise RuntimeError(f'foreign key violations: {violations}')
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+
+
+
+def upgrade_():
+    # ### commands auto generated by Alembic - please adjust! ###
+    pass
+    # ### end Alembic commands ###
+
+
+def downgrade_():
+    # ### commands auto generated by Alembic - please adjust! ###
+    pass
+    # ### end Alembic commands ###
+
+
+def upgrade_pyduck():
+    # batch mode rebuilds tables, and dropping one referred to by rows of
+    # another fails while foreign keys are enforced.
+    _foreign_keys(False)
+
+    for table, columns in TIMESTAMPS.items():
+        # ISO strings(e.g. '2023-01-01 00:00:00.123456+00:00') to epoch ms.
+        for column in columns:
+            _backfill(
+                table,
+                column,
+                f'CAST(round((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)',
+                f"{column} GLOB '[0-9][0-9][0-9][0-9]-*'",
+            )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns.items():
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.VARCHAR(),
+                    type_=sa.Integer(),
+                    existing_nullable=nullable,
+                )
+
+    _check_foreign_keys()
+    _foreign_keys(True)
+
+
+def downgrade_pyduck():
+    _foreign_keys(False)
+
+    for table, columns in TIMESTAMPS.items():
+        # epoch ms to ISO strings.
+        for column in columns:
+            _backfill(
+                table,
+                column,
+                f"strftime('%Y-%m-%d %H:%M:%f+00:00', {column} / 1000.0, 'unixepoch')",
+                f"typeof({column}) = 'integer'",
+            )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns.items():
+                batch_op.alter_column(
+                    column,
+                    existing_type=sa.Integer(),
+                    type_=sa.VARCHAR(),
+                    existing_nullable=nullable,
+                )
+
+    _check_foreign_keys()
+    _foreign_keys(True)
+
+
+def upgrade_faduck():
+    # ### commands auto generated by Alembic - please adjust! ###
+    pass
+    # ### end Alembic commands ###
+
+
+def downgrade_faduck():
+    # ### commands auto generated by Alembic - please adjust! ###
+    pass
+    # ### end Alembic commands ###
@@ -29,13 +29,14 @@ UserAction
 """
 from __future__ import annotations
 
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from flow2and4.database import db
-from flow2and4.pyduck.models import ImageUploadMixin
+from flow2and4.pyduck.models import ImageUploadMixin, Timestamp
 
 if TYPE_CHECKING:
     from flow2and4.pyduck.community.models import (
@@ -60,7 +61,7 @@ class UserAvatar(ImageUploadMixin, db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class UserBackdrop(ImageUploadMixin, db.Model):
@@ -70,7 +71,7 @@ class UserBackdrop(ImageUploadMixin, db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class UserSns(db.Model):
@@ -83,7 +84,7 @@ class UserSns(db.Model):
     platform: Mapped[str]
     link: Mapped[str]
     public: Mapped[bool]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class User(db.Model):
@@ -93,14 +94,18 @@ class User(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     username: Mapped[int] = mapped_column(unique=True)
-    nickname: Mapped[int] = mapped_column(unique=True)
+    nickname: Mapped[str] = mapped_column(unique=True)
     password: Mapped[int]
     active: Mapped[bool]
     verified: Mapped[bool]
     role: Mapped[str]
     about_me: Mapped[str | None]
-    created_at: Mapped[str]
-    deleted_at: Mapped[str | None]
+    # denormalized, kept by notification services in their transaction.
+    unread_notification_count: Mapped[int] = mapped_column(
+        default=0, server_default="0"
+    )
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship
     avatar: Mapped[UserAvatar] = relationship(
@@ -122,7 +127,7 @@ class UserVerificationEmail(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
     vcode: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
     # relationship
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -136,7 +141,7 @@ class UserForgotPasswordEmailVerification(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id", ondelete="CASCADE"), unique=True)
     vcode: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
     # relationship
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -150,12 +155,13 @@ class UserAction(db.Model):
     action_type: Mapped[str] = mapped_column(index=True)
     action_value: Mapped[str | None]
     target_id: Mapped[int | None]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
     __bind_key__ = "pyduck"
     __table_args__ = (
         UniqueConstraint("user_id", "action_type", "action_value", "target_id"),
         Index(None, "user_id", "action_type", "target_id"),
+        Index(None, "user_id", "action_type", "created_at"),
     )
     __mapper_args__ = {
         "polymorphic_on": "action_type",
@@ -191,6 +191,16 @@ class UserRead(UserBase):
     sns: list[UserSnsRead | None]
 
 
+class UserView(PyduckSchema):
+    """Represent user as shown next to what the user wrote."""
+
+    id: int
+    nickname: str
+
+    # relationship
+    avatar: UserAvatarRead | None
+
+
 class UserReadForSession(UserRead):
     """Represent user for session used by flask_login."""
 
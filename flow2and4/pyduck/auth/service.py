@@ -36,10 +36,9 @@ update_password
 update_nickname
 """
 
-from flask_sqlalchemy.pagination import Pagination
 from sqlalchemy import select
 
-from flow2and4.database import db
+from flow2and4.database import commit, db
 from flow2and4.pyduck.auth.models import (
     User,
     UserAction,
@@ -104,6 +103,7 @@ from flow2and4.pyduck.community.models import (
     QuestionVote,
     Vote,
 )
+from flow2and4.pyduck.pagination import Page, paginate
 
 
 def does_field_value_exist(field: str, value: str | int | float) -> bool:
@@ -118,7 +118,7 @@ def create_user(*, user_in: UserCreate) -> UserRead:
 
     user = User(**user_in.dict())
     db.session.add(user)
-    db.session.commit()
+    commit()
 
     return UserRead.from_orm(user)
 
@@ -138,7 +138,7 @@ def delete_user(*, id: int) -> None:
 
     user = _get_user(id)
     db.session.delete(user)
-    db.session.commit()
+    commit()
 
 
 def get_pyduck_user_for_session(*, id: int) -> UserReadForSession:
@@ -168,7 +168,7 @@ def create_user_avatar(*, avatar_in: UserAvatarCreate) -> UserAvatarRead:
 
     avatar = UserAvatar(**avatar_in.dict())
     db.session.add(avatar)
-    db.session.commit()
+    commit()
 
     return UserAvatarRead.from_orm(avatar)
 
@@ -178,7 +178,7 @@ def create_user_backdrop(*, backdrop_in: UserBackdropCreate) -> UserBackdropRead
 
     backdrop = UserBackdrop(**backdrop_in.dict())
     db.session.add(backdrop)
-    db.session.commit()
+    commit()
 
     return UserBackdropRead.from_orm(backdrop)
 
@@ -191,7 +191,7 @@ def create_user_verification_email(
     verification = UserVerificationEmail(**verification_in.dict())
 
     db.session.add(verification)
-    db.session.commit()
+    commit()
 
     return UserVerificationEmailRead.from_orm(verification)
 
@@ -204,7 +204,7 @@ def create_user_forgot_password_email_verification(
     verification = UserForgotPasswordEmailVerification(**verification_in.dict())
 
     db.session.add(verification)
-    db.session.commit()
+    commit()
 
 
 def delete_user_forgot_password_email_verification(*, user_id: int) -> None:
@@ -213,7 +213,7 @@ def delete_user_forgot_password_email_verification(*, user_id: int) -> None:
     verification = _get_user_forgot_password_email_verification(user_id)
     if verification is not None:
         db.session.delete(verification)
-        db.session.commit()
+        commit()
 
 
 def get_user_verification_email(*, user_id: int) -> UserVerificationEmailRead | None:
@@ -255,7 +255,7 @@ def verify_user(*, user_id: int) -> UserRead:
 
     user = _get_user(id=user_id)
     user.verified = True
-    db.session.commit()
+    commit()
 
     return UserRead.from_orm(user)
 
@@ -265,7 +265,7 @@ def update_about_me(*, user_id: int, about_me: str) -> None:
 
     user = _get_user(user_id)
     setattr(user, "about_me", about_me)
-    db.session.commit()
+    commit()
 
 
 def delete_and_create_user_sns(
@@ -281,7 +281,7 @@ def delete_and_create_user_sns(
         snss.append(UserSns(**sns_in.dict()))
 
     db.session.add_all(snss)
-    db.session.commit()
+    commit()
 
     return [UserSnsRead.from_orm(sns) for sns in snss]
 
@@ -336,7 +336,7 @@ def update_user_backdrop(*, backdrop_in: UserBackdropUpdate) -> UserBackdropRead
     for column, value in updated_data.items():
         setattr(backdrop, column, value)
 
-    db.session.commit()
+    commit()
     return UserBackdropRead.from_orm(backdrop)
 
 
@@ -358,7 +358,7 @@ def update_user_avatar(*, avatar_in: UserAvatarUpdate) -> UserAvatarRead:
     for column, value in updated_data.items():
         setattr(avatar, column, value)
 
-    db.session.commit()
+    commit()
     return UserAvatarRead.from_orm(avatar)
 
 
@@ -412,7 +412,7 @@ def create_user_action(*, user_action_in):
         raise Exception("invalid user action type")
 
     db.session.add(user_action)
-    db.session.commit()
+    commit()
 
     return user_action
 
@@ -471,7 +471,7 @@ def delete_user_action(*, user_id, action_type, target_id, action_value: str = N
 
     if user_action is not None:
         db.session.delete(user_action)
-        db.session.commit()
+        commit()
 
 
 def get_all_user_actions_by_commons_and_action_types(
@@ -483,8 +483,9 @@ def get_all_user_actions_by_commons_and_action_types(
     sorters,
     query,
     periods,
+    cursor,
     action_types: list[str]
-) -> Pagination:
+) -> Page:
     """Select all user actions given common parameters.
 
     TODO
@@ -517,9 +518,18 @@ def get_all_user_actions_by_commons_and_action_types(
         field, direction = sorter_.split("-")
         column = getattr(UserAction, field)
         sorter_conditions.append(column.asc() if direction == "asc" else column.desc())
+    sorter_conditions.append(UserAction.id.desc())
     select_ = select_.order_by(*sorter_conditions)
 
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        UserAction,
+        order_by=sorter_conditions,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
 def update_password(user_id: int, password: str) -> None:
@@ -527,7 +537,7 @@ def update_password(user_id: int, password: str) -> None:
 
     user = _get_user(user_id)
     user.password = password
-    db.session.commit()
+    commit()
 
 
 def update_nickname(user_id: int, nickname: str) -> None:
@@ -535,4 +545,4 @@ def update_nickname(user_id: int, nickname: str) -> None:
 
     user = _get_user(user_id)
     user.nickname = nickname
-    db.session.commit()
+    commit()
@@ -0,0 +1,445 @@
+"""
+This is the module for buffering votes and reactions in redis(write-behind).
+
+When a post trends, every vote would take the write lock of SQLite on the
+request path, and all the vote endpoints would serialize behind it. With the
+buffer enabled, a toggle is recorded in redis instead, and served from there
+right away:
+
+- `buffer:votes:<target>:<target_id>` hash maps user id to the buffered
+  state("1" voted, "0" unvoted) of each voter not flushed yet, and
+  `buffer:reactions:<target>:<target_id>` does the same for `<user id>:<code>`.
+- `buffer:counts` hash keeps the count deltas not flushed yet.
+- `buffer:ops` list keeps the toggles in order, which are flushed to database
+  by `flush_buffer` task in batched transactions.
+
+Page views of posts and questions are counted in `buffer:views` hash, once
+per viewer per `WRITE_BEHIND_VIEW_WINDOW` seconds, and added to `view_count`
+columns by `flush_views` task in a single UPDATE, so page reads stay read-only.
+Views are counted whether or not the buffer is enabled, on the redis for
+server sent events unless the buffer has its own.
+
+Flushing moves `buffer:ops` to `buffer:ops:flushing` first, and acknowledges
+a batch only after its transaction has committed. A worker dying in between
+leaves the batch in `buffer:ops:flushing` to be replayed by the next flush,
+which is safe since inserting and deleting votes and reactions is idempotent.
+"""
+
+import json
+import threading
+import time
+
+from celery import Task
+from flask import current_app
+from redis import BlockingConnectionPool, Redis
+from redis.commands.core import Script
+
+from flow2and4.pyduck.community.schemas import ViewerState
+
+OPS = "buffer:ops"
+FLUSHING = "buffer:ops:flushing"
+COUNTS = "buffer:counts"
+SEQ = "buffer:seq"
+SCHEDULED = "buffer:flush:scheduled"
+LOCK = "buffer:flush:lock"
+VIEWS = "buffer:views"
+VIEWS_FLUSHING = "buffer:views:flushing"
+VIEWS_SCHEDULED = "buffer:views:scheduled"
+VIEWS_LOCK = "buffer:views:lock"
+
+# targets whose votes and reactions are buffered.
+BUFFERED_TARGETS = {"post"}
+
+# KEYS: state hash, counts, ops, seq, scheduled
+# ARGV: field, wanted state, stored state, count field, op, schedule ttl(ms)
+RECORD_SCRIPT = """
+local buffered = redis.call("HGET", KEYS[1], ARGV[1])
+local current = ARGV[3]
+if buffered then
+    current = string.sub(buffered, 1, 1)
+end
+if current == ARGV[2] then
+    return {0, 0, 0}
+end
+
+local op = cjson.decode(ARGV[5])
+op["seq"] = redis.call("INCR", KEYS[4])
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[2] .. ":" .. op["seq"])
+redis.call("HINCRBY", KEYS[2], ARGV[4], ARGV[2] == "1" and 1 or -1)
+local pending = redis.call("RPUSH", KEYS[3], cjson.encode(op))
+local scheduled = redis.call("SET", KEYS[5], 1, "NX", "PX", ARGV[6])
+
+return {1, pending, scheduled and 1 or 0}
+"""
+
+# KEYS: flushing, ops, scheduled
+# ARGV: batch size
+TAKE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 and redis.call("EXISTS", KEYS[2]) == 1 then
+    redis.call("RENAME", KEYS[2], KEYS[1])
+    redis.call("DEL", KEYS[3])
+end
+
+return redis.call("LRANGE", KEYS[1], 0, tonumber(ARGV[1]) - 1)
+"""
+
+# KEYS: flushing, counts
+# ARGV: ops taken
+# state hashes are named in the ops, which is fine on a single redis.
+ACK_SCRIPT = """
+for _, encoded in ipairs(ARGV) do
+    local op = cjson.decode(encoded)
+    local state = op["on"] and "1" or "0"
+    if redis.call("HINCRBY", KEYS[2], op["count"], op["on"] and -1 or 1) == 0 then
+        redis.call("HDEL", KEYS[2], op["count"])
+    end
+    if redis.call("HGET", op["key"], op["field"]) == state .. ":" .. op["seq"] then
+        redis.call("HDEL", op["key"], op["field"])
+    end
+end
+redis.call("LTRIM", KEYS[1], #ARGV, -1)
+
+return #ARGV
+"""
+
+# KEYS: viewers of the window, views, scheduled
+# ARGV: viewer, views field, window(s), schedule ttl(ms)
+VIEW_SCRIPT = """
+if redis.call("SADD", KEYS[1], ARGV[1]) == 0 then
+    return {0, 0}
+end
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("HINCRBY", KEYS[2], ARGV[2], 1)
+local scheduled = redis.call("SET", KEYS[3], 1, "NX", "PX", ARGV[4])
+
+return {1, scheduled and 1 or 0}
+"""
+
+# KEYS: flushing, views, scheduled
+TAKE_VIEWS_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 and redis.call("EXISTS", KEYS[2]) == 1 then
+    redis.call("RENAME", KEYS[2], KEYS[1])
+    redis.call("DEL", KEYS[3])
+end
+
+return redis.call("HGETALL", KEYS[1])
+"""
+
+
+def vote_key(target: str, target_id: int) -> str:
+    """Return key of the hash of buffered votes to the target."""
+
+    return f"buffer:votes:{target}:{target_id}"
+
+
+def reaction_key(target: str, target_id: int) -> str:
+    """Return key of the hash of buffered reactions to the target."""
+
+    return f"buffer:reactions:{target}:{target_id}"
+
+
+def vote_count_field(target: str, target_id: int) -> str:
+    """Return field of buffered vote count delta of the target."""
+
+    return f"vote:{target}:{target_id}"
+
+
+def viewers_key(target: str, target_id: int, window: int) -> str:
+    """Return key of the set of viewers of the target in the window."""
+
+    return f"buffer:viewers:{target}:{target_id}:{window}"
+
+
+def reaction_count_field(target: str, target_id: int, code: str) -> str:
+    """Return field of buffered reaction count delta of the target by code."""
+
+    return f"reaction:{target}:{target_id}:{code}"
+
+
+class WriteBehindBuffer:
+    """Represent redis buffer of votes and reactions flushed behind requests."""
+
+    _redis_pool: BlockingConnectionPool | None = None
+    _redis_pool_lock = threading.Lock()
+    _scripts: dict[str, Script] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Represent whether votes and reactions are buffered.
+
+        It's when redis url of the buffer is configured.
+        """
+
+        url = current_app.config.get("REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER")
+        return url is not None
+
+    @property
+    def redis_pool(self) -> BlockingConnectionPool:
+        """Represent a redis connection pool created lazily once per process.
+
+        It's on redis of the buffer if configured, on redis for server sent
+        events otherwise.
+        """
+
+        if self._redis_pool is not None:
+            return self._redis_pool
+
+        config = current_app.config
+        url = config.get("REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER")
+        if url is None:
+            url = config["REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS"]
+
+        with self._redis_pool_lock:
+            if self._redis_pool is None:
+                self._redis_pool = BlockingConnectionPool.from_url(
+                    url,
+                    max_connections=config.get(
+                        "REDIS_MAX_CONNECTIONS_FOR_WRITE_BEHIND_BUFFER", 50
+                    ),
+                    timeout=config.get(
+                        "REDIS_POOL_TIMEOUT_FOR_WRITE_BEHIND_BUFFER", 1.0
+                    ),
+                    socket_timeout=config.get(
+                        "REDIS_SOCKET_TIMEOUT_FOR_WRITE_BEHIND_BUFFER", 1.0
+                    ),
+                    socket_connect_timeout=config.get(
+                        "REDIS_SOCKET_CONNECT_TIMEOUT_FOR_WRITE_BEHIND_BUFFER", 1.0
+                    ),
+                )
+
+        return self._redis_pool
+
+    @property
+    def redis(self) -> Redis:
+        """Represent a redis client borrowing connections from the pool."""
+
+        return Redis(connection_pool=self.redis_pool)
+
+    def _script(self, script: str) -> Script:
+        """Return lua script registered once per process."""
+
+        if script not in self._scripts:
+            self._scripts[script] = self.redis.register_script(script)
+
+        return self._scripts[script]
+
+    def record_vote(
+        self,
+        *,
+        target: str,
+        target_id: int,
+        user_id: int,
+        on: bool,
+        stored: bool,
+        flush_task: Task,
+    ) -> bool:
+        """Buffer vote(on) or unvote of the user, return whether it's toggled.
+
+        `stored` tells whether the vote is cast in database, which is the state
+        of the user unless a toggle of the user is buffered already. The toggle
+        is flushed by `flush_task` in time.
+        """
+
+        return self._record(
+            {
+                "kind": "vote",
+                "target": target,
+                "target_id": target_id,
+                "user_id": user_id,
+                "on": on,
+                "key": vote_key(target, target_id),
+                "field": str(user_id),
+                "count": vote_count_field(target, target_id),
+            },
+            stored=stored,
+            flush_task=flush_task,
+        )
+
+    def record_reaction(
+        self,
+        *,
+        target: str,
+        target_id: int,
+        user_id: int,
+        code: str,
+        on: bool,
+        stored: bool,
+        flush_task: Task,
+    ) -> bool:
+        """Buffer reaction(on) or unreaction of the user, return whether toggled."""
+
+        return self._record(
+            {
+                "kind": "reaction",
+                "target": target,
+                "target_id": target_id,
+                "user_id": user_id,
+                "code": code,
+                "on": on,
+                "key": reaction_key(target, target_id),
+                "field": f"{user_id}:{code}",
+                "count": reaction_count_field(target, target_id, code),
+            },
+            stored=stored,
+            flush_task=flush_task,
+        )
+
+    def _record(self, op: dict, *, stored: bool, flush_task: Task) -> bool:
+        """Record the op atomically and start flushing it in time."""
+
+        config = current_app.config
+        delay = config.get("WRITE_BEHIND_FLUSH_DELAY", 2.0)
+        op["at"] = int(time.time() * 1000)
+
+        toggled, pending, scheduled = self._script(RECORD_SCRIPT)(
+            keys=[op["key"], COUNTS, OPS, SEQ, SCHEDULED],
+            args=[
+                op["field"],
+                "1" if op["on"] else "0",
+                "1" if stored else "0",
+                op["count"],
+                json.dumps(op),
+                # a flush lost with its worker is scheduled again once it expires.
+                int(delay * 10 * 1000),
+            ],
+        )
+
+        if toggled:
+            if pending >= config.get("WRITE_BEHIND_BATCH_SIZE", 500):
+                flush_task.delay()
+            elif scheduled:
+                flush_task.apply_async(countdown=delay)
+
+        return bool(toggled)
+
+    def take(self, size: int) -> list[bytes]:
+        """Return the next batch of ops to flush, replaying an unacked batch first."""
+
+        return self._script(TAKE_SCRIPT)(keys=[FLUSHING, OPS, SCHEDULED], args=[size])
+
+    def ack(self, ops: list[bytes]) -> None:
+        """Forget the ops whose transaction has committed."""
+
+        if ops:
+            self._script(ACK_SCRIPT)(keys=[FLUSHING, COUNTS], args=ops)
+
+    def record_view(
+        self, *, target: str, target_id: int, viewer: str, flush_task: Task
+    ) -> bool:
+        """Count a view of the target unless the viewer has viewed it lately.
+
+        The view is added to database by `flush_task` in time.
+        """
+
+        config = current_app.config
+        delay = config.get("WRITE_BEHIND_FLUSH_DELAY", 2.0)
+        window = config.get("WRITE_BEHIND_VIEW_WINDOW", 3600)
+
+        counted, scheduled = self._script(VIEW_SCRIPT)(
+            keys=[
+                viewers_key(target, target_id, int(time.time()) // window),
+                VIEWS,
+                VIEWS_SCHEDULED,
+            ],
+            args=[viewer, f"{target}:{target_id}", window, int(delay * 10 * 1000)],
+        )
+
+        if scheduled:
+            flush_task.apply_async(countdown=delay)
+
+        return bool(counted)
+
+    def take_views(self) -> dict[str, dict[int, int]]:
+        """Return views to flush by target and id, replaying unacked views first."""
+
+        replies = self._script(TAKE_VIEWS_SCRIPT)(
+            keys=[VIEWS_FLUSHING, VIEWS, VIEWS_SCHEDULED]
+        )
+
+        views = {}
+        for field, count in zip(replies[::2], replies[1::2]):
+            target, target_id = field.decode().rsplit(":", 1)
+            views.setdefault(target, {})[int(target_id)] = int(count)
+
+        return views
+
+    def ack_views(self) -> None:
+        """Forget the views whose transaction has committed."""
+
+        self.redis.delete(VIEWS_FLUSHING)
+
+    def vote_count_deltas(self, target: str, target_ids: list[int]) -> dict[int, int]:
+        """Return buffered vote count deltas of the targets."""
+
+        if target not in BUFFERED_TARGETS or not target_ids:
+            return {}
+
+        fields = [vote_count_field(target, id) for id in target_ids]
+        deltas = self.redis.hmget(COUNTS, fields)
+
+        return {id: int(d) for id, d in zip(target_ids, deltas) if d is not None}
+
+    def overlay(
+        self,
+        viewer: ViewerState,
+        *,
+        user_id: int | None,
+        targets: dict[str, list[int]],
+        codes: list[str],
+    ) -> ViewerState:
+        """Apply buffered votes, reactions and reaction counts to viewer state."""
+
+        pairs = [
+            (target, id)
+            for target, ids in targets.items()
+            if target in BUFFERED_TARGETS
+            for id in ids
+        ]
+        if not pairs:
+            return viewer
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for target, id in pairs:
+            pipeline.hmget(
+                COUNTS, [reaction_count_field(target, id, code) for code in codes]
+            )
+            if user_id is not None:
+                pipeline.hget(vote_key(target, id), str(user_id))
+                pipeline.hmget(
+                    reaction_key(target, id), [f"{user_id}:{code}" for code in codes]
+                )
+        replies = iter(pipeline.execute())
+
+        for target, id in pairs:
+            for code, delta in zip(codes, next(replies)):
+                if delta is None:
+                    continue
+
+                key = (target, id, code)
+                count = viewer.reaction_count(*key) + int(delta)
+                if count > 0:
+                    viewer.reaction_counts[key] = count
+                else:
+                    viewer.reaction_counts.pop(key, None)
+
+            if user_id is None:
+                continue
+
+            voted = next(replies)
+            if voted is not None:
+                if voted.startswith(b"1"):
+                    viewer.votes.add((target, id))
+                else:
+                    viewer.votes.discard((target, id))
+
+            for code, reacted in zip(codes, next(replies)):
+                if reacted is not None:
+                    if reacted.startswith(b"1"):
+                        viewer.reactions.add((target, id, code))
+                    else:
+                        viewer.reactions.discard((target, id, code))
+
+        return viewer
+
+
+buffer = WriteBehindBuffer()
@@ -3,25 +3,53 @@ This is the module for helpers related to pyduck community.
 """
 
 from datetime import datetime, timedelta, timezone
-
-today = datetime.now(timezone.utc).date()
+from html.parser import HTMLParser
 
 date_filters = [
-    {"code": "created_at-ge-past_day", "name": "최근 하루", "value": today.isoformat()},
-    {
-        "code": "created_at-ge-past_week",
-        "name": "최근 일주",
-        "value": (today - timedelta(days=7)).isoformat(),
-    },
-    {
-        "code": "created_at-ge-past_month",
-        "name": "최근 한달",
-        "value": (today - timedelta(days=30)).isoformat(),
-    },
-    {
-        "code": "created_at-ge-past_year",
-        "name": "최근 일년",
-        "value": (today - timedelta(days=365)).isoformat(),
-    },
-    {"code": "created_at-ge-all", "name": "전체", "value": "1"},
+    {"code": "created_at-ge-past_day", "name": "최근 하루", "days": 1},
+    {"code": "created_at-ge-past_week", "name": "최근 일주", "days": 7},
+    {"code": "created_at-ge-past_month", "name": "최근 한달", "days": 30},
+    {"code": "created_at-ge-past_year", "name": "최근 일년", "days": 365},
+    {"code": "created_at-ge-all", "name": "전체", "days": None},
 ]
+
+
+def period_start(code: str) -> datetime:
+    """Return the start of period of the date filter, counted back from now."""
+
+    days = next(df["days"] for df in date_filters if df["code"] == code)
+    if days is None:
+        return datetime.fromtimestamp(0, timezone.utc)
+
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+class _TextExtractor(HTMLParser):
+    """Collect text nodes of html, skipping code of script and style."""
+
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.texts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Return plain text of html(e.g. CKEditor content) for full-text search."""
+
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+
+    return " ".join(" ".join(extractor.texts).split())
@@ -14,16 +14,38 @@ Reaction
     AnswerCommentReaction
     PostReaction
     PostCommentReaction
+ReactionCount
+
+[full-text search]
+
+question_fts
+post_fts
 """
 
 from __future__ import annotations
 
-from sqlalchemy import Column, ForeignKey, Index, Integer, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import (
+    DDL,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    UniqueConstraint,
+    column,
+    event,
+    table,
+    text
+)
 from sqlalchemy.orm import Mapped, foreign, mapped_column, relationship, remote
 
 from flow2and4.database import db
 from flow2and4.pyduck.auth.models import User as User
-from flow2and4.pyduck.models import ImageUploadMixin
+from flow2and4.pyduck.models import ImageUploadMixin, Timestamp
+
+# listings never show soft-deleted rows, so their indexes leave them out.
+NOT_DELETED = text("deleted_at IS NULL")
 
 assoc_question_tag_table = db.Table(
     "assoc_question_tag",
@@ -53,15 +75,15 @@ class Vote(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"), index=True)
-    target: Mapped[str] = mapped_column(index=True)
+    target: Mapped[str]
     target_id: Mapped[int]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
     # configuration.
     __bind_key__ = "pyduck"
     __table_args__ = (
         UniqueConstraint("user_id", "target", "target_id"),
-        Index("target", "target_id"),
+        Index(None, "target", "target_id", "user_id"),
     )
     __mapper_args__ = {"polymorphic_on": "target", "polymorphic_identity": "vote"}
 
@@ -120,14 +142,17 @@ class Reaction(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"), index=True)
-    target: Mapped[str] = mapped_column(index=True)
+    target: Mapped[str]
     target_id: Mapped[int]
     code: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
     # configuration.
     __bind_key__ = "pyduck"
-    __table_args__ = (UniqueConstraint("user_id", "target", "target_id", "code"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "target", "target_id", "code"),
+        Index(None, "target", "target_id", "code"),
+    )
     __mapper_args__ = {"polymorphic_on": "target", "polymorphic_identity": "reaction"}
 
     # relationship.
@@ -194,6 +219,18 @@ class PostCommentReaction(Reaction):
     )
 
 
+class ReactionCount(db.Model):
+    """Represent the number of reactions to a target by code."""
+
+    target: Mapped[str] = mapped_column(primary_key=True)
+    target_id: Mapped[int] = mapped_column(primary_key=True)
+    code: Mapped[str] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+    # configuration.
+    __bind_key__ = "pyduck"
+
+
 class QuestionHistory(db.Model):
     """Represent question history."""
 
@@ -203,13 +240,19 @@ class QuestionHistory(db.Model):
     question_id = mapped_column(ForeignKey("question.id"))
     title: Mapped[str]
     content: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class Question(db.Model):
     """Represent question."""
 
     __bind_key__ = "pyduck"
+    __table_args__ = (
+        Index(None, "created_at", sqlite_where=NOT_DELETED),
+        Index(None, "vote_count", "created_at", sqlite_where=NOT_DELETED),
+        Index(None, "comment_count", "created_at", sqlite_where=NOT_DELETED),
+        Index(None, "answered", "created_at", sqlite_where=NOT_DELETED),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"))
@@ -219,9 +262,9 @@ class Question(db.Model):
     vote_count: Mapped[int]
     comment_count: Mapped[int]
     answered: Mapped[bool]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
-    deleted_at: Mapped[str | None]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship.
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -263,7 +306,7 @@ class QuestionImageUpload(ImageUploadMixin, db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"))
     question_id = mapped_column(ForeignKey("question.id"))
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class AnswerHistory(db.Model):
@@ -274,7 +317,7 @@ class AnswerHistory(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     answer_id = mapped_column(ForeignKey("answer.id"))
     content: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class Answer(db.Model):
@@ -289,9 +332,9 @@ class Answer(db.Model):
     vote_count: Mapped[int]
     comment_count: Mapped[int]
     answered: Mapped[bool]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
-    deleted_at: Mapped[str | None]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship.
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -318,9 +361,9 @@ class AnswerComment(db.Model):
     user_id = mapped_column(ForeignKey("user.id"))
     answer_id = mapped_column(ForeignKey("answer.id"))
     content: Mapped[str]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
-    deleted_at: Mapped[str | None]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship.
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -340,7 +383,7 @@ class AnswerCommentHistory(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     comment_id = mapped_column(ForeignKey("answer_comment.id"))
     content: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class PostHistory(db.Model):
@@ -352,25 +395,32 @@ class PostHistory(db.Model):
     post_id = mapped_column(ForeignKey("post.id"))
     title: Mapped[str]
     content: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class Post(db.Model):
     """Represent post."""
 
     __bind_key__ = "pyduck"
+    __table_args__ = (
+        Index(None, "category", "created_at", sqlite_where=NOT_DELETED),
+        Index(None, "category", "vote_count", "created_at", sqlite_where=NOT_DELETED),
+        Index(
+            None, "category", "comment_count", "created_at", sqlite_where=NOT_DELETED
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"))
-    category: Mapped[str] = mapped_column(index=True)
+    category: Mapped[str]
     title: Mapped[str]
     content: Mapped[str]
     view_count: Mapped[int]
     vote_count: Mapped[int]
     comment_count: Mapped[int]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
-    deleted_at: Mapped[str | None]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship.
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -410,7 +460,7 @@ class PostImageUpload(ImageUploadMixin, db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id = mapped_column(ForeignKey("user.id"))
     post_id = mapped_column(ForeignKey("post.id"))
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class PostCommentHistory(db.Model):
@@ -421,7 +471,7 @@ class PostCommentHistory(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     comment_id = mapped_column(ForeignKey("post_comment.id"))
     content: Mapped[str]
-    created_at: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
 
 
 class PostComment(db.Model):
@@ -436,9 +486,9 @@ class PostComment(db.Model):
     content: Mapped[str]
     vote_count: Mapped[int]
     comment_count: Mapped[int]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
-    deleted_at: Mapped[str | None]
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
+    deleted_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     # relationship.
     user: Mapped[User] = relationship("pyduck.auth.models.User")
@@ -454,3 +504,47 @@ class PostComment(db.Model):
         primaryjoin="PostComment.id == foreign(PostCommentReaction.target_id)",
         viewonly=True,
     )
+
+
+# Full-text search.
+# FTS5 virtual tables indexing plain text of title and content, whose rowid is
+# the id of question(or post). They aren't mapped, as they're maintained by
+# services and are only joined when searching.
+
+
+def _fts_table(name: str):
+    return table(
+        name,
+        column("rowid"),
+        column("title"),
+        column("content"),
+        column("rank"),
+        column(name),  # hidden column of the same name, the left side of MATCH.
+    )
+
+
+def _listen_fts_ddl(parent, name: str) -> None:
+    """Create(or drop) the virtual table along with its parent table."""
+
+    event.listen(
+        parent,
+        "after_create",
+        DDL(
+            f"CREATE VIRTUAL TABLE {name} USING fts5("
+            "title, content, tokenize='unicode61', prefix='2 3')"
+        ),
+    )
+    # weigh matches in title 10 times more than the ones in content.
+    event.listen(
+        parent,
+        "after_create",
+        DDL(f"INSERT INTO {name}({name}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"),
+    )
+    event.listen(parent, "before_drop", DDL(f"DROP TABLE IF EXISTS {name}"))
+
+
+question_fts = _fts_table("question_fts")
+post_fts = _fts_table("post_fts")
+
+_listen_fts_ddl(Question.__table__, "question_fts")
+_listen_fts_ddl(Post.__table__, "post_fts")
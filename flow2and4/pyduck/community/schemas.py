@@ -6,7 +6,7 @@ from datetime import datetime, timezone
 
 from pydantic import Field
 
-from flow2and4.pyduck.auth.schemas import UserRead
+from flow2and4.pyduck.auth.schemas import UserRead, UserView
 from flow2and4.pyduck.schemas import PyduckSchema
 
 
@@ -494,3 +494,125 @@ class PostCommentRead(PostCommentBase):
     votes: list[PostCommentVoteRead] | None
     history: list[PostCommentHistoryRead] | None
     reactions: list[PostCommentReactionRead] | None
+
+
+# Views.
+# Projections of what fragments render, so that rendering an item doesn't
+# serialize its parent, the authors of every vote and reaction, and so on.
+
+
+class HistoryView(PyduckSchema):
+    """Represent history as rendered, only when it was edited."""
+
+    id: int
+    created_at: datetime
+
+
+class QuestionListItem(PyduckSchema):
+    """Represent question as an item of question list."""
+
+    id: int
+    user_id: int
+    title: str
+    view_count: int
+    vote_count: int
+    comment_count: int
+    answered: bool
+    created_at: datetime
+
+    # relationship.
+    user: UserView
+
+
+class PostListItem(PyduckSchema):
+    """Represent post as an item of post list."""
+
+    id: int
+    user_id: int
+    category: str
+    title: str
+    view_count: int
+    vote_count: int
+    comment_count: int
+    created_at: datetime
+
+    # relationship.
+    user: UserView
+
+
+class QuestionRef(PyduckSchema):
+    """Represent question referred by its answer."""
+
+    id: int
+    user_id: int
+
+
+class AnswerRef(PyduckSchema):
+    """Represent answer referred by its comment."""
+
+    id: int
+    user_id: int
+    question_id: int
+
+
+class PostRef(PyduckSchema):
+    """Represent post referred by its comment."""
+
+    id: int
+    user_id: int
+
+
+class AnswerView(AnswerBase):
+    """Represent answer as rendered."""
+
+    id: int
+
+    # relationship.
+    user: UserView
+    question: QuestionRef
+    history: list[HistoryView]
+
+
+class AnswerCommentView(AnswerCommentBase):
+    """Represent answer comment as rendered."""
+
+    id: int
+
+    # relationship.
+    user: UserView
+    answer: AnswerRef
+    history: list[HistoryView]
+
+
+class CommentView(PostCommentBase):
+    """Represent post comment as rendered."""
+
+    id: int
+
+    # relationship.
+    user: UserView
+    post: PostRef
+    history: list[HistoryView]
+
+
+class ViewerState(PyduckSchema):
+    """Represent reaction counts of rendered targets and what the viewer did to them."""
+
+    votes: set[tuple[str, int]] = Field(default_factory=set)
+    reactions: set[tuple[str, int, str]] = Field(default_factory=set)
+    reaction_counts: dict[tuple[str, int, str], int] = Field(default_factory=dict)
+
+    def voted(self, target: str, target_id: int) -> bool:
+        """Return whether the viewer has voted the target."""
+
+        return (target, target_id) in self.votes
+
+    def reacted(self, target: str, target_id: int, code: str) -> bool:
+        """Return whether the viewer has reacted to the target with the code."""
+
+        return (target, target_id, code) in self.reactions
+
+    def reaction_count(self, target: str, target_id: int, code: str) -> int:
+        """Return the number of reactions to the target with the code."""
+
+        return self.reaction_counts.get((target, target_id, code), 0)
@@ -2,13 +2,23 @@
 This is the module for handling database transactions related to pyduck community.
 """
 
-from flask_sqlalchemy.pagination import Pagination
-from sqlalchemy import or_, select
-from sqlalchemy.orm import with_parent
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    literal,
+    null,
+    or_,
+    select,
+    union_all,
+    update
+)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import joinedload, selectinload, with_parent
 
-from flow2and4.database import db
+from flow2and4.database import commit, db
 from flow2and4.pyduck.auth.models import User
-from flow2and4.pyduck.community.helpers import date_filters
+from flow2and4.pyduck.community.helpers import html_to_text, period_start
 from flow2and4.pyduck.community.models import (
     Answer,
     AnswerComment,
@@ -34,33 +44,37 @@ from flow2and4.pyduck.community.models import (
     QuestionTag,
     QuestionVote,
     Reaction,
-    Vote
+    ReactionCount,
+    Vote,
+    post_fts,
+    question_fts
 )
 from flow2and4.pyduck.community.schemas import (
     AnswerCommentCreate,
     AnswerCommentHistoryCreate,
     AnswerCommentReactionCreate,
     AnswerCommentReactionRead,
-    AnswerCommentRead,
     AnswerCommentUpdate,
+    AnswerCommentView,
     AnswerCreate,
     AnswerHistoryCreate,
     AnswerReactionCreate,
     AnswerReactionRead,
-    AnswerRead,
     AnswerUpdate,
+    AnswerView,
     AnswerVoteCreate,
     AnswerVoteRead,
+    CommentView,
     PostCommentCreate,
     PostCommentHistoryCreate,
     PostCommentReactionCreate,
     PostCommentReactionRead,
-    PostCommentRead,
     PostCommentUpdate,
     PostCommentVoteCreate,
     PostCommentVoteRead,
     PostCreate,
     PostHistoryCreate,
+    PostListItem,
     PostReactionCreate,
     PostReactionRead,
     PostRead,
@@ -73,6 +87,7 @@ from flow2and4.pyduck.community.schemas import (
     QuestionHistoryCreate,
     QuestionImageUploadCreate,
     QuestionImageUploadRead,
+    QuestionListItem,
     QuestionReactionCreate,
     QuestionReactionRead,
     QuestionRead,
@@ -80,8 +95,10 @@ from flow2and4.pyduck.community.schemas import (
     QuestionTagRead,
     QuestionUpdate,
     QuestionVoteCreate,
-    QuestionVoteRead
+    QuestionVoteRead,
+    ViewerState
 )
+from flow2and4.pyduck.pagination import Page, paginate
 
 
 def create_question_image_upload(
@@ -91,11 +108,72 @@ def create_question_image_upload(
 
     upload = QuestionImageUpload(**upload_in.dict())
     db.session.add(upload)
-    db.session.commit()
+    commit()
 
     return QuestionImageUploadRead.from_orm(upload)
 
 
+def _fts_query(value: str) -> str:
+    """Return FTS5 query matching every word of value as a prefix."""
+
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in value.split())
+
+
+def _unindex(fts, *, id: int) -> None:
+    """Delete row of full-text search table."""
+
+    # lightweight table doesn't tell its bind, so route it by the bind key.
+    db.session.execute(
+        delete(fts).where(fts.c.rowid == id),
+        bind_arguments={"bind": db.engines["pyduck"]},
+    )
+
+
+def _index(fts, *, id: int, title: str, content: str) -> None:
+    """Insert(or replace) plain text of title and content in full-text search table."""
+
+    _unindex(fts, id=id)
+    db.session.execute(
+        insert(fts).values(rowid=id, title=title, content=html_to_text(content)),
+        bind_arguments={"bind": db.engines["pyduck"]},
+    )
+
+
+def _search(select_, model, fts, *, field: str, value: str):
+    """Apply searching to select and return it with the relevance to order by.
+
+    Title and content are matched in the full-text search table and ranked by
+    bm25, author is matched by nickname; "all" matches any of them.
+    """
+
+    authors = select(User.id).where(User.nickname.contains(value))
+    if field == "author":
+        return select_.where(model.user_id.in_(authors)), None
+
+    if field not in ("all", "title", "content"):
+        return select_.where(getattr(model, field).contains(value)), None
+
+    query = _fts_query(value)
+    if not query:
+        return select_, None
+
+    matched = fts.c[fts.name] if field == "all" else fts.c[field]
+    matches = (
+        select(fts.c.rowid.label("id"), fts.c.rank.label("rank"))
+        .where(matched.op("MATCH")(query))
+        .subquery()
+    )
+
+    if field == "all":
+        select_ = select_.outerjoin(matches, matches.c.id == model.id).where(
+            or_(matches.c.id.is_not(None), model.user_id.in_(authors))
+        )
+    else:
+        select_ = select_.join(matches, matches.c.id == model.id)
+
+    return select_, matches.c.rank.asc().nulls_last()
+
+
 def create_question(
     *, question_in: QuestionCreate, tags_in: list[QuestionTag]
 ) -> QuestionRead:
@@ -105,7 +183,12 @@ def create_question(
     for tag_in in tags_in:
         question.tags.append(tag_in)
     db.session.add(question)
-    db.session.commit()
+    db.session.flush()
+
+    _index(
+        question_fts, id=question.id, title=question.title, content=question.content
+    )
+    commit()
 
     return QuestionRead.from_orm(question)
 
@@ -121,7 +204,7 @@ def _create_tag_by_name(name: str) -> QuestionTag:
 
     tag = QuestionTag(name=name)
     db.session.add(tag)
-    db.session.commit()
+    commit()
 
     return tag
 
@@ -141,32 +224,27 @@ def get_or_create_tags(*, tags_in: list[str]) -> list[QuestionTagRead]:
 
 
 def get_all_questions_by_commons(
-    *, page, per_page, max_per_page, filters, sorters, periods, query
-) -> Pagination:
+    *, page, per_page, max_per_page, filters, sorters, periods, query, cursor
+) -> Page:
     """Select all questions by common parameters.
 
     TODO
     : non maintainable, not flexible...
     : very limited form and functionality of search-filter-sorter...
     """
-    select_ = select(Question)
+    select_ = (
+        select(Question)
+        .where(Question.deleted_at.is_(None))
+        .options(joinedload(Question.user).joinedload(User.avatar))
+    )
 
     # handle searching.
+    relevance = None
     if query is not None:
         field, _, value = query.split("-", maxsplit=2)
-
-        where_ = None
-        if field == "all":
-            where_ = or_(
-                Question.title.contains(value),
-                Question.content.contains(value),
-                Question.user.has(User.nickname.contains(value)),
-            )
-        elif field == "author":
-            where_ = Question.user.has(User.nickname.contains(value))
-        else:
-            where_ = getattr(Question, field).contains(value)
-        select_ = select_.where(where_)
+        select_, relevance = _search(
+            select_, Question, question_fts, field=field, value=value
+        )
 
     # handle filtering.
     filters = [] if filters is None else filters.split()
@@ -183,7 +261,7 @@ def get_all_questions_by_commons(
         if field == "answered":
             value = True if value.lower() == "true" else False
         if field == "created_at":
-            value = list(df["value"] for df in date_filters if df["code"] == filter_)[0]
+            value = period_start(filter_)
 
         # Operators
         if f == "eq":
@@ -202,11 +280,25 @@ def get_all_questions_by_commons(
         column = getattr(Question, field)
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
+    if relevance is not None:
+        _sorters.append(relevance)
     _sorters.append(Question.created_at.desc())  # default sorting.
+    _sorters.append(Question.id.desc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    pagination = paginate(
+        select_,
+        Question,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
+    pagination.items = [QuestionListItem.from_orm(q) for q in pagination.items]
+
+    return pagination
 
 
 def get_all_comments_to_post_comment_by_commons(
@@ -218,8 +310,9 @@ def get_all_comments_to_post_comment_by_commons(
     sorters,
     periods,
     query,
+    cursor,
     post_comment_id: int
-) -> Pagination:
+) -> Page:
     """Select all comments to post's comment by common parameters.
 
     TODO
@@ -227,7 +320,14 @@ def get_all_comments_to_post_comment_by_commons(
     : very limited form and functionality of search-filter-sorter...
     """
 
-    select_ = select(PostComment).filter_by(parent_id=post_comment_id)
+    select_ = (
+        select(PostComment)
+        .filter_by(parent_id=post_comment_id)
+        .options(
+            joinedload(PostComment.user).joinedload(User.avatar),
+            selectinload(PostComment.history),
+        )
+    )
 
     # handle filtering.
     filters = [] if filters is None else filters.split()
@@ -242,7 +342,7 @@ def get_all_comments_to_post_comment_by_commons(
 
         # Field customizations
         if field == "created_at":
-            value = list(df["value"] for df in date_filters if df["code"] == filter_)[0]
+            value = period_start(filter_)
 
         # Operators
         if f == "eq":
@@ -262,10 +362,19 @@ def get_all_comments_to_post_comment_by_commons(
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
     _sorters.append(PostComment.created_at.asc())  # default sorting.
+    _sorters.append(PostComment.id.asc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        PostComment,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
 def _get_question(id: int) -> Question | None:
@@ -314,7 +423,10 @@ def update_question_adding_history(
         question.tags.append(tag_in)
 
     db.session.add(history)
-    db.session.commit()
+    _index(
+        question_fts, id=question.id, title=question.title, content=question.content
+    )
+    commit()
 
     return QuestionRead.from_orm(question)
 
@@ -341,35 +453,70 @@ def update_post_adding_history(
         post.tags.append(tag_in)
 
     db.session.add(history)
-    db.session.commit()
+    _index(post_fts, id=post.id, title=post.title, content=post.content)
+    commit()
 
     return PostRead.from_orm(post)
 
 
-def create_question_vote(vote_in: QuestionVoteCreate) -> QuestionRead:
-    """Insert question vote in table."""
+def _add_to_count(model, *, id: int, column: str, delta: int):
+    """Add delta to the counter column of the row in place and return the row.
 
-    question = _get_question(id=vote_in.target_id)
-    question.vote_count += 1
+    `UPDATE ... SET column = column + delta ... RETURNING` doesn't read the
+    counter first, so concurrent requests never lose an update.
+    """
 
-    vote = QuestionVote(**vote_in.dict())
-    db.session.add(vote)
-    db.session.commit()
+    counter = getattr(model, column)
 
-    return QuestionRead.from_orm(question)
+    return db.session.scalars(
+        update(model)
+        .where(model.id == id)
+        .values({counter: counter + delta})
+        .returning(model),
+        execution_options={"populate_existing": True},
+    ).one()
 
 
-def create_post_vote(vote_in: PostVoteCreate) -> PostRead:
-    """Insert post vote in table."""
+def add_view_counts(*, target: str, views: dict[int, int]) -> None:
+    """Add views to `view_count` of the posts or questions in a single UPDATE."""
 
-    post = _get_post(id=vote_in.target_id)
-    post.vote_count += 1
+    model = {"post": Post, "question": Question}[target]
 
-    vote = PostVote(**vote_in.dict())
-    db.session.add(vote)
-    db.session.commit()
+    db.session.execute(
+        update(model)
+        .where(model.id.in_(views))
+        .values(view_count=model.view_count + case(views, value=model.id, else_=0)),
+        execution_options={"synchronize_session": False},
+    )
+    commit()
 
-    return PostRead.from_orm(post)
+
+def create_question_vote(vote_in: QuestionVoteCreate) -> tuple[QuestionRead, bool]:
+    """Insert vote unless it's cast, return question and whether it's inserted."""
+
+    voted = _insert_vote(vote_in)
+    question = (
+        _add_to_count(Question, id=vote_in.target_id, column="vote_count", delta=1)
+        if voted
+        else _get_question(vote_in.target_id)
+    )
+    commit()
+
+    return QuestionRead.from_orm(question), voted
+
+
+def create_post_vote(vote_in: PostVoteCreate) -> tuple[PostRead, bool]:
+    """Insert vote unless it's cast, return post and whether it's inserted."""
+
+    voted = _insert_vote(vote_in)
+    post = (
+        _add_to_count(Post, id=vote_in.target_id, column="vote_count", delta=1)
+        if voted
+        else _get_post(vote_in.target_id)
+    )
+    commit()
+
+    return PostRead.from_orm(post), voted
 
 
 def get_question_vote(*, question_id: int, user_id: int) -> QuestionVote:
@@ -388,54 +535,143 @@ def get_post_vote(*, target_id: int, user_id: int) -> PostVote:
     ).one_or_none()
 
 
-def delete_question_vote(*, question_id: int, user_id: int) -> QuestionRead:
-    """Delete question vote and return relevant question."""
+def delete_question_vote(
+    *, question_id: int, user_id: int
+) -> tuple[QuestionRead, bool]:
+    """Delete vote if it's cast, return question and whether it's deleted."""
 
-    question = _get_question(question_id)
-    question.vote_count -= 1
+    unvoted = _delete_vote(target="question", target_id=question_id, user_id=user_id)
+    question = (
+        _add_to_count(Question, id=question_id, column="vote_count", delta=-1)
+        if unvoted
+        else _get_question(question_id)
+    )
+    commit()
 
-    vote = get_question_vote(question_id=question_id, user_id=user_id)
-    db.session.delete(vote)
-    db.session.commit()
+    return QuestionRead.from_orm(question), unvoted
 
-    return QuestionRead.from_orm(question)
 
+def delete_post_vote(*, target_id: int, user_id: int) -> tuple[PostRead, bool]:
+    """Delete vote if it's cast, return post and whether it's deleted."""
 
-def delete_post_vote(*, target_id: int, user_id: int) -> PostRead:
-    """Delete post vote and return relevant question."""
+    unvoted = _delete_vote(target="post", target_id=target_id, user_id=user_id)
+    post = (
+        _add_to_count(Post, id=target_id, column="vote_count", delta=-1)
+        if unvoted
+        else _get_post(target_id)
+    )
+    commit()
 
-    post = _get_post(target_id)
-    post.vote_count -= 1
+    return PostRead.from_orm(post), unvoted
 
-    vote = get_post_vote(target_id=target_id, user_id=user_id)
-    db.session.delete(vote)
-    db.session.commit()
 
-    return PostRead.from_orm(post)
+def _count_reaction(*, target: str, target_id: int, code: str, delta: int) -> None:
+    """Add delta to the number of reactions to the target by code.
 
+    The upsert adds to the stored count in place, so concurrent reactions
+    never lose an update, and it's flushed within the caller's transaction.
+    """
 
-def create_question_reaction(*, reaction_in: QuestionReactionCreate) -> QuestionRead:
-    """Insert question reaction in table and return relevant question."""
+    db.session.execute(
+        insert(ReactionCount)
+        .values(target=target, target_id=target_id, code=code, count=max(delta, 0))
+        .on_conflict_do_update(
+            index_elements=["target", "target_id", "code"],
+            set_={"count": ReactionCount.count + delta},
+        )
+    )
 
-    question = _get_question(id=reaction_in.target_id)
 
-    reaction = QuestionReaction(**reaction_in.dict())
-    db.session.add(reaction)
-    db.session.commit()
+def _insert_vote(vote_in) -> bool:
+    """Insert vote unless it's cast already, return whether it's inserted.
+
+    `INSERT ... ON CONFLICT DO NOTHING` makes voting twice(e.g. double click)
+    a no-op instead of an IntegrityError, without selecting the vote first.
+    """
+
+    inserted = db.session.scalar(
+        insert(Vote)
+        .values(**vote_in.dict())
+        .on_conflict_do_nothing(index_elements=["user_id", "target", "target_id"])
+        .returning(Vote.id)
+    )
+
+    return inserted is not None
+
+
+def _delete_vote(*, target: str, target_id: int, user_id: int) -> bool:
+    """Delete vote if it's cast, return whether it's deleted."""
+
+    deleted = db.session.scalar(
+        delete(Vote)
+        .filter_by(target=target, target_id=target_id, user_id=user_id)
+        .returning(Vote.id)
+    )
+
+    return deleted is not None
+
+
+def _insert_reaction(reaction_in) -> bool:
+    """Insert reaction unless it's made already, return whether it's inserted.
+
+    The reaction count is added to only when it's inserted.
+    """
+
+    inserted = db.session.scalar(
+        insert(Reaction)
+        .values(**reaction_in.dict())
+        .on_conflict_do_nothing(
+            index_elements=["user_id", "target", "target_id", "code"]
+        )
+        .returning(Reaction.id)
+    )
+
+    if inserted is not None:
+        _count_reaction(
+            target=reaction_in.target,
+            target_id=reaction_in.target_id,
+            code=reaction_in.code,
+            delta=1,
+        )
+
+    return inserted is not None
 
-    return QuestionRead.from_orm(question)
 
+def _delete_reaction(*, target: str, target_id: int, user_id: int, code: str) -> bool:
+    """Delete reaction if it's made, return whether it's deleted."""
 
-def create_post_reaction(*, reaction_in: PostReactionCreate) -> PostRead:
-    """Insert post reaction in table and return relevant post."""
+    deleted = db.session.scalar(
+        delete(Reaction)
+        .filter_by(target=target, target_id=target_id, user_id=user_id, code=code)
+        .returning(Reaction.id)
+    )
+
+    if deleted is not None:
+        _count_reaction(target=target, target_id=target_id, code=code, delta=-1)
+
+    return deleted is not None
+
+
+def create_question_reaction(
+    *, reaction_in: QuestionReactionCreate
+) -> tuple[QuestionRead, bool]:
+    """Insert reaction unless made, return question and whether it's inserted."""
 
-    reaction = PostReaction(**reaction_in.dict())
-    db.session.add(reaction)
-    db.session.commit()
+    reacted = _insert_reaction(reaction_in)
+    question = _get_question(reaction_in.target_id)
+    commit()
 
+    return QuestionRead.from_orm(question), reacted
+
+
+def create_post_reaction(*, reaction_in: PostReactionCreate) -> tuple[PostRead, bool]:
+    """Insert reaction unless made, return post and whether it's inserted."""
+
+    reacted = _insert_reaction(reaction_in)
     post = _get_post(reaction_in.target_id)
+    commit()
 
-    return PostRead.from_orm(post)
+    return PostRead.from_orm(post), reacted
 
 
 def get_post_reaction(*, post_id: int, user_id: int, code: str) -> PostReaction | None:
@@ -472,57 +708,60 @@ def get_question_reaction(
 
 def delete_question_reaction(
     *, question_id: int, user_id: int, code: str
-) -> QuestionRead:
-    """Delete question reaction and return relevant question."""
+) -> tuple[QuestionRead, bool]:
+    """Delete reaction if made, return question and whether it's deleted."""
 
-    reaction = get_question_reaction(
-        question_id=question_id, user_id=user_id, code=code
+    unreacted = _delete_reaction(
+        target="question", target_id=question_id, user_id=user_id, code=code
     )
-    db.session.delete(reaction)
-    db.session.commit()
-
-    question = get_question(question_id=question_id)
+    question = _get_question(question_id)
+    commit()
 
-    return QuestionRead.from_orm(question)
+    return QuestionRead.from_orm(question), unreacted
 
 
-def delete_post_reaction(*, post_id: int, user_id: int, code: str) -> PostRead:
-    """Delete post reaction and return relevant post."""
+def delete_post_reaction(
+    *, post_id: int, user_id: int, code: str
+) -> tuple[PostRead, bool]:
+    """Delete reaction if made, return post and whether it's deleted."""
 
-    reaction = get_post_reaction(post_id=post_id, user_id=user_id, code=code)
-    db.session.delete(reaction)
-    db.session.commit()
+    unreacted = _delete_reaction(
+        target="post", target_id=post_id, user_id=user_id, code=code
+    )
+    post = _get_post(post_id)
+    commit()
 
-    post = get_post(post_id=post_id)
-    return PostRead.from_orm(post)
+    return PostRead.from_orm(post), unreacted
 
 
-def create_answer(*, answer_in: AnswerCreate) -> AnswerRead:
+def create_answer(*, answer_in: AnswerCreate) -> AnswerView:
     """Insert answer in table."""
 
     answer = Answer(**answer_in.dict())
     db.session.add(answer)
 
-    question = _get_question(answer.question_id)
-    question.comment_count += 1
+    _add_to_count(
+        Question, id=answer_in.question_id, column="comment_count", delta=1
+    )
 
-    db.session.commit()
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer)
 
 
-def create_post_comment(*, post_comment_in: PostCommentCreate) -> PostCommentRead:
+def create_post_comment(*, post_comment_in: PostCommentCreate) -> CommentView:
     """Insert post comment in table."""
 
     post_comment = PostComment(**post_comment_in.dict())
     db.session.add(post_comment)
 
-    post = _get_post(post_comment.post_id)
-    post.comment_count += 1
+    _add_to_count(
+        Post, id=post_comment_in.post_id, column="comment_count", delta=1
+    )
 
-    db.session.commit()
+    commit()
 
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment)
 
 
 def delete_post_comment(*, post_comment_id: int) -> PostRead:
@@ -531,10 +770,11 @@ def delete_post_comment(*, post_comment_id: int) -> PostRead:
     post_comment = _get_post_comment(post_comment_id)
     db.session.delete(post_comment)
 
-    post = _get_post(post_comment.post_id)
-    post.comment_count -= 1
+    post = _add_to_count(
+        Post, id=post_comment.post_id, column="comment_count", delta=-1
+    )
 
-    db.session.commit()
+    commit()
 
     return PostRead.from_orm(post)
 
@@ -545,28 +785,30 @@ def delete_answer(*, answer_id: int) -> QuestionRead:
     answer = _get_answer(answer_id)
     db.session.delete(answer)
 
-    question = _get_question(answer.question_id)
-    question.comment_count -= 1
+    question = _add_to_count(
+        Question, id=answer.question_id, column="comment_count", delta=-1
+    )
 
-    db.session.commit()
+    commit()
 
     return QuestionRead.from_orm(question)
 
 
 def create_comment_to_post_comment(
     *, post_comment_in: PostCommentCreate
-) -> PostCommentRead:
+) -> CommentView:
     """Insert post comment in table. (depth 2)"""
 
     post_comment = PostComment(**post_comment_in.dict())
     db.session.add(post_comment)
 
-    parent_post_comment = _get_post_comment(post_comment.parent_id)
-    parent_post_comment.comment_count += 1
+    _add_to_count(
+        PostComment, id=post_comment_in.parent_id, column="comment_count", delta=1
+    )
 
-    db.session.commit()
+    commit()
 
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment)
 
 
 def _get_answer(id: int) -> Answer | None:
@@ -581,23 +823,23 @@ def _get_comment_to_post_comment(id: int) -> PostComment | None:
     return _get_post_comment(id)
 
 
-def get_answer(*, answer_id: int) -> AnswerRead | None:
+def get_answer(*, answer_id: int) -> AnswerView | None:
     """Select question."""
 
     answer = _get_answer(answer_id)
 
-    return AnswerRead.from_orm(answer) if answer is not None else None
+    return AnswerView.from_orm(answer) if answer is not None else None
 
 
-def get_post_comment(*, post_comment_id: int) -> PostCommentRead | None:
+def get_post_comment(*, post_comment_id: int) -> CommentView | None:
     """Select post comment."""
 
     post_comment = _get_post_comment(post_comment_id)
 
-    return PostCommentRead.from_orm(post_comment) if post_comment is not None else None
+    return CommentView.from_orm(post_comment) if post_comment is not None else None
 
 
-def get_comment_to_post_comment(*, comment_id: int) -> PostCommentRead | None:
+def get_comment_to_post_comment(*, comment_id: int) -> CommentView | None:
     """Select comment to post comment."""
     return get_post_comment(post_comment_id=comment_id)
 
@@ -607,24 +849,24 @@ def delete_comment_to_post_comment(*, comment_id: int) -> None:
 
     comment = _get_comment_to_post_comment(comment_id)
 
-    post_comment = _get_post_comment(comment.parent_id)
-    post_comment.comment_count -= 1
+    _add_to_count(PostComment, id=comment.parent_id, column="comment_count", delta=-1)
 
     db.session.delete(comment)
-    db.session.commit()
+    commit()
 
 
-def create_answer_vote(vote_in: AnswerVoteCreate) -> AnswerRead:
-    """Insert answer vote and return relevant answer."""
+def create_answer_vote(vote_in: AnswerVoteCreate) -> tuple[AnswerView, bool]:
+    """Insert vote unless it's cast, return answer and whether it's inserted."""
 
-    answer = _get_answer(id=vote_in.target_id)
-    answer.vote_count += 1
-
-    vote = AnswerVote(**vote_in.dict())
-    db.session.add(vote)
-    db.session.commit()
+    voted = _insert_vote(vote_in)
+    answer = (
+        _add_to_count(Answer, id=vote_in.target_id, column="vote_count", delta=1)
+        if voted
+        else _get_answer(vote_in.target_id)
+    )
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer), voted
 
 
 def get_answer_vote(*, answer_id: int, user_id: int) -> AnswerVote:
@@ -635,29 +877,30 @@ def get_answer_vote(*, answer_id: int, user_id: int) -> AnswerVote:
     ).one_or_none()
 
 
-def delete_answer_vote(*, answer_id: int, user_id: int) -> AnswerRead:
-    """Delete answer vote and return relevant answer."""
+def delete_answer_vote(*, answer_id: int, user_id: int) -> tuple[AnswerView, bool]:
+    """Delete vote if it's cast, return answer and whether it's deleted."""
 
-    answer = _get_answer(id=answer_id)
-    answer.vote_count -= 1
-
-    vote = get_answer_vote(answer_id=answer_id, user_id=user_id)
-    db.session.delete(vote)
-    db.session.commit()
-
-    return AnswerRead.from_orm(answer)
+    unvoted = _delete_vote(target="answer", target_id=answer_id, user_id=user_id)
+    answer = (
+        _add_to_count(Answer, id=answer_id, column="vote_count", delta=-1)
+        if unvoted
+        else _get_answer(answer_id)
+    )
+    commit()
 
+    return AnswerView.from_orm(answer), unvoted
 
-def create_answer_reaction(*, reaction_in: AnswerReactionCreate) -> AnswerRead:
-    """Insert answer reaction in table and return relevant answer."""
 
-    answer = _get_answer(id=reaction_in.target_id)
+def create_answer_reaction(
+    *, reaction_in: AnswerReactionCreate
+) -> tuple[AnswerView, bool]:
+    """Insert reaction unless made, return answer and whether it's inserted."""
 
-    reaction = AnswerReaction(**reaction_in.dict())
-    db.session.add(reaction)
-    db.session.commit()
+    reacted = _insert_reaction(reaction_in)
+    answer = _get_answer(reaction_in.target_id)
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer), reacted
 
 
 def get_answer_reaction(
@@ -672,15 +915,18 @@ def get_answer_reaction(
     ).one_or_none()
 
 
-def delete_answer_reaction(*, answer_id: int, user_id: int, code: str) -> AnswerRead:
-    """Delete answer reaction and return relevant question."""
+def delete_answer_reaction(
+    *, answer_id: int, user_id: int, code: str
+) -> tuple[AnswerView, bool]:
+    """Delete reaction if made, return answer and whether it's deleted."""
 
-    reaction = get_answer_reaction(answer_id=answer_id, user_id=user_id, code=code)
-    db.session.delete(reaction)
-    db.session.commit()
+    unreacted = _delete_reaction(
+        target="answer", target_id=answer_id, user_id=user_id, code=code
+    )
+    answer = _get_answer(answer_id)
+    commit()
 
-    answer = get_answer(answer_id=answer_id)
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer), unreacted
 
 
 def get_all_answers_by_commons(
@@ -692,15 +938,24 @@ def get_all_answers_by_commons(
     sorters,
     periods,
     query: str,
+    cursor,
     question_id: int
-) -> Pagination:
+) -> Page:
     """Select all answers by common parameters.
 
     TODO
     : very limited form and functionality of search-filter-sorter...
     """
     model = Answer
-    select_ = select(model).filter_by(question_id=question_id)
+    select_ = (
+        select(model)
+        .filter_by(question_id=question_id)
+        .options(
+            joinedload(model.user).joinedload(User.avatar),
+            joinedload(model.question),
+            selectinload(model.history),
+        )
+    )
 
     # handle searching.
     if query is not None:
@@ -729,22 +984,47 @@ def get_all_answers_by_commons(
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
     _sorters.append(model.created_at.asc())  # default sorting.
+    _sorters.append(model.id.asc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        model,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
 def get_all_comments_to_post_by_commons(
-    *, page, per_page, max_per_page, filters, sorters, periods, query, post_id: int
-) -> Pagination:
+    *,
+    page,
+    per_page,
+    max_per_page,
+    filters,
+    sorters,
+    periods,
+    query,
+    cursor,
+    post_id: int
+) -> Page:
     """Select all comments to specific post by common parameters.
 
     TODO
     : very limited form and functionality of search-filter-sorter...
     """
     model = PostComment
-    select_ = select(model).filter_by(post_id=post_id, parent_id=None)
+    select_ = (
+        select(model)
+        .filter_by(post_id=post_id, parent_id=None)
+        .options(
+            joinedload(model.user).joinedload(User.avatar),
+            selectinload(model.history),
+        )
+    )
 
     # handle searching.
     if query is not None:
@@ -773,13 +1053,22 @@ def get_all_comments_to_post_by_commons(
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
     _sorters.append(model.created_at.asc())  # default sorting.
+    _sorters.append(model.id.asc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        model,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
-def update_answer_adding_history(*, answer_in: AnswerUpdate) -> AnswerRead:
+def update_answer_adding_history(*, answer_in: AnswerUpdate) -> AnswerView:
     """Update question, insert question history in table."""
 
     answer = _get_answer(answer_in.id)
@@ -792,14 +1081,14 @@ def update_answer_adding_history(*, answer_in: AnswerUpdate) -> AnswerRead:
     for column, value in updated_data.items():
         setattr(answer, column, value)
 
-    db.session.commit()
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer)
 
 
 def update_post_comment_adding_history(
     *, post_comment_in: PostCommentUpdate
-) -> PostCommentRead:
+) -> CommentView:
     """Update question, insert question history in table."""
 
     post_comment = _get_post_comment(post_comment_in.id)
@@ -814,36 +1103,35 @@ def update_post_comment_adding_history(
     for column, value in updated_data.items():
         setattr(post_comment, column, value)
 
-    db.session.commit()
+    commit()
 
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment)
 
 
-def create_answer_comment(*, comment_in: AnswerCommentCreate) -> AnswerCommentRead:
+def create_answer_comment(*, comment_in: AnswerCommentCreate) -> AnswerCommentView:
     """Insert answer's comment in table."""
 
     comment = AnswerComment(**comment_in.dict())
     db.session.add(comment)
 
-    answer = _get_answer(comment.answer_id)
-    answer.comment_count += 1
+    _add_to_count(Answer, id=comment_in.answer_id, column="comment_count", delta=1)
 
-    db.session.commit()
+    commit()
 
-    return AnswerCommentRead.from_orm(comment)
+    return AnswerCommentView.from_orm(comment)
 
 
 def _get_answer_comment(id: int) -> AnswerComment | None:
     return db.session.scalars(select(AnswerComment).filter_by(id=id)).one_or_none()
 
 
-def get_answer_comment(*, answer_comment_id: int) -> AnswerCommentRead | None:
+def get_answer_comment(*, answer_comment_id: int) -> AnswerCommentView | None:
     """Select question."""
 
     answer_comment = _get_answer_comment(answer_comment_id)
 
     return (
-        AnswerCommentRead.from_orm(answer_comment)
+        AnswerCommentView.from_orm(answer_comment)
         if answer_comment is not None
         else None
     )
@@ -863,36 +1151,33 @@ def get_answer_comment_reaction(
 
 def create_answer_comment_reaction(
     *, reaction_in: AnswerCommentReactionCreate
-) -> AnswerCommentRead:
-    """Insert answer comment reaction in table and return relevant comment."""
+) -> tuple[AnswerCommentView, bool]:
+    """Insert reaction unless made, return answer comment and whether it's inserted."""
 
+    reacted = _insert_reaction(reaction_in)
     answer_comment = _get_answer_comment(reaction_in.target_id)
+    commit()
 
-    reaction = AnswerCommentReaction(**reaction_in.dict())
-    db.session.add(reaction)
-    db.session.commit()
-
-    return AnswerCommentRead.from_orm(answer_comment)
+    return AnswerCommentView.from_orm(answer_comment), reacted
 
 
 def delete_answer_comment_reaction(
     *, answer_comment_id: int, user_id: int, code: str
-) -> AnswerCommentRead:
-    """Delete answer comment reaction and return relevant answer comment."""
+) -> tuple[AnswerCommentView, bool]:
+    """Delete reaction if made, return answer comment and whether it's deleted."""
 
-    reaction = get_answer_comment_reaction(
-        answer_comment_id=answer_comment_id, user_id=user_id, code=code
+    unreacted = _delete_reaction(
+        target="answer_comment", target_id=answer_comment_id, user_id=user_id, code=code
     )
-    db.session.delete(reaction)
-    db.session.commit()
+    answer_comment = _get_answer_comment(answer_comment_id)
+    commit()
 
-    answer_comment = get_answer_comment(answer_comment_id=answer_comment_id)
-    return AnswerCommentRead.from_orm(answer_comment)
+    return AnswerCommentView.from_orm(answer_comment), unreacted
 
 
 def update_answer_comment_adding_history(
     *, answer_comment: AnswerCommentUpdate
-) -> AnswerCommentRead:
+) -> AnswerCommentView:
     """Update comment, insert comment history in table."""
 
     comment = _get_answer_comment(answer_comment.id)
@@ -907,9 +1192,9 @@ def update_answer_comment_adding_history(
     for column, value in updated_data.items():
         setattr(comment, column, value)
 
-    db.session.commit()
+    commit()
 
-    return AnswerCommentRead.from_orm(comment)
+    return AnswerCommentView.from_orm(comment)
 
 
 def mark_answer_as_answered(*, answer_id: int):
@@ -921,9 +1206,9 @@ def mark_answer_as_answered(*, answer_id: int):
     question = _get_question(answer.question_id)
     question.answered = True
 
-    db.session.commit()
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer)
 
 
 def mark_answer_as_unanswered(*, answer_id: int):
@@ -935,9 +1220,9 @@ def mark_answer_as_unanswered(*, answer_id: int):
     question = _get_question(answer.question_id)
     question.answered = False
 
-    db.session.commit()
+    commit()
 
-    return AnswerRead.from_orm(answer)
+    return AnswerView.from_orm(answer)
 
 
 def get_all_answer_comments_by_commons(
@@ -949,15 +1234,23 @@ def get_all_answer_comments_by_commons(
     sorters,
     periods,
     query: str,
+    cursor,
     answer_id: int
-) -> Pagination:
+) -> Page:
     """Select all answer comments in specific answer by common parameters.
 
     TODO
     : very limited form and functionality of search-filter-sorter...
     """
     model = AnswerComment
-    select_ = select(model).filter_by(answer_id=answer_id)
+    select_ = (
+        select(model)
+        .filter_by(answer_id=answer_id)
+        .options(
+            joinedload(model.user).joinedload(User.avatar),
+            selectinload(model.history),
+        )
+    )
 
     # handle searching.
     if query is not None:
@@ -986,10 +1279,19 @@ def get_all_answer_comments_by_commons(
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
     _sorters.append(model.created_at.asc())  # default sorting.
+    _sorters.append(model.id.asc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        model,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
 def _get_post_tag_by_name(name: str) -> PostTagRead | None:
@@ -1003,7 +1305,7 @@ def _create_post_tag_by_name(name: str) -> PostTag:
 
     tag = PostTag(name=name)
     db.session.add(tag)
-    db.session.commit()
+    commit()
 
     return tag
 
@@ -1030,7 +1332,10 @@ def create_post(*, post_in: PostCreate, tags_in: list[PostTag]) -> PostRead:
     for tag_in in tags_in:
         post.tags.append(tag_in)
     db.session.add(post)
-    db.session.commit()
+    db.session.flush()
+
+    _index(post_fts, id=post.id, title=post.title, content=post.content)
+    commit()
 
     return PostRead.from_orm(post)
 
@@ -1040,36 +1345,31 @@ def delete_post(*, post_id) -> None:
 
     post = _get_post(post_id)
     db.session.delete(post)
-    db.session.commit()
+    _unindex(post_fts, id=post_id)
+    commit()
 
 
 def get_all_posts_by_commons_and_category(
-    *, page, per_page, max_per_page, filters, sorters, periods, query, category
-) -> Pagination:
+    *, page, per_page, max_per_page, filters, sorters, periods, query, cursor, category
+) -> Page:
     """Select all posts by common parameters.
 
     TODO
     : non maintainable, not flexible...
     : very limited form and functionality of search-filter-sorter...
     """
-    select_ = select(Post).filter_by(category=category)
+    select_ = (
+        select(Post)
+        .filter_by(category=category)
+        .where(Post.deleted_at.is_(None))
+        .options(joinedload(Post.user).joinedload(User.avatar))
+    )
 
     # handle searching.
+    relevance = None
     if query is not None:
         field, _, value = query.split("-", maxsplit=2)
-
-        where_ = None
-        if field == "all":
-            where_ = or_(
-                Post.title.contains(value),
-                Post.content.contains(value),
-                Post.user.has(User.nickname.contains(value)),
-            )
-        elif field == "author":
-            where_ = Post.user.has(User.nickname.contains(value))
-        else:
-            where_ = getattr(Post, field).contains(value)
-        select_ = select_.where(where_)
+        select_, relevance = _search(select_, Post, post_fts, field=field, value=value)
 
     # handle filtering.
     filters = [] if filters is None else filters.split()
@@ -1086,7 +1386,7 @@ def get_all_posts_by_commons_and_category(
         if field == "answered":
             value = True if value.lower() == "true" else False
         if field == "created_at":
-            value = list(df["value"] for df in date_filters if df["code"] == filter_)[0]
+            value = period_start(filter_)
 
         # Operators
         if f == "eq":
@@ -1105,24 +1405,41 @@ def get_all_posts_by_commons_and_category(
         column = getattr(Post, field)
         _sorters.append(column.asc() if direction == "asc" else column.desc())
 
+    if relevance is not None:
+        _sorters.append(relevance)
     _sorters.append(Post.created_at.desc())  # default sorting.
+    _sorters.append(Post.id.desc())
     select_ = select_.order_by(*_sorters)
 
     # handle paginating and return.
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    pagination = paginate(
+        select_,
+        Post,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
+    pagination.items = [PostListItem.from_orm(post) for post in pagination.items]
 
+    return pagination
 
-def create_post_comment_vote(vote_in: PostCommentVoteCreate) -> PostCommentRead:
-    """Insert post comment vote and return relevant post comment."""
 
-    post_comment = _get_post_comment(vote_in.target_id)
-    post_comment.vote_count += 1
+def create_post_comment_vote(
+    vote_in: PostCommentVoteCreate,
+) -> tuple[CommentView, bool]:
+    """Insert vote unless it's cast, return post comment and whether it's inserted."""
 
-    vote = PostCommentVote(**vote_in.dict())
-    db.session.add(vote)
-    db.session.commit()
+    voted = _insert_vote(vote_in)
+    post_comment = (
+        _add_to_count(PostComment, id=vote_in.target_id, column="vote_count", delta=1)
+        if voted
+        else _get_post_comment(vote_in.target_id)
+    )
+    commit()
 
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment), voted
 
 
 def get_post_comment_vote(*, post_comment_id: int, user_id: int) -> PostCommentVote:
@@ -1133,51 +1450,53 @@ def get_post_comment_vote(*, post_comment_id: int, user_id: int) -> PostCommentV
     ).one_or_none()
 
 
-def delete_post_comment_vote(*, post_comment_id: int, user_id: int) -> PostCommentRead:
-    """Delete post comment vote and return relevant post comment."""
+def delete_post_comment_vote(
+    *, post_comment_id: int, user_id: int
+) -> tuple[CommentView, bool]:
+    """Delete vote if it's cast, return post comment and whether it's deleted."""
 
-    post_comment = _get_post_comment(post_comment_id)
-    post_comment.vote_count -= 1
-
-    vote = get_post_comment_vote(post_comment_id=post_comment_id, user_id=user_id)
-    db.session.delete(vote)
-    db.session.commit()
+    unvoted = _delete_vote(
+        target="post_comment", target_id=post_comment_id, user_id=user_id
+    )
+    post_comment = (
+        _add_to_count(PostComment, id=post_comment_id, column="vote_count", delta=-1)
+        if unvoted
+        else _get_post_comment(post_comment_id)
+    )
+    commit()
 
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment), unvoted
 
 
 def create_post_comment_reaction(
     *, reaction_in: PostCommentReactionCreate
-) -> PostCommentRead:
-    """Insert post comment's reaction in table and return relevant post comment."""
+) -> tuple[CommentView, bool]:
+    """Insert reaction unless made, return post comment and whether it's inserted."""
 
+    reacted = _insert_reaction(reaction_in)
     post_comment = _get_post_comment(reaction_in.target_id)
+    commit()
 
-    reaction = PostCommentReaction(**reaction_in.dict())
-    db.session.add(reaction)
-    db.session.commit()
-
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment), reacted
 
 
 def delete_post_comment_reaction(
     *, post_comment_id: int, user_id: int, code: str
-) -> PostCommentRead:
-    """Delete answer reaction and return relevant question."""
+) -> tuple[CommentView, bool]:
+    """Delete reaction if made, return post comment and whether it's deleted."""
 
-    reaction = get_post_comment_reaction(
-        post_comment_id=post_comment_id, user_id=user_id, code=code
+    unreacted = _delete_reaction(
+        target="post_comment", target_id=post_comment_id, user_id=user_id, code=code
     )
-    db.session.delete(reaction)
-    db.session.commit()
+    post_comment = _get_post_comment(post_comment_id)
+    commit()
 
-    post_comment = get_post_comment(post_comment_id=post_comment_id)
-    return PostCommentRead.from_orm(post_comment)
+    return CommentView.from_orm(post_comment), unreacted
 
 
 def get_all_votes_by_commons(
-    *, page, per_page, max_per_page, filters, sorters, query, periods
-) -> Pagination:
+    *, page, per_page, max_per_page, filters, sorters, query, periods, cursor
+) -> Page:
     """Select all votes given common parameters.
 
     TODO
@@ -1212,14 +1531,23 @@ def get_all_votes_by_commons(
         field, direction = sorter_.split("-")
         column = getattr(Vote, field)
         sorter_conditions.append(column.asc() if direction == "asc" else column.desc())
+    sorter_conditions.append(Vote.id.desc())
     select_ = select_.order_by(*sorter_conditions)
 
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        Vote,
+        order_by=sorter_conditions,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
 
 
 def get_all_reactions_by_commons(
-    *, page, per_page, max_per_page, filters, sorters, query, periods
-) -> Pagination:
+    *, page, per_page, max_per_page, filters, sorters, query, periods, cursor
+) -> Page:
     """Select all reactions given common parameters.
 
     TODO
@@ -1254,6 +1582,83 @@ def get_all_reactions_by_commons(
         field, direction = sorter_.split("-")
         column = getattr(Reaction, field)
         sorter_conditions.append(column.asc() if direction == "asc" else column.desc())
+    sorter_conditions.append(Reaction.id.desc())
     select_ = select_.order_by(*sorter_conditions)
 
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    return paginate(
+        select_,
+        Reaction,
+        order_by=sorter_conditions,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
+
+
+def get_viewer_state(
+    *, user_id: int | None, targets: dict[str, list[int]]
+) -> ViewerState:
+    """Select reaction counts of the targets and the viewer's votes and reactions.
+
+    `targets` maps target(e.g. "post", "post_comment") to ids being rendered.
+    Everything is selected in one query; the viewer's part is served by the
+    unique indexes led by `user_id` and the counts by their primary key.
+    """
+
+    targets = {target: ids for target, ids in targets.items() if ids}
+    if not targets:
+        return ViewerState()
+
+    def of_targets(model):
+        return or_(
+            *[
+                and_(model.target == target, model.target_id.in_(ids))
+                for target, ids in targets.items()
+            ]
+        )
+
+    selects = [
+        select(
+            literal("count").label("kind"),
+            ReactionCount.target,
+            ReactionCount.target_id,
+            ReactionCount.code,
+            ReactionCount.count,
+        ).where(of_targets(ReactionCount), ReactionCount.count > 0)
+    ]
+    if user_id is not None:
+        selects.append(
+            select(
+                literal("vote").label("kind"),
+                Vote.target,
+                Vote.target_id,
+                null().label("code"),
+                null().label("count"),
+            ).where(Vote.user_id == user_id, of_targets(Vote))
+        )
+        selects.append(
+            select(
+                literal("reaction").label("kind"),
+                Reaction.target,
+                Reaction.target_id,
+                Reaction.code,
+                null().label("count"),
+            ).where(Reaction.user_id == user_id, of_targets(Reaction))
+        )
+
+    # compound select doesn't tell its bind, so route it by the mapper.
+    rows = db.session.execute(
+        union_all(*selects), bind_arguments={"mapper": ReactionCount}
+    )
+
+    viewer = ViewerState()
+    for kind, target, target_id, code, count in rows:
+        if kind == "count":
+            viewer.reaction_counts[(target, target_id, code)] = count
+        elif kind == "vote":
+            viewer.votes.add((target, target_id))
+        else:
+            viewer.reactions.add((target, target_id, code))
+
+    return viewer
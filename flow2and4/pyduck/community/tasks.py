@@ -0,0 +1,267 @@
+"""
+This is the module for defining background tasks related to pyduck community.
+
+[tasks]
+flush_buffer
+flush_views
+"""
+
+import json
+import logging
+
+from celery import shared_task
+from flask import current_app
+from redis.exceptions import LockError
+from sqlalchemy.exc import SQLAlchemyError
+
+from flow2and4.database import unit_of_work
+from flow2and4.pyduck.auth.schemas import (
+    UserActionReactionPostCreate,
+    UserActionVotePostCreate
+)
+from flow2and4.pyduck.auth.service import create_user_action, delete_user_action
+from flow2and4.pyduck.community.buffer import LOCK, VIEWS_LOCK, buffer
+from flow2and4.pyduck.community.schemas import PostReactionCreate, PostVoteCreate
+from flow2and4.pyduck.community.service import (
+    add_view_counts,
+    create_post_reaction,
+    create_post_vote,
+    delete_post_reaction,
+    delete_post_vote,
+    get_post
+)
+from flow2and4.pyduck.models import from_epoch_ms
+from flow2and4.pyduck.notification.schemas import (
+    NotificationForPostReactionCreate,
+    NotificationForPostVoteCreate
+)
+from flow2and4.pyduck.notification.service import (
+    create_notification,
+    delete_notification
+)
+from flow2and4.pyduck.notification.tasks import publish_notification
+
+logger = logging.getLogger(__name__)
+
+# seconds a flush may hold its lock for each batch.
+LOCK_TIMEOUT = 60
+
+
+def _apply_post_vote(op: dict, published: list) -> None:
+    """Apply buffered vote or unvote to post along with its side effects."""
+
+    post_id, user_id = op["target_id"], op["user_id"]
+
+    if op["on"]:
+        vote_in = PostVoteCreate(
+            user_id=user_id, target_id=post_id, created_at=from_epoch_ms(op["at"])
+        )
+        post, voted = create_post_vote(vote_in=vote_in)
+
+        if voted:
+            create_user_action(
+                user_action_in=UserActionVotePostCreate(
+                    user_id=user_id, target_id=post_id
+                )
+            )
+
+            if post.user_id != user_id:
+                notification_in = NotificationForPostVoteCreate(
+                    user_id=post.user_id,
+                    notification_target_id=post_id,
+                    from_user_id=user_id,
+                    to_user_id=post.user_id,
+                )
+                create_notification(notification_in=notification_in)
+                published.append((post.user_id, post_id))
+
+    else:
+        post, unvoted = delete_post_vote(target_id=post_id, user_id=user_id)
+
+        if unvoted:
+            delete_user_action(
+                user_id=user_id, action_type="vote_post", target_id=post_id
+            )
+
+            if post.user_id != user_id:
+                delete_notification(
+                    user_id=post.user_id,
+                    notification_type="vote_post",
+                    notification_target_id=post_id,
+                    from_user_id=user_id,
+                    to_user_id=post.user_id,
+                )
+
+
+def _apply_post_reaction(op: dict, published: list) -> None:
+    """Apply buffered reaction or unreaction to post along with its side effects."""
+
+    post_id, user_id, code = op["target_id"], op["user_id"], op["code"]
+
+    if op["on"]:
+        reaction_in = PostReactionCreate(
+            user_id=user_id,
+            target_id=post_id,
+            code=code,
+            created_at=from_epoch_ms(op["at"]),
+        )
+        post, reacted = create_post_reaction(reaction_in=reaction_in)
+
+        if reacted:
+            create_user_action(
+                user_action_in=UserActionReactionPostCreate(
+                    user_id=user_id, target_id=post_id, action_value=code
+                )
+            )
+
+            if post.user_id != user_id:
+                notification_in = NotificationForPostReactionCreate(
+                    user_id=post.user_id,
+                    notification_value=code,
+                    notification_target_id=post_id,
+                    from_user_id=user_id,
+                    to_user_id=post.user_id,
+                )
+                create_notification(notification_in=notification_in)
+
+    else:
+        post, unreacted = delete_post_reaction(
+            post_id=post_id, user_id=user_id, code=code
+        )
+
+        if unreacted:
+            delete_user_action(
+                user_id=user_id,
+                action_type="reaction_post",
+                target_id=post_id,
+                action_value=code,
+            )
+
+            if post.user_id != user_id:
+                delete_notification(
+                    user_id=post.user_id,
+                    notification_type="reaction_post",
+                    notification_target_id=post_id,
+                    notification_value=code,
+                    from_user_id=user_id,
+                    to_user_id=post.user_id,
+                )
+
+
+APPLIERS = {
+    ("vote", "post"): _apply_post_vote,
+    ("reaction", "post"): _apply_post_reaction,
+}
+
+
+def _apply(op: dict, published: list) -> None:
+    """Apply buffered op, skipping the one whose target is deleted meanwhile."""
+
+    if op["target"] == "post" and get_post(post_id=op["target_id"]) is None:
+        return
+
+    APPLIERS[(op["kind"], op["target"])](op, published)
+
+
+def _flush_batch(ops: list[bytes]) -> list[int]:
+    """Apply ops in one transaction, return (user, post) to be notified of votes.
+
+    When the batch fails, its ops are applied one by one, so that an op which
+    can't be applied(e.g. its user is deleted) doesn't hold back the others.
+    """
+
+    decoded = [json.loads(op) for op in ops]
+    published = []
+
+    try:
+        with unit_of_work():
+            for op in decoded:
+                _apply(op, published)
+        return published
+    except SQLAlchemyError:
+        logger.exception("failed to flush buffered batch, retrying one by one.")
+
+    published = []
+    for op in decoded:
+        try:
+            with unit_of_work():
+                _apply(op, published)
+        except SQLAlchemyError:
+            logger.exception("dropped buffered op %s.", op)
+
+    return published
+
+
+def _release(lock) -> None:
+    """Release the lock of a flush, which may have expired while flushing."""
+
+    try:
+        lock.release()
+    except LockError:
+        logger.warning("lock %s expired before the flush finished.", lock.name)
+
+
+@shared_task(ignore_result=True)
+def flush_buffer() -> int:
+    """Flush buffered votes and reactions to database in batches.
+
+    Only one flush runs at a time. Each batch is acknowledged after it has
+    committed, and a batch left unacknowledged by a dead worker is replayed
+    first. Returns the number of ops flushed.
+    """
+
+    size = current_app.config.get("WRITE_BEHIND_BATCH_SIZE", 500)
+    lock = buffer.redis.lock(LOCK, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    flushed = 0
+    try:
+        while ops := buffer.take(size):
+            published = _flush_batch(ops)
+            buffer.ack(ops)
+            flushed += len(ops)
+
+            # publish after commit, so the subscriber finds the notification.
+            for user_id, post_id in dict.fromkeys(published):
+                publish_notification(
+                    user_id=user_id,
+                    event="post:vote",
+                    notification_type="vote_post",
+                    notification_target_id=post_id,
+                )
+
+            # hold the lock for the next batch, leave it to another flush if lost.
+            try:
+                lock.extend(LOCK_TIMEOUT, replace_ttl=True)
+            except LockError:
+                break
+    finally:
+        _release(lock)
+
+    return flushed
+
+
+@shared_task(ignore_result=True)
+def flush_views() -> int:
+    """Add buffered views to `view_count` of posts and questions.
+
+    Views are acknowledged after they've committed, and views left
+    unacknowledged by a dead worker are added again(at least once) by the next
+    flush. Returns the number of views flushed.
+    """
+
+    lock = buffer.redis.lock(VIEWS_LOCK, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        return 0
+
+    try:
+        views = buffer.take_views()
+        with unit_of_work():
+            for target, counts in views.items():
+                add_view_counts(target=target, views=counts)
+        buffer.ack_views()
+    finally:
+        _release(lock)
+
+    return sum(sum(counts.values()) for counts in views.values())
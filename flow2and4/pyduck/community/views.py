@@ -57,9 +57,10 @@ from flask import (
 )
 from flask_login import current_user, login_required
 from pydantic import ValidationError
+from redis.exceptions import RedisError
 from werkzeug.utils import secure_filename
 
-from flow2and4.database import db
+from flow2and4.database import db, unit_of_work
 from flow2and4.pyduck.auth.schemas import (
     UserActionCreateAnswerCommentCreate,
     UserActionCreateAnswerCreate,
@@ -80,6 +81,7 @@ from flow2and4.pyduck.auth.service import (
     create_user_action,
     delete_user_action
 )
+from flow2and4.pyduck.community.buffer import buffer
 from flow2and4.pyduck.community.helpers import date_filters
 from flow2and4.pyduck.community.schemas import (
     AnswerCommentCreate,
@@ -97,6 +99,7 @@ from flow2and4.pyduck.community.schemas import (
     PostCreate,
     PostHistoryCreate,
     PostReactionCreate,
+    PostRead,
     PostUpdate,
     PostVoteCreate,
     QuestionCreate,
@@ -104,7 +107,8 @@ from flow2and4.pyduck.community.schemas import (
     QuestionReactionCreate,
     QuestionTagCreate,
     QuestionUpdate,
-    QuestionVoteCreate
+    QuestionVoteCreate,
+    ViewerState
 )
 from flow2and4.pyduck.community.service import (
     create_answer,
@@ -144,21 +148,15 @@ from flow2and4.pyduck.community.service import (
     get_all_questions_by_commons,
     get_answer,
     get_answer_comment,
-    get_answer_comment_reaction,
-    get_answer_reaction,
-    get_answer_vote,
     get_comment_to_post_comment,
     get_or_create_post_tags,
     get_or_create_tags,
     get_post,
     get_post_comment,
-    get_post_comment_reaction,
-    get_post_comment_vote,
     get_post_reaction,
     get_post_vote,
     get_question,
-    get_question_reaction,
-    get_question_vote,
+    get_viewer_state,
     mark_answer_as_answered,
     mark_answer_as_unanswered,
     update_answer_adding_history,
@@ -167,6 +165,7 @@ from flow2and4.pyduck.community.service import (
     update_post_comment_adding_history,
     update_question_adding_history
 )
+from flow2and4.pyduck.community.tasks import flush_buffer, flush_views
 from flow2and4.pyduck.notification.schemas import (
     NotificationForAnswerCommentCreate,
     NotificationForAnswerCommentReactionCreate,
@@ -181,13 +180,11 @@ from flow2and4.pyduck.notification.schemas import (
     NotificationForQuestionReactionCreate,
     NotificationForQuestionVoteCreate
 )
-from flow2and4.pyduck.notification.service import (
-    create_notification,
-    delete_notification
+from flow2and4.pyduck.notification.tasks import (
+    enqueue_create_notification,
+    enqueue_delete_notification
 )
 from flow2and4.pyduck.schemas import CommonParameters
-from flow2and4.pyduck.sse.views import EventStream
-from flow2and4.pyduck.sse.views import bp as sse
 
 logger = logging.getLogger(__name__)
 
@@ -211,6 +208,48 @@ VALID_REACTION_CODE = {
 }
 
 
+def _viewer(**targets: list[int]) -> ViewerState:
+    """Select votes and reactions of current user on the targets to be rendered."""
+
+    user_id = current_user.id if current_user.is_authenticated else None
+    viewer = get_viewer_state(user_id=user_id, targets=targets)
+
+    if buffer.enabled:
+        codes = sorted(VALID_REACTION_CODE)
+        buffer.overlay(viewer, user_id=user_id, targets=targets, codes=codes)
+
+    return viewer
+
+
+def _buffered(post: PostRead) -> PostRead:
+    """Return post with its buffered votes counted, if votes are buffered."""
+
+    if not buffer.enabled:
+        return post
+
+    delta = buffer.vote_count_deltas("post", [post.id]).get(post.id, 0)
+    return post.copy(update={"vote_count": post.vote_count + delta})
+
+
+def _count_view(target: str, target_id: int) -> None:
+    """Count a view of the target page in the buffer.
+
+    A page is still served when redis is unreachable, without the view.
+    """
+
+    if current_user.is_authenticated:
+        viewer = f"user:{current_user.id}"
+    else:
+        viewer = f"addr:{request.remote_addr}"
+
+    try:
+        buffer.record_view(
+            target=target, target_id=target_id, viewer=viewer, flush_task=flush_views
+        )
+    except RedisError:
+        logger.exception("failed to count a view of %s %s.", target, target_id)
+
+
 @bp.route("/<category>")
 def index(category: str):
     """Show community page by category."""
@@ -225,6 +264,7 @@ def index(category: str):
             qp=qp,
             date_filters=date_filters,
             category=category,
+            commons=commons,
         )
 
     else:
@@ -273,7 +313,9 @@ def questions():
     commons = CommonParameters(**request.args.to_dict())
     qp = get_all_questions_by_commons(**commons.dict())
 
-    return render_template("community/question/questions.html.jinja", qp=qp)
+    return render_template(
+        "community/question/questions.html.jinja", qp=qp, commons=commons
+    )
 
 
 @bp.route(
@@ -289,10 +331,16 @@ def question(question_id: int):
     if q is None:
         abort(HTTPStatus.NOT_FOUND)
 
+    _count_view("question", q.id)
+
     commons = CommonParameters(**request.args.to_dict(flat=False))
     ap = get_all_answers_by_commons(**commons.dict(), question_id=question_id)
 
-    return render_template("community/question/question.html.jinja", q=q, ap=ap)
+    viewer = _viewer(question=[q.id], answer=[answer.id for answer in ap])
+
+    return render_template(
+        "community/question/question.html.jinja", q=q, ap=ap, viewer=viewer
+    )
 
 
 @bp.route(
@@ -332,10 +380,18 @@ def post(post_id: int, category: str | None = None):
 
         return res
 
+    _count_view("post", post.id)
+
+    viewer = _viewer(
+        post=[post.id],
+        post_comment=[post_comment.id for post_comment in post_comment_pagination],
+    )
+
     return render_template(
         "community/post/post.html.jinja",
-        post=post,
+        post=_buffered(post),
         post_comment_pagination=post_comment_pagination,
+        viewer=viewer,
     )
 
 
@@ -441,62 +497,62 @@ def question_reaction(question_id: int):
     if code not in VALID_REACTION_CODE:
         abort(HTTPStatus.BAD_REQUEST)
 
-    reaction = get_question_reaction(
-        question_id=question_id, user_id=current_user.id, code=code
-    )
-
     if action == "react":
-        if reaction is not None:
-            abort(HTTPStatus.CONFLICT)
-        reaction_in = QuestionReactionCreate(
-            user_id=current_user.id, target_id=question_id, code=code
-        )
-        question = create_question_reaction(reaction_in=reaction_in)
-
-        # user action.
-        user_action_in = UserActionReactionQuestionCreate(
-            user_id=current_user.id, target_id=question.id, action_value=code
-        )
-        user_action = create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if question.user_id != user_action.user_id:
-            notification_in = NotificationForQuestionReactionCreate(
-                user_id=question.user_id,
-                notification_value=code,
-                notification_target_id=question.id,
-                from_user_id=current_user.id,
-                to_user_id=question.user_id,
+        with unit_of_work():
+            reaction_in = QuestionReactionCreate(
+                user_id=current_user.id, target_id=question_id, code=code
             )
-            create_notification(notification_in=notification_in)
+            question, reacted = create_question_reaction(reaction_in=reaction_in)
+
+            if reacted:
+                # user action.
+                user_action_in = UserActionReactionQuestionCreate(
+                    user_id=current_user.id, target_id=question.id, action_value=code
+                )
+                user_action = create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if question.user_id != user_action.user_id:
+                    notification_in = NotificationForQuestionReactionCreate(
+                        user_id=question.user_id,
+                        notification_value=code,
+                        notification_target_id=question.id,
+                        from_user_id=current_user.id,
+                        to_user_id=question.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if action == "unreact":
-        if reaction is None:
-            abort(HTTPStatus.NOT_FOUND)
-        question = delete_question_reaction(
-            question_id=question_id, user_id=current_user.id, code=code
-        )
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="reaction_question",
-            target_id=question.id,
-            action_value=code,
-        )
-
-        # notification.
-        if question.user_id != current_user.id:
-            delete_notification(
-                user_id=question.user_id,
-                notification_type="reaction_question",
-                notification_target_id=question.id,
-                from_user_id=current_user.id,
-                to_user_id=question.user.id,
-                notification_value=code,
+        with unit_of_work():
+            question, unreacted = delete_question_reaction(
+                question_id=question_id, user_id=current_user.id, code=code
             )
 
-    return render_template("community/question/reaction.html.jinja", question=question)
+            if unreacted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="reaction_question",
+                    target_id=question.id,
+                    action_value=code,
+                )
+
+                # notification.
+                if question.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=question.user_id,
+                        notification_type="reaction_question",
+                        notification_target_id=question.id,
+                        from_user_id=current_user.id,
+                        to_user_id=question.user.id,
+                        notification_value=code,
+                    )
+
+    return render_template(
+        "community/question/reaction.html.jinja",
+        question=question,
+        viewer=_viewer(question=[question.id]),
+    )
 
 
 @bp.route(
@@ -517,60 +573,85 @@ def post_reaction(post_id: int):
     if code not in VALID_REACTION_CODE:
         abort(HTTPStatus.BAD_REQUEST)
 
-    reaction = get_post_reaction(post_id=post_id, user_id=current_user.id, code=code)
-
-    if action == "react":
-        if reaction is not None:
-            abort(HTTPStatus.CONFLICT)
+    if buffer.enabled and action in ("react", "unreact"):
+        post = get_post(post_id=post_id)
+        if post is None:
+            abort(HTTPStatus.NOT_FOUND)
 
-        reaction_in = PostReactionCreate(
-            user_id=current_user.id, target_id=post_id, code=code
+        # flushed to database along with its side effects by `flush_buffer`.
+        reaction = get_post_reaction(
+            post_id=post_id, user_id=current_user.id, code=code
+        )
+        buffer.record_reaction(
+            target="post",
+            target_id=post_id,
+            user_id=current_user.id,
+            code=code,
+            on=action == "react",
+            stored=reaction is not None,
+            flush_task=flush_buffer,
         )
-        post = create_post_reaction(reaction_in=reaction_in)
 
-        # user action.
-        user_action_in = UserActionReactionPostCreate(
-            user_id=current_user.id, target_id=post.id, action_value=code
+        return render_template(
+            "community/post/reaction.html.jinja",
+            post=post,
+            viewer=_viewer(post=[post_id]),
         )
-        user_action = create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if post.user_id != user_action.user_id:
-            notification_in = NotificationForPostReactionCreate(
-                user_id=post.user_id,
-                notification_value=code,
-                notification_target_id=post.id,
-                from_user_id=current_user.id,
-                to_user_id=post.user_id,
+
+    if action == "react":
+        with unit_of_work():
+            reaction_in = PostReactionCreate(
+                user_id=current_user.id, target_id=post_id, code=code
             )
-            create_notification(notification_in=notification_in)
+            post, reacted = create_post_reaction(reaction_in=reaction_in)
+
+            if reacted:
+                # user action.
+                user_action_in = UserActionReactionPostCreate(
+                    user_id=current_user.id, target_id=post.id, action_value=code
+                )
+                user_action = create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if post.user_id != user_action.user_id:
+                    notification_in = NotificationForPostReactionCreate(
+                        user_id=post.user_id,
+                        notification_value=code,
+                        notification_target_id=post.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if action == "unreact":
-        if reaction is None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        post = delete_post_reaction(post_id=post_id, user_id=current_user.id, code=code)
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="reaction_post",
-            target_id=post.id,
-            action_value=code,
-        )
-
-        # notification.
-        if post.user_id != current_user.id:
-            delete_notification(
-                user_id=post.user_id,
-                notification_type="reaction_post",
-                notification_target_id=post.id,
-                notification_value=code,
-                from_user_id=current_user.id,
-                to_user_id=post.user_id,
+        with unit_of_work():
+            post, unreacted = delete_post_reaction(
+                post_id=post_id, user_id=current_user.id, code=code
             )
 
-    return render_template("community/post/reaction.html.jinja", post=post)
+            if unreacted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="reaction_post",
+                    target_id=post.id,
+                    action_value=code,
+                )
+
+                # notification.
+                if post.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=post.user_id,
+                        notification_type="reaction_post",
+                        notification_target_id=post.id,
+                        notification_value=code,
+                        from_user_id=current_user.id,
+                        to_user_id=post.user_id,
+                    )
+
+    return render_template(
+        "community/post/reaction.html.jinja", post=post, viewer=_viewer(post=[post.id])
+    )
 
 
 @bp.route(
@@ -588,65 +669,65 @@ def post_comment_reaction(post_id: int, post_comment_id: int):
     if code not in VALID_REACTION_CODE:
         abort(HTTPStatus.BAD_REQUEST)
 
-    reaction = get_post_comment_reaction(
-        post_comment_id=post_comment_id, user_id=current_user.id, code=code
-    )
-
     if action == "react":
-        if reaction is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        reaction_in = PostCommentReactionCreate(
-            user_id=current_user.id, target_id=post_comment_id, code=code
-        )
-        post_comment = create_post_comment_reaction(reaction_in=reaction_in)
-
-        # user action.
-        user_action_in = UserActionReactionPostCommentCreate(
-            user_id=current_user.id, target_id=post_comment.id, action_value=code
-        )
-        user_action = create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if post_comment.user_id != user_action.user_id:
-            notification_in = NotificationForPostCommentReactionCreate(
-                user_id=post_comment.user_id,
-                notification_value=code,
-                notification_target_id=post_comment.id,
-                from_user_id=current_user.id,
-                to_user_id=post_comment.user_id,
+        with unit_of_work():
+            reaction_in = PostCommentReactionCreate(
+                user_id=current_user.id, target_id=post_comment_id, code=code
+            )
+            post_comment, reacted = create_post_comment_reaction(
+                reaction_in=reaction_in
             )
-            create_notification(notification_in=notification_in)
-
-    if action == "unreact":
-        if reaction is None:
-            abort(HTTPStatus.NOT_FOUND)
 
-        post_comment = delete_post_comment_reaction(
-            post_comment_id=post_comment_id, user_id=current_user.id, code=code
-        )
+            if reacted:
+                # user action.
+                user_action_in = UserActionReactionPostCommentCreate(
+                    user_id=current_user.id,
+                    target_id=post_comment.id,
+                    action_value=code,
+                )
+                user_action = create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if post_comment.user_id != user_action.user_id:
+                    notification_in = NotificationForPostCommentReactionCreate(
+                        user_id=post_comment.user_id,
+                        notification_value=code,
+                        notification_target_id=post_comment.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post_comment.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="reaction_post_comment",
-            target_id=post_comment.id,
-            action_value=code,
-        )
-
-        # notification.
-        if post_comment.user_id != current_user.id:
-            delete_notification(
-                user_id=post_comment.user_id,
-                notification_type="reaction_post_comment",
-                notification_target_id=post_comment.id,
-                notification_value=code,
-                from_user_id=current_user.id,
-                to_user_id=post_comment.user_id,
+    if action == "unreact":
+        with unit_of_work():
+            post_comment, unreacted = delete_post_comment_reaction(
+                post_comment_id=post_comment_id, user_id=current_user.id, code=code
             )
 
+            if unreacted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="reaction_post_comment",
+                    target_id=post_comment.id,
+                    action_value=code,
+                )
+
+                # notification.
+                if post_comment.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=post_comment.user_id,
+                        notification_type="reaction_post_comment",
+                        notification_target_id=post_comment.id,
+                        notification_value=code,
+                        from_user_id=current_user.id,
+                        to_user_id=post_comment.user_id,
+                    )
+
     return render_template(
-        "community/post_comment/reaction.html.jinja", post_comment=post_comment
+        "community/post_comment/reaction.html.jinja",
+        post_comment=post_comment,
+        viewer=_viewer(post_comment=[post_comment.id]),
     )
 
 
@@ -660,55 +741,57 @@ def question_vote(question_id: int):
     (DELETE) Process unvote and return fragment.
     """
 
-    vote = get_question_vote(question_id=question_id, user_id=current_user.id)
-
     if request.method == HTTPMethod.POST:
-        if vote is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        vote_in = QuestionVoteCreate(user_id=current_user.id, target_id=question_id)
-        question = create_question_vote(vote_in=vote_in)
-
-        # user action.
-        user_action_in = UserActionVoteQuestionCreate(
-            user_id=current_user.id, target_id=question.id
-        )
-        create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if question.user_id != current_user.id:
-            notification_in = NotificationForQuestionVoteCreate(
-                user_id=question.user_id,
-                notification_target_id=question.id,
-                from_user_id=current_user.id,
-                to_user_id=question.user_id,
-            )
-            create_notification(notification_in=notification_in)
+        with unit_of_work():
+            vote_in = QuestionVoteCreate(user_id=current_user.id, target_id=question_id)
+            question, voted = create_question_vote(vote_in=vote_in)
+
+            if voted:
+                # user action.
+                user_action_in = UserActionVoteQuestionCreate(
+                    user_id=current_user.id, target_id=question.id
+                )
+                create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if question.user_id != current_user.id:
+                    notification_in = NotificationForQuestionVoteCreate(
+                        user_id=question.user_id,
+                        notification_target_id=question.id,
+                        from_user_id=current_user.id,
+                        to_user_id=question.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if request.method == HTTPMethod.DELETE:
-        if vote is None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        question = delete_question_vote(
-            question_id=question_id, user_id=current_user.id
-        )
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id, action_type="vote_question", target_id=question.id
-        )
-
-        # notification.
-        if question.user_id != current_user.id:
-            delete_notification(
-                user_id=question.user_id,
-                notification_type="vote_question",
-                notification_target_id=question.id,
-                from_user_id=current_user.id,
-                to_user_id=question.user_id,
+        with unit_of_work():
+            question, unvoted = delete_question_vote(
+                question_id=question_id, user_id=current_user.id
             )
 
-    return render_template("community/question/vote.html.jinja", question=question)
+            if unvoted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="vote_question",
+                    target_id=question.id,
+                )
+
+                # notification.
+                if question.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=question.user_id,
+                        notification_type="vote_question",
+                        notification_target_id=question.id,
+                        from_user_id=current_user.id,
+                        to_user_id=question.user_id,
+                    )
+
+    return render_template(
+        "community/question/vote.html.jinja",
+        question=question,
+        viewer=_viewer(question=[question.id]),
+    )
 
 
 @bp.route("/posts/<int:post_id>/vote", methods=[HTTPMethod.POST, HTTPMethod.DELETE])
@@ -719,56 +802,75 @@ def post_vote(post_id: int):
     (DELETE) Process unvote and return fragment.
     """
 
-    vote = get_post_vote(target_id=post_id, user_id=current_user.id)
-
-    if request.method == HTTPMethod.POST:
-        if vote is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        vote_in = PostVoteCreate(user_id=current_user.id, target_id=post_id)
-        post = create_post_vote(vote_in=vote_in)
+    if buffer.enabled:
+        post = get_post(post_id=post_id)
+        if post is None:
+            abort(HTTPStatus.NOT_FOUND)
 
-        # user action.
-        user_action_in = UserActionVotePostCreate(
-            user_id=current_user.id, target_id=post.id
+        # flushed to database along with its side effects by `flush_buffer`.
+        vote = get_post_vote(target_id=post_id, user_id=current_user.id)
+        buffer.record_vote(
+            target="post",
+            target_id=post_id,
+            user_id=current_user.id,
+            on=request.method == HTTPMethod.POST,
+            stored=vote is not None,
+            flush_task=flush_buffer,
         )
-        create_user_action(user_action_in=user_action_in)
 
-        # notification.
-        if post.user_id != current_user.id:
-            notification_in = NotificationForPostVoteCreate(
-                user_id=post.user_id,
-                notification_target_id=post.id,
-                from_user_id=current_user.id,
-                to_user_id=post.user_id,
-            )
-            create_notification(notification_in=notification_in)
+        return render_template(
+            "community/post/vote.html.jinja",
+            post=_buffered(post),
+            viewer=_viewer(post=[post_id]),
+        )
 
-            eventstream = EventStream("post:vote", event="notification")
-            sse.publish(message=eventstream, channel=post.user_id)
+    if request.method == HTTPMethod.POST:
+        with unit_of_work():
+            vote_in = PostVoteCreate(user_id=current_user.id, target_id=post_id)
+            post, voted = create_post_vote(vote_in=vote_in)
+
+            if voted:
+                # user action.
+                user_action_in = UserActionVotePostCreate(
+                    user_id=current_user.id, target_id=post.id
+                )
+                create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if post.user_id != current_user.id:
+                    notification_in = NotificationForPostVoteCreate(
+                        user_id=post.user_id,
+                        notification_target_id=post.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post.user_id,
+                    )
+                    enqueue_create_notification(
+                        notification_in=notification_in, event="post:vote"
+                    )
 
     if request.method == HTTPMethod.DELETE:
-        if vote is None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        post = delete_post_vote(target_id=post_id, user_id=current_user.id)
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id, action_type="vote_post", target_id=post_id
-        )
-
-        # notification.
-        if post.user_id != current_user.id:
-            delete_notification(
-                user_id=post.user_id,
-                notification_type="vote_post",
-                notification_target_id=post.id,
-                from_user_id=current_user.id,
-                to_user_id=post.user_id,
-            )
+        with unit_of_work():
+            post, unvoted = delete_post_vote(target_id=post_id, user_id=current_user.id)
+
+            if unvoted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id, action_type="vote_post", target_id=post_id
+                )
+
+                # notification.
+                if post.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=post.user_id,
+                        notification_type="vote_post",
+                        notification_target_id=post.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post.user_id,
+                    )
 
-    return render_template("community/post/vote.html.jinja", post=post)
+    return render_template(
+        "community/post/vote.html.jinja", post=post, viewer=_viewer(post=[post.id])
+    )
 
 
 @bp.route("/help/new", methods=[HTTPMethod.GET, HTTPMethod.POST])
@@ -795,12 +897,13 @@ def question_new():
             logger.warn(e.errors)
             return render_template("community/question/new.html.jinja")
 
-        question = create_question(question_in=question_in, tags_in=tags_in)
+        with unit_of_work():
+            question = create_question(question_in=question_in, tags_in=tags_in)
 
-        user_action_in = UserActionCreateQuestionCreate(
-            user_id=current_user.id, target_id=question.id
-        )
-        create_user_action(user_action_in=user_action_in)
+            user_action_in = UserActionCreateQuestionCreate(
+                user_id=current_user.id, target_id=question.id
+            )
+            create_user_action(user_action_in=user_action_in)
 
         return redirect(url_for("pyduck.community.index", category="help"))
 
@@ -831,13 +934,14 @@ def post_new(category: str):
             logger.warn(e.errors)
             return render_template("community/post/new.html.jinja", category=category)
 
-        post = create_post(post_in=post_in, tags_in=tags_in)
+        with unit_of_work():
+            post = create_post(post_in=post_in, tags_in=tags_in)
 
-        # user action.
-        user_action_in = UserActionCreatePostCreate(
-            user_id=current_user.id, target_id=post.id
-        )
-        create_user_action(user_action_in=user_action_in)
+            # user action.
+            user_action_in = UserActionCreatePostCreate(
+                user_id=current_user.id, target_id=post.id
+            )
+            create_user_action(user_action_in=user_action_in)
 
         return redirect(url_for("pyduck.community.index", category=category))
 
@@ -897,26 +1001,29 @@ def answer():
             logger.warn(e.errors())
             abort(HTTPStatus.BAD_REQUEST)
 
-        answer = create_answer(answer_in=answer_in)
-
-        # user action.
-        user_action_in = UserActionCreateAnswerCreate(
-            user_id=current_user.id, target_id=answer.id
-        )
-        user_action = create_user_action(user_action_in=user_action_in)
+        with unit_of_work():
+            answer = create_answer(answer_in=answer_in)
 
-        # notification
-        if answer.question.user_id != answer.user_id:
-            notification_in = NotificationForAnswerCreate(
-                user_id=answer.question.user_id,
-                notification_target_id=answer.id,
-                from_user_id=current_user.id,
-                to_user_id=answer.question.user_id,
+            # user action.
+            user_action_in = UserActionCreateAnswerCreate(
+                user_id=current_user.id, target_id=answer.id
             )
-            create_notification(notification_in=notification_in)
+            user_action = create_user_action(user_action_in=user_action_in)
+
+            # notification
+            if answer.question.user_id != answer.user_id:
+                notification_in = NotificationForAnswerCreate(
+                    user_id=answer.question.user_id,
+                    notification_target_id=answer.id,
+                    from_user_id=current_user.id,
+                    to_user_id=answer.question.user_id,
+                )
+                enqueue_create_notification(notification_in=notification_in)
 
         res = make_response(
-            render_template("community/answer/answer.html.jinja", answer=answer)
+            render_template(
+                "community/answer/answer.html.jinja", answer=answer, viewer=ViewerState()
+            )
         )
         res.headers["HX-Trigger-After-Settle"] = "answer-created"
 
@@ -947,24 +1054,31 @@ def answer():
 
         answer = update_answer_adding_history(answer_in=answer_in)
         res = make_response(
-            render_template("community/answer/answer.html.jinja", answer=answer)
+            render_template(
+                "community/answer/answer.html.jinja",
+                answer=answer,
+                viewer=_viewer(answer=[answer.id]),
+            )
         )
 
     if request.method == HTTPMethod.DELETE:
-        question = delete_answer(answer_id=answer.id)
+        with unit_of_work():
+            question = delete_answer(answer_id=answer.id)
 
-        # user action.
-        delete_user_action(
-            user_id=current_user.id, action_type="create_answer", target_id=answer_id
-        )
+            # user action.
+            delete_user_action(
+                user_id=current_user.id,
+                action_type="create_answer",
+                target_id=answer_id,
+            )
 
-        delete_notification(
-            user_id=answer.question.user_id,
-            notification_type="create_answer",
-            notification_target_id=answer_id,
-            from_user_id=current_user.id,
-            to_user_id=answer.question.user_id,
-        )
+            enqueue_delete_notification(
+                user_id=answer.question.user_id,
+                notification_type="create_answer",
+                notification_target_id=answer_id,
+                from_user_id=current_user.id,
+                to_user_id=answer.question.user_id,
+            )
 
     return res
 
@@ -992,31 +1106,32 @@ def post_comment(post_id: int, post_comment_id: int | None = None):
             logger.warn(e.errors())
             abort(HTTPStatus.BAD_REQUEST)
 
-        post_comment = create_post_comment(post_comment_in=post_comment_in)
+        with unit_of_work():
+            post_comment = create_post_comment(post_comment_in=post_comment_in)
 
-        # user action.
-        user_action_in = UserActionCreatePostCommentCreate(
-            user_id=current_user.id, target_id=post_comment.id
-        )
-        create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if post_comment.user_id != post_comment.post.user_id:
-            notification_in = NotificationForPostCommentCreate(
-                user_id=post_comment.post.user_id,
-                notification_target_id=post_comment.id,
-                from_user_id=post_comment.user_id,
-                to_user_id=post_comment.post.user_id,
+            # user action.
+            user_action_in = UserActionCreatePostCommentCreate(
+                user_id=current_user.id, target_id=post_comment.id
             )
-            create_notification(notification_in=notification_in)
-
-            eventstream = EventStream("postcomment:created", event="notification")
-            sse.publish(message=eventstream, channel=post_comment.post.user_id)
+            create_user_action(user_action_in=user_action_in)
+
+            # notification.
+            if post_comment.user_id != post_comment.post.user_id:
+                notification_in = NotificationForPostCommentCreate(
+                    user_id=post_comment.post.user_id,
+                    notification_target_id=post_comment.id,
+                    from_user_id=post_comment.user_id,
+                    to_user_id=post_comment.post.user_id,
+                )
+                enqueue_create_notification(
+                    notification_in=notification_in, event="postcomment:created"
+                )
 
         res = make_response(
             render_template(
                 "community/post_comment/post_comment.html.jinja",
                 post_comment=post_comment,
+                viewer=ViewerState(),
             )
         )
         res.headers["HX-Trigger-After-Settle"] = "postcomment-created"
@@ -1053,28 +1168,30 @@ def post_comment(post_id: int, post_comment_id: int | None = None):
             render_template(
                 "community/post_comment/post_comment.html.jinja",
                 post_comment=post_comment,
+                viewer=_viewer(post_comment=[post_comment.id]),
             )
         )
 
     if request.method == HTTPMethod.DELETE:
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="create_post_comment",
-            target_id=post_comment_id,
-        )
-
-        # notification.
-        if current_user.id != post_comment.post.user_id:
-            delete_notification(
-                user_id=post_comment.post.user_id,
-                notification_type="create_post_comment",
-                notification_target_id=post_comment_id,
-                from_user_id=current_user.id,
-                to_user_id=post_comment.post.user_id,
+        with unit_of_work():
+            # user action.
+            delete_user_action(
+                user_id=current_user.id,
+                action_type="create_post_comment",
+                target_id=post_comment_id,
             )
 
-        delete_post_comment(post_comment_id=post_comment.id)
+            # notification.
+            if current_user.id != post_comment.post.user_id:
+                enqueue_delete_notification(
+                    user_id=post_comment.post.user_id,
+                    notification_type="create_post_comment",
+                    notification_target_id=post_comment_id,
+                    from_user_id=current_user.id,
+                    to_user_id=post_comment.post.user_id,
+                )
+
+            delete_post_comment(post_comment_id=post_comment.id)
 
         res = make_response()
         res.headers["HX-Trigger-After-Settle"] = "postcomment-deleted"
@@ -1090,53 +1207,57 @@ def answer_vote(answer_id: int):
     (DELETE) Process unvote and return fragment.
     """
 
-    vote = get_answer_vote(answer_id=answer_id, user_id=current_user.id)
-
     if request.method == HTTPMethod.POST:
-        if vote is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        vote_in = AnswerVoteCreate(user_id=current_user.id, target_id=answer_id)
-        answer = create_answer_vote(vote_in=vote_in)
-
-        # user action.
-        user_action_in = UserActionVoteAnswerCreate(
-            user_id=current_user.id, target_id=answer.id
-        )
-        create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if answer.user_id != current_user.id:
-            notification_in = NotificationForAnswerVoteCreate(
-                user_id=answer.user_id,
-                notification_target_id=answer.id,
-                from_user_id=current_user.id,
-                to_user_id=answer.user_id,
-            )
-            create_notification(notification_in=notification_in)
+        with unit_of_work():
+            vote_in = AnswerVoteCreate(user_id=current_user.id, target_id=answer_id)
+            answer, voted = create_answer_vote(vote_in=vote_in)
+
+            if voted:
+                # user action.
+                user_action_in = UserActionVoteAnswerCreate(
+                    user_id=current_user.id, target_id=answer.id
+                )
+                create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if answer.user_id != current_user.id:
+                    notification_in = NotificationForAnswerVoteCreate(
+                        user_id=answer.user_id,
+                        notification_target_id=answer.id,
+                        from_user_id=current_user.id,
+                        to_user_id=answer.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if request.method == HTTPMethod.DELETE:
-        if vote is None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        answer = delete_answer_vote(answer_id=answer_id, user_id=current_user.id)
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id, action_type="vote_answer", target_id=answer.id
-        )
-
-        # notification.
-        if answer.user_id != current_user.id:
-            delete_notification(
-                user_id=answer.user_id,
-                notification_type="vote_answer",
-                notification_target_id=answer.id,
-                from_user_id=current_user.id,
-                to_user_id=answer.user_id,
+        with unit_of_work():
+            answer, unvoted = delete_answer_vote(
+                answer_id=answer_id, user_id=current_user.id
             )
 
-    return render_template("community/answer/vote.html.jinja", answer=answer)
+            if unvoted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="vote_answer",
+                    target_id=answer.id,
+                )
+
+                # notification.
+                if answer.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=answer.user_id,
+                        notification_type="vote_answer",
+                        notification_target_id=answer.id,
+                        from_user_id=current_user.id,
+                        to_user_id=answer.user_id,
+                    )
+
+    return render_template(
+        "community/answer/vote.html.jinja",
+        answer=answer,
+        viewer=_viewer(answer=[answer.id]),
+    )
 
 
 @bp.route(
@@ -1154,64 +1275,62 @@ def answer_reaction(answer_id: int):
     if code not in VALID_REACTION_CODE:
         abort(HTTPStatus.BAD_REQUEST)
 
-    reaction = get_answer_reaction(
-        answer_id=answer_id, user_id=current_user.id, code=code
-    )
-
     if action == "react":
-        if reaction is not None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        reaction_in = AnswerReactionCreate(
-            user_id=current_user.id, target_id=answer_id, code=code
-        )
-        answer = create_answer_reaction(reaction_in=reaction_in)
-
-        # user action.
-        user_action_in = UserActionReactionAnswerCreate(
-            user_id=current_user.id, target_id=post.id, action_value=code
-        )
-        user_action = create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if answer.user_id != user_action.user_id:
-            notification_in = NotificationForAnswerReactionCreate(
-                user_id=answer.user_id,
-                notification_value=code,
-                notification_target_id=answer.id,
-                from_user_id=current_user.id,
-                to_user_id=answer.user_id,
+        with unit_of_work():
+            reaction_in = AnswerReactionCreate(
+                user_id=current_user.id, target_id=answer_id, code=code
             )
-            create_notification(notification_in=notification_in)
+            answer, reacted = create_answer_reaction(reaction_in=reaction_in)
+
+            if reacted:
+                # user action.
+                user_action_in = UserActionReactionAnswerCreate(
+                    user_id=current_user.id, target_id=answer.id, action_value=code
+                )
+                user_action = create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if answer.user_id != user_action.user_id:
+                    notification_in = NotificationForAnswerReactionCreate(
+                        user_id=answer.user_id,
+                        notification_value=code,
+                        notification_target_id=answer.id,
+                        from_user_id=current_user.id,
+                        to_user_id=answer.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if action == "unreact":
-        if reaction is None:
-            abort(HTTPStatus.CONFLICT)
-
-        answer = delete_answer_reaction(
-            answer_id=answer_id, user_id=current_user.id, code=code
-        )
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="reaction_answer",
-            target_id=answer.id,
-            action_value=code,
-        )
-
-        # notification.
-        if answer.user_id != current_user.id:
-            delete_notification(
-                user_id=answer.user_id,
-                notification_type="reaction_answer",
-                notification_target_id=answer.id,
-                notification_value=code,
-                from_user_id=current_user.id,
-                to_user_id=answer.user_id,
+        with unit_of_work():
+            answer, unreacted = delete_answer_reaction(
+                answer_id=answer_id, user_id=current_user.id, code=code
             )
 
-    return render_template("community/answer/reaction.html.jinja", answer=answer)
+            if unreacted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="reaction_answer",
+                    target_id=answer.id,
+                    action_value=code,
+                )
+
+                # notification.
+                if answer.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=answer.user_id,
+                        notification_type="reaction_answer",
+                        notification_target_id=answer.id,
+                        notification_value=code,
+                        from_user_id=current_user.id,
+                        to_user_id=answer.user_id,
+                    )
+
+    return render_template(
+        "community/answer/reaction.html.jinja",
+        answer=answer,
+        viewer=_viewer(answer=[answer.id]),
+    )
 
 
 @bp.route("/answers/<int:answer_id>/comments", methods=[HTTPMethod.GET])
@@ -1223,7 +1342,11 @@ def comments(answer_id: int):
     commons = CommonParameters(**request.args.to_dict())
     cp = get_all_answer_comments_by_commons(**commons.dict(), answer_id=answer_id)
 
-    return render_template("community/answer_comment/answer_comments.html.jinja", cp=cp)
+    return render_template(
+        "community/answer_comment/answer_comments.html.jinja",
+        cp=cp,
+        viewer=_viewer(answer_comment=[comment.id for comment in cp]),
+    )
 
 
 @bp.route("/posts/<int:post_id>/comments", methods=[HTTPMethod.GET])
@@ -1239,7 +1362,9 @@ def comments_to_post(post_id: int):
     pagination = get_all_comments_to_post_by_commons(**commons.dict(), post_id=post_id)
 
     return render_template(
-        "community/post_comment/comments_to_post.html.jinja", pagination=pagination
+        "community/post_comment/comments_to_post.html.jinja",
+        pagination=pagination,
+        viewer=_viewer(post_comment=[post_comment.id for post_comment in pagination]),
     )
 
 
@@ -1283,6 +1408,7 @@ def comment_to_post_comment(
             render_template(
                 "community/post_comment/comment_to_post_comment.html.jinja",
                 comment=comment,
+                viewer=ViewerState(),
             )
         )
         res.headers["HX-Trigger-After-Settle"] = "comment-to-post-comment-created"
@@ -1315,6 +1441,7 @@ def comment_to_post_comment(
             render_template(
                 "community/post_comment/comment_to_post_comment.html.jinja",
                 comment=comment,
+                viewer=_viewer(post_comment=[comment.id]),
             )
         )
 
@@ -1342,6 +1469,7 @@ def comments_to_post_comment(post_id: int, post_comment_id: int):
     return render_template(
         "community/post_comment/comments_to_post_comment.html.jinja",
         pagination=pagination,
+        viewer=_viewer(post_comment=[comment.id for comment in pagination]),
     )
 
 
@@ -1368,27 +1496,30 @@ def comment_to_answer(answer_id: int, answer_comment_id: int | None = None):
             logger.warn(e.errors())
             abort(HTTPStatus.BAD_REQUEST)
 
-        comment = create_answer_comment(comment_in=comment_in)
+        with unit_of_work():
+            comment = create_answer_comment(comment_in=comment_in)
 
-        # user action.
-        user_action_in = UserActionCreateAnswerCommentCreate(
-            user_id=current_user.id, target_id=comment.id
-        )
-        create_user_action(user_action_in=user_action_in)
-
-        # notification if needed.
-        if comment.answer.user_id != comment.user_id:
-            notification_in = NotificationForAnswerCommentCreate(
-                user_id=comment.answer.user_id,
-                notification_target_id=comment.id,
-                from_user_id=current_user.id,
-                to_user_id=comment.answer.user_id,
+            # user action.
+            user_action_in = UserActionCreateAnswerCommentCreate(
+                user_id=current_user.id, target_id=comment.id
             )
-            create_notification(notification_in=notification_in)
+            create_user_action(user_action_in=user_action_in)
+
+            # notification if needed.
+            if comment.answer.user_id != comment.user_id:
+                notification_in = NotificationForAnswerCommentCreate(
+                    user_id=comment.answer.user_id,
+                    notification_target_id=comment.id,
+                    from_user_id=current_user.id,
+                    to_user_id=comment.answer.user_id,
+                )
+                enqueue_create_notification(notification_in=notification_in)
 
         res = make_response(
             render_template(
-                "community/answer_comment/answer_comment.html.jinja", comment=comment
+                "community/answer_comment/answer_comment.html.jinja",
+                comment=comment,
+                viewer=ViewerState(),
             )
         )
         res.headers["HX-Trigger-After-Settle"] = "comment-created"
@@ -1424,6 +1555,7 @@ def comment_to_answer(answer_id: int, answer_comment_id: int | None = None):
             render_template(
                 "community/answer_comment/answer_comment.html.jinja",
                 comment=answer_comment,
+                viewer=_viewer(answer_comment=[answer_comment.id]),
             )
         )
 
@@ -1467,65 +1599,65 @@ def answer_comment_reaction(answer_comment_id: int):
     if code not in VALID_REACTION_CODE:
         abort(HTTPStatus.BAD_REQUEST)
 
-    reaction = get_answer_comment_reaction(
-        answer_comment_id=answer_comment_id, user_id=current_user.id, code=code
-    )
-
     if action == "react":
-        if reaction is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        reaction_in = AnswerCommentReactionCreate(
-            user_id=current_user.id, target_id=answer_comment_id, code=code
-        )
-        answer_comment = create_answer_comment_reaction(reaction_in=reaction_in)
-
-        # user action.
-        user_action_in = UserActionReactionAnswerCommentCreate(
-            user_id=current_user.id, target_id=answer_comment.id, action_value=code
-        )
-        user_action = create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if answer_comment.user_id != user_action.user_id:
-            notification_in = NotificationForAnswerCommentReactionCreate(
-                user_id=answer_comment.user_id,
-                notification_value=code,
-                notification_target_id=answer_comment.id,
-                from_user_id=current_user.id,
-                to_user_id=answer_comment.user_id,
+        with unit_of_work():
+            reaction_in = AnswerCommentReactionCreate(
+                user_id=current_user.id, target_id=answer_comment_id, code=code
+            )
+            answer_comment, reacted = create_answer_comment_reaction(
+                reaction_in=reaction_in
             )
-            create_notification(notification_in=notification_in)
-
-    if action == "unreact":
-        if reaction is None:
-            abort(HTTPStatus.NOT_FOUND)
 
-        answer_comment = delete_answer_comment_reaction(
-            answer_comment_id=answer_comment_id, user_id=current_user.id, code=code
-        )
+            if reacted:
+                # user action.
+                user_action_in = UserActionReactionAnswerCommentCreate(
+                    user_id=current_user.id,
+                    target_id=answer_comment.id,
+                    action_value=code,
+                )
+                user_action = create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if answer_comment.user_id != user_action.user_id:
+                    notification_in = NotificationForAnswerCommentReactionCreate(
+                        user_id=answer_comment.user_id,
+                        notification_value=code,
+                        notification_target_id=answer_comment.id,
+                        from_user_id=current_user.id,
+                        to_user_id=answer_comment.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="reaction_answer_comment",
-            target_id=answer_comment.id,
-            action_value=code,
-        )
-
-        # notification.
-        if answer_comment.user_id != current_user.id:
-            delete_notification(
-                user_id=answer_comment.user_id,
-                notification_type="reaction_answer_comment",
-                notification_target_id=answer_comment.id,
-                notification_value=code,
-                from_user_id=current_user.id,
-                to_user_id=answer_comment.user_id,
+    if action == "unreact":
+        with unit_of_work():
+            answer_comment, unreacted = delete_answer_comment_reaction(
+                answer_comment_id=answer_comment_id, user_id=current_user.id, code=code
             )
 
+            if unreacted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="reaction_answer_comment",
+                    target_id=answer_comment.id,
+                    action_value=code,
+                )
+
+                # notification.
+                if answer_comment.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=answer_comment.user_id,
+                        notification_type="reaction_answer_comment",
+                        notification_target_id=answer_comment.id,
+                        notification_value=code,
+                        from_user_id=current_user.id,
+                        to_user_id=answer_comment.user_id,
+                    )
+
     return render_template(
-        "community/answer_comment/reaction.html.jinja", answer_comment=answer_comment
+        "community/answer_comment/reaction.html.jinja",
+        answer_comment=answer_comment,
+        viewer=_viewer(answer_comment=[answer_comment.id]),
     )
 
 
@@ -1539,7 +1671,11 @@ def answers(question_id: int):
 
     answers = get_all_answers_by_commons(**commons.dict(), question_id=question_id)
 
-    return render_template("community/answer/answers.html.jinja", answers=answers)
+    return render_template(
+        "community/answer/answers.html.jinja",
+        answers=answers,
+        viewer=_viewer(answer=[answer.id for answer in answers]),
+    )
 
 
 @bp.route("/answers/<int:answer_id>/answered", methods=[HTTPMethod.PUT])
@@ -1556,7 +1692,11 @@ def answered(answer_id: int):
     answer = mark_answer_as_answered(answer_id=answer.id)
 
     res = make_response(
-        render_template("community/answer/answer.html.jinja", answer=answer)
+        render_template(
+            "community/answer/answer.html.jinja",
+            answer=answer,
+            viewer=_viewer(answer=[answer.id]),
+        )
     )
     res.headers["HX-Trigger"] = "question-answered"
 
@@ -1577,7 +1717,11 @@ def unanswered(answer_id: int):
     answer = mark_answer_as_unanswered(answer_id=answer.id)
 
     res = make_response(
-        render_template("community/answer/answer.html.jinja", answer=answer)
+        render_template(
+            "community/answer/answer.html.jinja",
+            answer=answer,
+            viewer=_viewer(answer=[answer.id]),
+        )
     )
     res.headers["HX-Trigger"] = "question-answered"
 
@@ -1594,61 +1738,57 @@ def post_comment_vote(post_comment_id: int):
     (DELETE) Process unvote and return fragment.
     """
 
-    vote = get_post_comment_vote(
-        post_comment_id=post_comment_id, user_id=current_user.id
-    )
-
     if request.method == HTTPMethod.POST:
-        if vote is not None:
-            abort(HTTPStatus.CONFLICT)
-
-        vote_in = PostCommentVoteCreate(
-            user_id=current_user.id,
-            target_id=post_comment_id,
-        )
-        post_comment = create_post_comment_vote(vote_in=vote_in)
-
-        # user action.
-        user_action_in = UserActionVotePostCommentCreate(
-            user_id=current_user.id, target_id=post_comment.id
-        )
-        create_user_action(user_action_in=user_action_in)
-
-        # notification.
-        if post_comment.user_id != current_user.id:
-            notification_in = NotificationForPostCommentVoteCreate(
-                user_id=post_comment.user_id,
-                notification_target_id=post_comment.id,
-                from_user_id=current_user.id,
-                to_user_id=post_comment.user_id,
+        with unit_of_work():
+            vote_in = PostCommentVoteCreate(
+                user_id=current_user.id,
+                target_id=post_comment_id,
             )
-            create_notification(notification_in=notification_in)
+            post_comment, voted = create_post_comment_vote(vote_in=vote_in)
+
+            if voted:
+                # user action.
+                user_action_in = UserActionVotePostCommentCreate(
+                    user_id=current_user.id, target_id=post_comment.id
+                )
+                create_user_action(user_action_in=user_action_in)
+
+                # notification.
+                if post_comment.user_id != current_user.id:
+                    notification_in = NotificationForPostCommentVoteCreate(
+                        user_id=post_comment.user_id,
+                        notification_target_id=post_comment.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post_comment.user_id,
+                    )
+                    enqueue_create_notification(notification_in=notification_in)
 
     if request.method == HTTPMethod.DELETE:
-        if vote is None:
-            abort(HTTPStatus.NOT_FOUND)
-
-        post_comment = delete_post_comment_vote(
-            post_comment_id=vote.target_id, user_id=vote.user_id
-        )
-
-        # user action.
-        delete_user_action(
-            user_id=current_user.id,
-            action_type="vote_post_comment",
-            target_id=delete_user_action.id,
-        )
-
-        # notification.
-        if post_comment.user_id != current_user.id:
-            delete_notification(
-                user_id=post_comment.user_id,
-                notification_type="vote_post_comment",
-                notification_target_id=post_comment.id,
-                from_user_id=current_user.id,
-                to_user_id=post_comment.user_id,
+        with unit_of_work():
+            post_comment, unvoted = delete_post_comment_vote(
+                post_comment_id=post_comment_id, user_id=current_user.id
             )
 
+            if unvoted:
+                # user action.
+                delete_user_action(
+                    user_id=current_user.id,
+                    action_type="vote_post_comment",
+                    target_id=post_comment.id,
+                )
+
+                # notification.
+                if post_comment.user_id != current_user.id:
+                    enqueue_delete_notification(
+                        user_id=post_comment.user_id,
+                        notification_type="vote_post_comment",
+                        notification_target_id=post_comment.id,
+                        from_user_id=current_user.id,
+                        to_user_id=post_comment.user_id,
+                    )
+
     return render_template(
-        "community/post_comment/vote.html.jinja", post_comment=post_comment
+        "community/post_comment/vote.html.jinja",
+        post_comment=post_comment,
+        viewer=_viewer(post_comment=[post_comment.id]),
     )
@@ -2,7 +2,49 @@
 This is the module for defining ORMs and tables related to pyduck globally.
 """
 
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Integer
 from sqlalchemy.orm import Mapped
+from sqlalchemy.types import TypeDecorator
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Return milliseconds since epoch of datetime, naive one taken as UTC."""
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Return aware(UTC) datetime of milliseconds since epoch."""
+
+    return EPOCH + timedelta(milliseconds=value)
+
+
+class Timestamp(TypeDecorator):
+    """Represent datetime stored as integer milliseconds since epoch.
+
+    It's compared, sorted and indexed as an integer, and loaded as an aware
+    (UTC) datetime. Integers(e.g. values of a cursor) are bound as they are.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, datetime):
+            return to_epoch_ms(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_epoch_ms(value)
 
 
 class ImageUploadMixin:
@@ -23,7 +23,9 @@ Notification
 
 from __future__ import annotations
 
-from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from datetime import datetime
+
+from sqlalchemy import JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from flow2and4.database import db
@@ -34,6 +36,7 @@ from flow2and4.pyduck.community.models import (
     PostCommentReaction,
     PostVote
 )
+from flow2and4.pyduck.models import Timestamp
 
 
 class Notification(db.Model):
@@ -51,8 +54,12 @@ class Notification(db.Model):
     data: Mapped[str | None]
     read: Mapped[bool]
     urgent: Mapped[bool]
-    created_at: Mapped[str]
-    updated_at: Mapped[str | None]
+    # a coalesced notification stands for several actors, and `from_user_id`
+    # is the most recent of them.
+    actor_count: Mapped[int] = mapped_column(default=1, server_default="1")
+    recent_actor_ids: Mapped[list[int] | None] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(Timestamp)
+    updated_at: Mapped[datetime | None] = mapped_column(Timestamp)
 
     __bind_key__ = "pyduck"
     __table_args__ = (
@@ -63,6 +70,7 @@ class Notification(db.Model):
             "notification_target_id",
         ),
         Index(None, "user_id", "notification_type"),
+        Index(None, "user_id", "read", "created_at"),
     )
     __mapper_args__ = {
         "polymorphic_on": "notification_type",
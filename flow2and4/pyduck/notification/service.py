@@ -2,19 +2,31 @@
 This is the module for defining database transactions related to pyduck notification.
 
 [services]
+coalesces
 create_notification
 delete_notification
 get_all_notifications_by_commons
+get_unread_notification_count
 
-get_all_unread_notifications
-make_unread_notification_read
+mark_all_unread_notifications_as_read
+notification_source_exists
 """
 
+from datetime import timedelta
+
+from flask import current_app
 from flask_login import current_user
-from flask_sqlalchemy.pagination import Pagination
-from sqlalchemy import select
+from sqlalchemy import exists, func, select, update
 
-from flow2and4.database import db
+from flow2and4.database import commit, db
+from flow2and4.pyduck.auth.models import User
+from flow2and4.pyduck.community.models import (
+    Answer,
+    AnswerComment,
+    PostComment,
+    Reaction,
+    Vote
+)
 from flow2and4.pyduck.notification.models import (
     Notification,
     NotificationForAnswerCommentReaction,
@@ -34,10 +46,166 @@ from flow2and4.pyduck.notification.schemas import (
     NotificationForPostVoteCreate,
     NotificationForQuestionReactionCreate
 )
+from flow2and4.pyduck.pagination import Page, paginate
+
+# events coalesced into one notification per target(and reaction code), in the
+# aggregation mode.
+COALESCED_TYPES = {
+    "vote_post",
+    "reaction_post",
+    "reaction_post_comment",
+    "reaction_question",
+    "reaction_answer",
+    "reaction_answer_comment",
+}
+
+# how many of the most recent actors a coalesced notification keeps.
+RECENT_ACTORS = 3
+
+
+def _count_unread(*, user_id: int, delta: int) -> None:
+    """Add delta to the unread notification count of the user in place.
+
+    It's flushed within the caller's transaction, so the count changes along
+    with the notification or not at all.
+    """
+
+    counter = User.unread_notification_count
 
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values({counter: func.max(counter + delta, 0)})
+    )
 
-def create_notification(*, notification_in):
-    """Insert notification data in table."""
+
+def coalesces(notification_type: str) -> bool:
+    """Tell whether notifications of the type are coalesced in the window."""
+
+    return (
+        bool(current_app.config.get("NOTIFICATION_COALESCE_WINDOW"))
+        and notification_type in COALESCED_TYPES
+    )
+
+
+def _get_latest_of_target(
+    *,
+    user_id: int,
+    notification_type: str,
+    notification_target_id: int,
+    notification_value: str | None
+) -> Notification | None:
+    """Select the latest notification of the type on the target for the user.
+
+    Reactions are told apart by their code(`notification_value`).
+    """
+
+    return db.session.scalars(
+        select(Notification)
+        .filter_by(
+            user_id=user_id,
+            notification_type=notification_type,
+            notification_target_id=notification_target_id,
+            notification_value=notification_value,
+        )
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(1)
+    ).first()
+
+
+def _coalesce(notification) -> bool | None:
+    """Fold notification into the latest one on the same target in the window.
+
+    The window starts at the first event, so a hot target yields a row per
+    window however many actors it has, and a row per code for reactions. A
+    reaction keeps a single row per code(by the unique constraint), so the
+    next window restarts it instead, as does a new actor of a read one.
+    Returns None when there's no notification to fold into.
+    """
+
+    window = timedelta(seconds=current_app.config["NOTIFICATION_COALESCE_WINDOW"])
+    latest = _get_latest_of_target(
+        user_id=notification.user_id,
+        notification_type=notification.notification_type,
+        notification_target_id=notification.notification_target_id,
+        notification_value=notification.notification_value,
+    )
+    if latest is None:
+        return None
+
+    in_window = latest.created_at >= notification.created_at - window
+    if not in_window and notification.notification_value is None:
+        return None
+
+    actor = notification.from_user_id
+    actors = latest.recent_actor_ids or [latest.from_user_id]
+
+    if latest.read or not in_window:
+        if latest.read:
+            latest.read = False
+            _count_unread(user_id=latest.user_id, delta=1)
+        latest.actor_count = 1
+        latest.created_at = notification.created_at
+        actors = []
+    elif actor in actors:
+        # the same event(e.g. a retried task), as far as the recent actors tell.
+        return False
+    else:
+        latest.actor_count += 1
+
+    latest.recent_actor_ids = [actor, *actors][:RECENT_ACTORS]
+    latest.from_user_id = actor
+    latest.updated_at = notification.created_at
+    commit()
+
+    return True
+
+
+def _uncoalesce(
+    *,
+    user_id: int,
+    notification_type: str,
+    notification_target_id: int,
+    notification_value: str | None,
+    actor: int
+) -> bool | None:
+    """Take the actor out of the latest coalesced notification on the target.
+
+    The last actor takes the notification with it. Returns None when there's
+    no coalesced notification to take the actor out of.
+    """
+
+    latest = _get_latest_of_target(
+        user_id=user_id,
+        notification_type=notification_type,
+        notification_target_id=notification_target_id,
+        notification_value=notification_value,
+    )
+    if latest is None or latest.actor_count <= 1:
+        return None
+
+    # an actor older than the recent ones is counted but not kept.
+    recent = latest.recent_actor_ids or []
+    if actor not in recent and latest.actor_count <= len(recent):
+        return None
+
+    actors = [id_ for id_ in recent if id_ != actor]
+    latest.actor_count -= 1
+    latest.recent_actor_ids = actors
+    if latest.from_user_id == actor and actors:
+        latest.from_user_id = actors[0]
+    commit()
+
+    return True
+
+
+def create_notification(*, notification_in) -> bool:
+    """Insert notification unless it's there already, return whether it's inserted.
+
+    The same event(e.g. a retried task) is told by the unique constraint of
+    notification along with who it's from, since a null `notification_value`
+    never conflicts on SQLite.
+    """
 
     notification = None
     if isinstance(notification_in, NotificationForPostVoteCreate):
@@ -61,9 +229,33 @@ def create_notification(*, notification_in):
     elif isinstance(notification_in, NotificationForAnswerCommentReactionCreate):
         notification = NotificationForPostReaction(**notification_in.dict())
 
-    if notification is not None:
-        db.session.add(notification)
-        db.session.commit()
+    if notification is None:
+        return False
+
+    if coalesces(notification.notification_type):
+        coalesced = _coalesce(notification)
+        if coalesced is not None:
+            return coalesced
+        notification.recent_actor_ids = [notification.from_user_id]
+
+    duplicate = db.session.scalar(
+        select(Notification.id).filter_by(
+            user_id=notification.user_id,
+            notification_type=notification.notification_type,
+            notification_value=notification.notification_value,
+            notification_target_id=notification.notification_target_id,
+            from_user_id=notification.from_user_id,
+        )
+    )
+    if duplicate is not None:
+        return False
+
+    db.session.add(notification)
+    if not notification.read:
+        _count_unread(user_id=notification.user_id, delta=1)
+    commit()
+
+    return True
 
 
 def delete_notification(
@@ -74,8 +266,23 @@ def delete_notification(
     from_user_id: int,
     to_user_id: int,
     notification_value: str | None = None
-):
-    """Delete notification data in table."""
+) -> bool:
+    """Delete notification if it's there, return whether it's deleted.
+
+    A coalesced notification of several actors only loses the actor instead.
+    """
+
+    if coalesces(notification_type):
+        uncoalesced = _uncoalesce(
+            user_id=user_id,
+            notification_type=notification_type,
+            notification_target_id=notification_target_id,
+            notification_value=notification_value,
+            actor=from_user_id,
+        )
+        if uncoalesced is not None:
+            return uncoalesced
+
     model = None
     notification = None
 
@@ -104,16 +311,22 @@ def delete_notification(
                 from_user_id=from_user_id,
                 to_user_id=to_user_id,
             )
-        ).one()
+        ).one_or_none()
+
+    if notification is None:
+        return False
 
-    if notification is not None:
-        db.session.delete(notification)
-        db.session.commit()
+    db.session.delete(notification)
+    if not notification.read:
+        _count_unread(user_id=notification.user_id, delta=-1)
+    commit()
+
+    return True
 
 
 def get_all_notifications_by_commons(
-    *, page, per_page, max_per_page, filters, sorters, periods, query
-) -> Pagination:
+    *, page, per_page, max_per_page, filters, sorters, periods, query, cursor
+) -> Page:
     """Select all notifications by common parameters.
 
     TODO
@@ -122,19 +335,89 @@ def get_all_notifications_by_commons(
     """
 
     select_ = select(Notification).filter_by(user_id=current_user.id)
-    select_ = select_.order_by(*[Notification.created_at.desc()])
+    _sorters = [Notification.created_at.desc(), Notification.id.desc()]
+    select_ = select_.order_by(*_sorters)
+
+    return paginate(
+        select_,
+        Notification,
+        order_by=_sorters,
+        page=page,
+        per_page=per_page,
+        max_per_page=max_per_page,
+        cursor=cursor,
+    )
+
+
+def mark_all_unread_notifications_as_read(*, user_id: int) -> int:
+    """Mark all unread notifications of the user as read, return how many.
+
+    A single `UPDATE ... WHERE user_id = ? AND read = 0` served by the index
+    led by (user_id, read), without loading any notification.
+    """
 
-    return db.paginate(select_, page=page, per_page=per_page, max_per_page=max_per_page)
+    result = db.session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.read.is_(False))
+        .values(read=True),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.execute(
+        update(User).where(User.id == user_id).values(unread_notification_count=0)
+    )
+    commit()
 
+    return result.rowcount
 
-def mark_all_unread_notifications_as_read():
-    """Get all unread notifications and mark them as read."""
 
-    notifications = db.session.scalars(
-        select(Notification).filter_by(user_id=current_user.id, read=False)
-    ).all()
+def get_unread_notification_count(*, user_id: int) -> int:
+    """Select the unread notification count of the user, kept on the user row."""
+
+    return db.session.scalar(
+        select(User.unread_notification_count).where(User.id == user_id)
+    )
+
+
+# what a notification of creating something is about.
+CREATED_MODELS = {
+    "create_post_comment": PostComment,
+    "create_answer": Answer,
+    "create_answer_comment": AnswerComment,
+}
+
+
+def notification_source_exists(*, notification_in) -> bool:
+    """Tell whether the vote, reaction or created item notified is still there.
+
+    A notification delivered after its source was withdrawn(e.g. unvoted
+    meanwhile) is told by it. Unknown types are taken as existing.
+    """
+
+    notification_type = notification_in.notification_type
+    target_id = notification_in.notification_target_id
+    from_user_id = notification_in.from_user_id
 
-    for notification in notifications:
-        notification.read = True
+    kind, _, target = notification_type.partition("_")
+    if kind == "vote":
+        where_ = exists().where(
+            Vote.target == target,
+            Vote.target_id == target_id,
+            Vote.user_id == from_user_id,
+        )
+    elif kind == "reaction":
+        where_ = exists().where(
+            Reaction.target == target,
+            Reaction.target_id == target_id,
+            Reaction.user_id == from_user_id,
+            Reaction.code == notification_in.notification_value,
+        )
+    elif notification_type in CREATED_MODELS:
+        model = CREATED_MODELS[notification_type]
+        where_ = exists().where(model.id == target_id)
+    else:
+        return True
 
-    db.session.commit()
+    # exists doesn't tell its bind, so route it by the bind key.
+    return db.session.scalar(
+        select(where_), bind_arguments={"bind": db.engines["pyduck"]}
+    )
@@ -0,0 +1,133 @@
+"""
+This is the module for defining background tasks related to pyduck notification.
+
+[tasks]
+create_notification
+delete_notification
+push_notification
+"""
+
+import json
+
+from celery import shared_task
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from flow2and4.database import on_commit, unit_of_work
+from flow2and4.pyduck.notification import schemas
+from flow2and4.pyduck.notification.service import \
+    create_notification as _create_notification
+from flow2and4.pyduck.notification.service import \
+    delete_notification as _delete_notification
+from flow2and4.pyduck.notification.service import (
+    coalesces,
+    notification_source_exists
+)
+from flow2and4.pyduck.sse.views import EventStream
+from flow2and4.pyduck.sse.views import bp as sse
+
+# a locked database(OperationalError) is retried with backoff.
+RETRY = dict(
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    max_retries=5,
+    ignore_result=True,
+)
+
+
+class _SourceWithdrawn(Exception):
+    """Represent the source of notification withdrawn before it's created."""
+
+
+@shared_task(**RETRY)
+def create_notification(
+    schema: str, notification_in: dict, event: str | None = None
+) -> bool:
+    """Insert notification unless it's a duplicate, then publish `event` by SSE.
+
+    Creating and deleting tasks of the same notification may run out of order
+    (e.g. vote then unvote, while creating is retried), so notification is
+    only kept if its source is still there.
+    """
+
+    notification_in = getattr(schemas, schema)(**notification_in)
+
+    try:
+        with unit_of_work():
+            created = _create_notification(notification_in=notification_in)
+
+            # checked after the write, which holds the write lock of sqlite, so
+            # the source isn't withdrawn unseen before this commits.
+            if created and not notification_source_exists(
+                notification_in=notification_in
+            ):
+                raise _SourceWithdrawn
+    except IntegrityError:
+        # inserted by the same event delivered twice at once.
+        return False
+    except _SourceWithdrawn:
+        return False
+
+    # publish after commit, so the subscriber finds the notification.
+    if created and event is not None:
+        publish_notification(
+            user_id=notification_in.user_id,
+            event=event,
+            notification_type=notification_in.notification_type,
+            notification_target_id=notification_in.notification_target_id,
+        )
+
+    return created
+
+
+@shared_task(**RETRY)
+def delete_notification(**kwargs) -> bool:
+    """Delete notification if it's there."""
+
+    with unit_of_work():
+        return _delete_notification(**kwargs)
+
+
+@shared_task(ignore_result=True)
+def push_notification(user_id: int, event: str):
+    """Publish `event` of notification to the user by SSE."""
+
+    eventstream = EventStream(event, event="notification")
+    sse.publish(message=eventstream, channel=user_id)
+
+
+def publish_notification(
+    *, user_id: int, event: str, notification_type: str, notification_target_id: int
+):
+    """Publish `event` of notification to the user by SSE, rate limited if coalesced.
+
+    A coalesced notification is pushed at once at most every interval, and the
+    events throttled in the interval are pushed once as it ends, so a hot
+    target costs each subscriber a push per interval.
+    """
+
+    if not coalesces(notification_type):
+        push_notification(user_id, event)
+        return
+
+    interval = current_app.config.get("NOTIFICATION_PUSH_INTERVAL", 10)
+    key = f"sse:throttle:{user_id}:{notification_type}:{notification_target_id}"
+
+    if sse.redis.set(key, 1, nx=True, ex=interval):
+        push_notification(user_id, event)
+    elif sse.redis.set(f"{key}:trailing", 1, nx=True, ex=interval):
+        push_notification.apply_async((user_id, event), countdown=interval)
+
+
+def enqueue_create_notification(*, notification_in, event: str | None = None):
+    """Enqueue creating notification once the current unit of work commits."""
+
+    data = json.loads(notification_in.json())
+    args = (type(notification_in).__name__, data, event)
+    on_commit(lambda: create_notification.delay(*args))
+
+
+def enqueue_delete_notification(**kwargs):
+    """Enqueue deleting notification once the current unit of work commits."""
+
+    on_commit(lambda: delete_notification.delay(**kwargs))
@@ -5,10 +5,11 @@ This is the module for handling all requests related to pyduck notificaton.
 from http import HTTPMethod
 
 from flask import Blueprint, make_response, render_template
-from flask_login import login_required
+from flask_login import current_user, login_required
 
 from flow2and4.pyduck.notification.service import (
     get_all_notifications_by_commons,
+    get_unread_notification_count,
     mark_all_unread_notifications_as_read
 )
 from flow2and4.pyduck.schemas import CommonParameters
@@ -25,13 +26,27 @@ bp = Blueprint(
 @bp.route("/bell")
 @login_required
 def bell():
-    """Return bell fragment."""
+    """Return bell fragment with its badge, without the notifications.
+
+    The badge is served by the unread count kept on the user row, and the
+    notifications are loaded by `bell_items` only when the dropdown opens.
+    """
+
+    unread = get_unread_notification_count(user_id=current_user.id)
+
+    return render_template("notification/bell.html.jinja", unread=unread)
+
+
+@bp.route("/bell/items")
+@login_required
+def bell_items():
+    """Return fragment of notifications listed in the bell dropdown."""
 
     commons = CommonParameters()
 
     pagination = get_all_notifications_by_commons(**commons.dict())
 
-    return render_template("notification/bell.html.jinja", pagination=pagination)
+    return render_template("notification/bell_items.html.jinja", pagination=pagination)
 
 
 @bp.route("/bell/read")
@@ -39,7 +54,7 @@ def bell():
 def bell_read():
     """Make notifications read because user click the bell and return fragment."""
 
-    mark_all_unread_notifications_as_read()
+    mark_all_unread_notifications_as_read(user_id=current_user.id)
 
     res = make_response()
     res.headers["HX-Trigger"] = "notificationread"
@@ -0,0 +1,177 @@
+"""
+This is the module for paginating selects by cursor(keyset) or by offset.
+
+Infinite scroll lists ask for the next page with an opaque `cursor` token. It
+carries the values of the sort columns(and `id`) of the last item rendered, so
+the next page is selected with `WHERE (sort columns) > (values) LIMIT n`,
+which costs the same on page 500 as on page 1. When the ordering can't be
+resumed from the last item(e.g. ordered by relevance of the search), the
+token carries the next page number instead.
+
+Neither way counts rows. A page selects `per_page + 1` rows to tell whether
+the next page exists.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+from flow2and4.database import db
+from flow2and4.pyduck.models import to_epoch_ms
+
+
+# json values a sort column can be compared to.
+SCALARS = (str, int, float, bool, type(None))
+
+
+class InvalidCursor(ValueError):
+    """Represent cursor which is malformed or doesn't match the ordering."""
+
+
+def encode_cursor(cursor: dict) -> str:
+    """Return opaque token of the cursor."""
+
+    token = base64.urlsafe_b64encode(json.dumps(cursor).encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Return the cursor of opaque token, raise InvalidCursor if it's malformed."""
+
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise InvalidCursor("malformed cursor")
+
+    if not (
+        isinstance(cursor, dict)
+        and (
+            (
+                isinstance(cursor.get("after"), list)
+                and all(isinstance(v, SCALARS) for v in cursor["after"])
+            )
+            or (isinstance(cursor.get("page"), int) and cursor["page"] > 0)
+        )
+    ):
+        raise InvalidCursor("malformed cursor")
+
+    return cursor
+
+
+class Page:
+    """Represent a page of items.
+
+    It's iterated like flask-sqlalchemy `Pagination` in templates. `page` is
+    None when it's selected after a cursor.
+    """
+
+    def __init__(
+        self,
+        items: list,
+        *,
+        page: int | None,
+        per_page: int,
+        has_next: bool,
+    ):
+        """Initialize Page."""
+
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.next_cursor: str | None = None
+
+    def __iter__(self):
+        yield from self.items
+
+
+def _sort_keys(model, order_by: list) -> list[tuple] | None:
+    """Return (column, descending) of each ordering, None if any isn't resumable.
+
+    Only plain columns of the model can be resumed from its last item.
+    """
+
+    keys = []
+    for ordering in order_by:
+        column, descending = ordering, False
+        if isinstance(ordering, UnaryExpression):
+            if ordering.modifier not in (operators.asc_op, operators.desc_op):
+                return None
+            column = ordering.element
+            descending = ordering.modifier is operators.desc_op
+
+        if getattr(column, "table", None) is not model.__table__:
+            return None
+        keys.append((column, descending))
+
+    return keys
+
+
+def _after(keys: list[tuple], values: list):
+    """Return where clause of the rows ordered after the values."""
+
+    clauses = []
+    for i, ((column, descending), value) in enumerate(zip(keys, values)):
+        ties = [c == v for (c, _), v in zip(keys[:i], values[:i])]
+        clauses.append(and_(*ties, column < value if descending else column > value))
+
+    return or_(*clauses)
+
+
+def paginate(
+    select_: Select,
+    model,
+    *,
+    order_by: list,
+    page: int,
+    per_page: int,
+    max_per_page: int,
+    cursor: str | None,
+) -> Page:
+    """Select the page of select ordered by `order_by`, which ends with `id`.
+
+    The first page(no cursor) is selected by offset, the following pages are
+    selected after the cursor. Either way `next_cursor` of the page is the
+    token of the page after it.
+    """
+
+    keys = _sort_keys(model, order_by)
+    decoded = decode_cursor(cursor) if cursor is not None else {}
+    per_page = min(per_page, max_per_page)
+
+    if "after" in decoded:
+        values = decoded["after"]
+        if keys is None or len(values) != len(keys):
+            raise InvalidCursor("cursor doesn't match the ordering")
+
+        page = None
+        paged = select_.where(_after(keys, values))
+    else:
+        page = decoded.get("page", page)
+        paged = select_.offset((page - 1) * per_page)
+
+    rows = db.session.scalars(paged.limit(per_page + 1)).all()
+    pagination = Page(
+        rows[:per_page],
+        page=page,
+        per_page=per_page,
+        has_next=len(rows) > per_page,
+    )
+
+    if pagination.has_next:
+        if keys is not None:
+            last = pagination.items[-1]
+            after = [getattr(last, column.key) for column, _ in keys]
+            after = [to_epoch_ms(v) if isinstance(v, datetime) else v for v in after]
+            pagination.next_cursor = encode_cursor({"after": after})
+        else:
+            pagination.next_cursor = encode_cursor({"page": pagination.page + 1})
+    else:
+        pagination.next_cursor = None
+
+    return pagination
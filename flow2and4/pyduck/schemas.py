@@ -29,6 +29,12 @@ class CommonParameters(BaseModel):
         each filter __MUST__ have follow the form `<field>-<op>-<value>` form
         `<field>` is the database column(or property) and `<op>` is operator 
         and `<value>` is the value used to filter `<field>`.
+
+    :cursor
+        opaque token of the page following the last item rendered, which is
+        given by `next_cursor` of the pagination. it takes precedence over
+        `page`, see `flow2and4.pyduck.pagination`. a stale or malformed one
+        is answered with 400 Bad Request.
     
 
     [stolen and modified from]
@@ -42,3 +48,4 @@ class CommonParameters(BaseModel):
     sorters: str | None
     periods: str | None
     query: str | None
+    cursor: str | None
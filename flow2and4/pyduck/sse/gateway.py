@@ -0,0 +1,342 @@
+"""
+This is the module for defining the standalone asyncio SSE gateway.
+
+Long-lived event streams tie up the gunicorn workers that also render pages.
+This gateway serves `/stream/users/<id>` from a single asyncio process instead,
+so nginx can route streams away from the flask workers. It speaks the same
+`EventStream` wire format, honours `Last-Event-ID` and authenticates by the
+flask session cookie, so the browser can't tell which one it's talking to.
+
+It is opt-in: flask serves `/stream/` until the `sse-gateway` compose profile
+is started and its nginx location is uncommented (see `nginx.prod.conf`).
+
+    python -m flow2and4.pyduck.sse.gateway --host 0.0.0.0 --port 8001 --mode prod
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import re
+import resource
+from collections import defaultdict
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from flow2and4.config import WebConfig, WebProdConfig, WebTestConfig
+from flow2and4.pyduck.sse.listener import CHANNEL_PREFIX, user_channel, user_stream
+from flow2and4.pyduck.sse.views import (
+    EventStream,
+    eventstreams_from_entries,
+    parse_event_id
+)
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = re.compile(r"^/stream/users/(?P<user_id>\d+)$")
+MAX_HEADERS = 100
+
+
+class SSEGateway:
+    """Represent an asyncio server streaming server-sent events to users."""
+
+    def __init__(self, config: WebConfig, maxsize: int = 100):
+        """Initialize SSEGateway."""
+
+        self.config = config
+        self.maxsize = maxsize
+        self.redis = Redis.from_url(
+            config.REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS,
+            max_connections=config.REDIS_MAX_CONNECTIONS_FOR_SERVER_SENT_EVENTS,
+            socket_connect_timeout=(
+                config.REDIS_SOCKET_CONNECT_TIMEOUT_FOR_SERVER_SENT_EVENTS
+            ),
+        )
+
+        # Use the very serializer flask signs the session cookie with.
+        app = Flask(__name__)
+        app.secret_key = config.SECRET_KEY
+        self.serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+        self.session_cookie_name = app.config["SESSION_COOKIE_NAME"]
+        self.session_max_age = int(app.permanent_session_lifetime.total_seconds())
+
+        self._queues: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of live subscribers(streams) in this process."""
+
+        return sum(len(queues) for queues in self._queues.values())
+
+    def session_user_id(self, cookie: str | None) -> str | None:
+        """Return `_user_id` of flask session cookie if signature is valid."""
+
+        if not cookie:
+            return None
+
+        morsel = SimpleCookie(cookie).get(self.session_cookie_name)
+        if morsel is None:
+            return None
+
+        try:
+            session = self.serializer.loads(morsel.value, max_age=self.session_max_age)
+        except BadSignature:
+            return None
+
+        return session.get("_user_id")
+
+    def dispatch(self, channel: str, data: str) -> None:
+        """Put data in every queue subscribing the channel."""
+
+        for queue in self._queues.get(channel, ()):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning("sse queue is full, message dropped: %s", channel)
+
+    async def listen(self) -> None:
+        """Listen pub/sub messages forever and reconnect when connection is lost."""
+
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+
+                    channel, data = message["channel"], message["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+
+                    self.dispatch(channel, data)
+
+            except (RedisConnectionError, RedisTimeoutError) as e:
+                logger.warning("sse gateway lost redis connection: %s", e)
+                await asyncio.sleep(1)
+
+            finally:
+                await pubsub.aclose()
+
+    async def replay(self, user_id: str, last_event_id: str) -> list[EventStream]:
+        """Return event streams of specific user published after `last_event_id`."""
+
+        entries = await self.redis.xrange(
+            user_stream(user_id), min=f"({last_event_id}"
+        )
+
+        return eventstreams_from_entries(entries)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle one HTTP connection."""
+
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+
+            method, path, headers = request
+            if path == "/stream/stats" and self.is_internal(
+                writer.get_extra_info("peername")
+            ):
+                await self._respond(writer, HTTPStatus.OK, self.stats())
+                return
+
+            matched = STREAM_PATH.match(path)
+            if matched is None:
+                await self._respond(writer, HTTPStatus.NOT_FOUND)
+                return
+            if method != "GET":
+                await self._respond(writer, HTTPStatus.METHOD_NOT_ALLOWED)
+                return
+
+            user_id = matched.group("user_id")
+            if self.session_user_id(headers.get("cookie")) != user_id:
+                await self._respond(writer, HTTPStatus.FORBIDDEN)
+                return
+
+            await self._stream(writer, user_id, headers.get("last-event-id"))
+
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+
+        finally:
+            writer.close()
+
+    @staticmethod
+    def is_internal(peername: tuple | None) -> bool:
+        """Check if the peer connected from this host, not through nginx."""
+
+        try:
+            return ipaddress.ip_address(peername[0]).is_loopback
+        except (TypeError, ValueError):
+            return False
+
+    def stats(self) -> dict:
+        """Show the number of live subscribers and memory of this process."""
+
+        return {
+            "pid": os.getpid(),
+            "subscribers": self.subscriber_count,
+            "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> tuple[str, str, dict[str, str]] | None:
+        """Read request line and headers, and ignore the body."""
+
+        line = await reader.readline()
+        if not line:
+            return None
+
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        path = target.split("?", 1)[0]
+
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        return method, path, headers
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        body: dict | None = None,
+    ) -> None:
+        """Write a short json response."""
+
+        content = json.dumps(body or {"message": status.phrase}).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\n"
+                "Connection: close\r\n"
+                "\r\n"
+            ).encode()
+            + content
+        )
+        await writer.drain()
+
+    async def _stream(
+        self, writer: asyncio.StreamWriter, user_id: str, last_event_id: str | None
+    ) -> None:
+        """Stream server-sent events to specific user until disconnected."""
+
+        if parse_event_id(last_event_id) is None:
+            last_event_id = None
+
+        channel = user_channel(user_id)
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self._queues[channel].add(queue)
+
+        try:
+            writer.write(
+                (
+                    "HTTP/1.1 200 OK\r\n"
+                    "Content-Type: text/event-stream; charset=utf-8\r\n"
+                    "Cache-Control: no-cache\r\n"
+                    "X-Accel-Buffering: no\r\n"
+                    "Connection: close\r\n"
+                    "\r\n"
+                ).encode()
+            )
+            await self._send(writer, EventStream(comment="connected"))
+
+            last_id = parse_event_id(last_event_id)
+            if last_event_id is not None:
+                for eventstream in await self.replay(user_id, last_event_id):
+                    last_id = parse_event_id(eventstream.id)
+                    await self._send(writer, eventstream)
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=self.config.SSE_HEARTBEAT_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    await self._send(writer, EventStream(comment="ping"))
+                    continue
+
+                eventstream = EventStream(**json.loads(message))
+                id = parse_event_id(eventstream.id)
+                if last_id is not None and id is not None and id <= last_id:
+                    continue
+
+                last_id = id or last_id
+                await self._send(writer, eventstream)
+
+        finally:
+            queues = self._queues[channel]
+            queues.discard(queue)
+            if not queues:
+                del self._queues[channel]
+
+    async def _send(self, writer: asyncio.StreamWriter, eventstream: EventStream):
+        """Write event stream and wait until it's flushed to the socket."""
+
+        writer.write(str(eventstream).encode())
+        await writer.drain()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Serve forever."""
+
+        listener = asyncio.create_task(self.listen())
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+        logger.info("sse gateway is listening on %s:%s", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            listener.cancel()
+            await self.redis.aclose()
+
+
+def raise_open_files_limit() -> None:
+    """Raise soft limit of open files to hard limit, one per connection."""
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run standalone SSE gateway.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mode", choices=["dev", "test", "prod"], default="dev")
+    args = parser.parse_args()
+
+    configs = {"dev": WebConfig, "test": WebTestConfig, "prod": WebProdConfig}
+    config = configs[args.mode]()
+
+    logging.basicConfig(level=logging.INFO)
+    raise_open_files_limit()
+
+    asyncio.run(SSEGateway(config).serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
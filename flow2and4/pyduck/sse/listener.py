@@ -0,0 +1,152 @@
+"""
+This is the module for defining the redis pub/sub listener shared by SSE streams.
+
+Every worker process holds exactly one redis pub/sub connection. The listener
+pattern-subscribes to all user channels once and fans each message out to the
+in-process queues of the streams connected to that worker, so the number of
+redis connections doesn't grow with the number of concurrent viewers.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from queue import Full, Queue
+
+from redis import Redis
+from redis.exceptions import ConnectionError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "sse:users:"
+STREAM_PREFIX = "sse:streams:users:"
+
+
+def user_channel(user_id: int | str) -> str:
+    """Return redis pub/sub channel name for specific user."""
+
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+def user_stream(user_id: int | str) -> str:
+    """Return redis stream key keeping recent messages for specific user."""
+
+    return f"{STREAM_PREFIX}{user_id}"
+
+
+class SSEListener:
+    """Represent a redis pub/sub listener shared by all streams in a process."""
+
+    def __init__(self, pattern: str = f"{CHANNEL_PREFIX}*", maxsize: int = 100):
+        """Initialize SSEListener."""
+
+        self.pattern = pattern
+        self.maxsize = maxsize
+
+        self._queues: dict[str, set[Queue]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        """Return the number of live subscribers(streams) in this process."""
+
+        with self._lock:
+            return sum(len(queues) for queues in self._queues.values())
+
+    @property
+    def running(self) -> bool:
+        """Return whether listener of this process is running."""
+
+        return (
+            self._pid == os.getpid()
+            and self._thread is not None
+            and self._thread.is_alive()
+        )
+
+    def start(self, redis: Redis) -> None:
+        """Start background listener unless it's already running in this process.
+
+        The pid is checked because gunicorn forks workers after the application
+        is created, and a thread never survives a fork.
+        """
+
+        with self._lock:
+            if self.running:
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, args=(redis,), name="sse-listener", daemon=True
+            )
+            self._thread.start()
+
+    def subscribe(self, channel: str) -> Queue:
+        """Register a queue that receives messages published to the channel."""
+
+        queue = Queue(maxsize=self.maxsize)
+        with self._lock:
+            self._queues[channel].add(queue)
+
+        return queue
+
+    def unsubscribe(self, channel: str, queue: Queue) -> None:
+        """Unregister the queue from the channel."""
+
+        with self._lock:
+            queues = self._queues.get(channel)
+            if queues is None:
+                return
+
+            queues.discard(queue)
+            if not queues:
+                del self._queues[channel]
+
+    def dispatch(self, channel: str, data: str) -> None:
+        """Put data in every queue subscribing the channel.
+
+        A queue that is full belongs to a stream that doesn't consume, so the
+        message is dropped for it instead of blocking the other streams.
+        """
+
+        with self._lock:
+            queues = list(self._queues.get(channel, ()))
+
+        for queue in queues:
+            try:
+                queue.put_nowait(data)
+            except Full:
+                logger.warning("sse queue is full, message dropped: %s", channel)
+
+    def _run(self, redis: Redis) -> None:
+        """Listen pub/sub messages forever and reconnect when connection is lost."""
+
+        while True:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.pattern)
+
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+
+                    channel, data = message["channel"], message["data"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    if isinstance(data, bytes):
+                        data = data.decode()
+
+                    self.dispatch(channel, data)
+
+            except (ConnectionError, TimeoutError) as e:
+                logger.warning("sse listener lost redis connection: %s", e)
+                time.sleep(1)
+
+            finally:
+                pubsub.close()
+
+
+listener = SSEListener()
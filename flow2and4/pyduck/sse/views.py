@@ -7,16 +7,33 @@ This is the module for defining SSEs(Server-Sent Events).
 """
 
 import json
-import time
+import logging
+import os
+import threading
+from http import HTTPStatus
+from queue import Empty
 
 from flask import (
     Blueprint,
     Response,
+    abort,
     current_app,
+    g,
+    has_request_context,
+    jsonify,
     make_response,
+    request,
+    session,
     stream_with_context
 )
-from redis import Redis
+from flask_login import current_user, login_required
+from redis import BlockingConnectionPool, Redis
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+
+from flow2and4.pyduck.sse.listener import listener, user_channel, user_stream
+
+logger = logging.getLogger(__name__)
 
 
 class EventStream:
@@ -83,29 +100,183 @@ class EventStream:
         return d
 
 
+# KEYS[1]: stream of user, KEYS[2]: pub/sub channel of user
+# ARGV[1]: message, ARGV[2]: max length of stream, ARGV[3]: ttl of stream
+PUBLISH_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'message', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+local message = cjson.decode(ARGV[1])
+message['id'] = id
+redis.call('PUBLISH', KEYS[2], cjson.encode(message))
+return id
+"""
+
+
+def parse_event_id(id: str | None) -> tuple[int, int] | None:
+    """Parse event id(redis stream entry id) into comparable tuple."""
+
+    if not id:
+        return None
+
+    try:
+        ms, _, seq = id.partition("-")
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return None
+
+
+def eventstreams_from_entries(entries: list) -> list[EventStream]:
+    """Build event streams from redis stream entries, using entry id as event id."""
+
+    eventstreams = []
+    for id, fields in entries:
+        id = id.decode() if isinstance(id, bytes) else id
+        message = json.loads(fields[b"message"])
+        message.update({"id": id})
+        eventstreams.append(EventStream(**message))
+
+    return eventstreams
+
+
 class BlueprintWithSSE(Blueprint):
     """Represent Blueprint with SSE functionality added by redis pub/sub."""
 
+    _redis_pool: BlockingConnectionPool | None = None
+    _redis_pool_lock = threading.Lock()
+    _publish_script: Script | None = None
+
+    def __init__(self, *args, **kwargs):
+        """Initialize BlueprintWithSSE."""
+
+        super().__init__(*args, **kwargs)
+
+        self.after_app_request(self._flush_after_request)
+
     @property
-    def redis(self):
-        """Represent a redis connection."""
+    def redis_pool(self) -> BlockingConnectionPool:
+        """Represent a redis connection pool created lazily once per process.
+
+        redis-py resets the pool by itself when the process is forked, so each
+        gunicorn worker ends up with its own pool.
+        """
+
+        if self._redis_pool is not None:
+            return self._redis_pool
 
-        url = current_app.config.get("REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS")
+        config = current_app.config
+        url = config.get("REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS")
         if url is None:
             raise KeyError("Redis url is needed for enabling SSE functionality.")
 
-        return Redis.from_url(url=url)
+        with self._redis_pool_lock:
+            if self._redis_pool is None:
+                self._redis_pool = BlockingConnectionPool.from_url(
+                    url,
+                    max_connections=config.get(
+                        "REDIS_MAX_CONNECTIONS_FOR_SERVER_SENT_EVENTS", 50
+                    ),
+                    socket_timeout=config.get(
+                        "REDIS_SOCKET_TIMEOUT_FOR_SERVER_SENT_EVENTS", 5.0
+                    ),
+                    socket_connect_timeout=config.get(
+                        "REDIS_SOCKET_CONNECT_TIMEOUT_FOR_SERVER_SENT_EVENTS", 2.0
+                    ),
+                )
+
+        return self._redis_pool
 
-    def publish(self, message: EventStream, channel: str = "sse"):
-        """Publish event stream to redis pub/sub."""
+    @property
+    def redis(self) -> Redis:
+        """Represent a redis client borrowing connections from the pool."""
+
+        return Redis(connection_pool=self.redis_pool)
+
+    @property
+    def publish_script(self) -> Script:
+        """Represent lua script appending message to stream and publishing it."""
+
+        if self._publish_script is None:
+            self._publish_script = self.redis.register_script(PUBLISH_SCRIPT)
+
+        return self._publish_script
+
+    def publish(self, message: EventStream, channel: int | str) -> str | None:
+        """Publish event stream to redis pub/sub channel of specific user.
+
+        The message is appended to the capped stream of the user first, so the
+        stream entry id becomes the event id that a reconnecting client sends
+        back as `Last-Event-ID`. Both happen atomically in one round trip.
+
+        While handling a request, the message is only queued on the request
+        context and `None` is returned. Queued messages are published together
+        once the request has succeeded, that is, after its changes committed.
+        """
 
         if not isinstance(message, EventStream):
             raise TypeError("message to be sent must follow text/event-stream for SSE.")
 
-        return self.redis.publish(
-            channel=channel, message=json.dumps(message.to_dict())
+        if has_request_context():
+            g.setdefault("sse_messages", []).append((message, channel))
+            return None
+
+        id = self._publish(message, channel, client=self.redis)
+
+        return id.decode() if isinstance(id, bytes) else id
+
+    def flush(self) -> list[str]:
+        """Publish messages queued on the request context in one pipeline."""
+
+        messages = g.pop("sse_messages", [])
+        if not messages:
+            return []
+
+        pipeline = self.redis.pipeline(transaction=False)
+        for message, channel in messages:
+            self._publish(message, channel, client=pipeline)
+
+        return [
+            id.decode() if isinstance(id, bytes) else id for id in pipeline.execute()
+        ]
+
+    def _publish(self, message: EventStream, channel: int | str, client):
+        """Run publish script with the client, which may be a pipeline."""
+
+        config = current_app.config
+        return self.publish_script(
+            keys=[user_stream(channel), user_channel(channel)],
+            args=[
+                json.dumps(message.to_dict()),
+                config.get("SSE_STREAM_MAXLEN", 100),
+                config.get("SSE_STREAM_TTL", 86400),
+            ],
+            client=client,
         )
 
+    def _flush_after_request(self, response: Response) -> Response:
+        """Publish queued messages unless the request has failed.
+
+        Failing to publish doesn't fail the request, since its changes have
+        already been committed and the client can catch up by `Last-Event-ID`.
+        """
+
+        if response.status_code >= 400:
+            g.pop("sse_messages", None)
+            return response
+
+        try:
+            self.flush()
+        except RedisError:
+            logger.exception("failed to publish server-sent events.")
+
+        return response
+
+    def replay(self, channel: int | str, last_event_id: str) -> list[EventStream]:
+        """Return event streams of specific user published after `last_event_id`."""
+
+        entries = self.redis.xrange(user_stream(channel), min=f"({last_event_id}")
+
+        return eventstreams_from_entries(entries)
+
 
 bp = BlueprintWithSSE("sse", __name__, url_prefix="/stream")
 
@@ -114,22 +285,75 @@ bp = BlueprintWithSSE("sse", __name__, url_prefix="/stream")
 def stream_to_user(user_id: int):
     """Stream server-sent events to specific user."""
 
+    # flask-login keeps the id of signed-in user in the session.
+    if session.get("_user_id") != str(user_id):
+        abort(HTTPStatus.FORBIDDEN)
+
+    heartbeat = current_app.config.get("SSE_HEARTBEAT_INTERVAL", 25.0)
+    last_event_id = request.headers.get("Last-Event-ID")
+    if parse_event_id(last_event_id) is None:
+        last_event_id = None
+
     @stream_with_context
     def generate():
-        """get message if exists and yield that."""
+        """Wait for message and yield it as soon as it arrives.
+
+        `queue.get` blocks cooperatively under gevent, so an idle stream costs
+        nothing but a keepalive comment every `heartbeat` seconds.
+
+        When the client reconnects with `Last-Event-ID`, the missed messages
+        are replayed from the stream of the user first. The queue is subscribed
+        before replaying, so a message published in between is either replayed
+        or received from the queue, and the duplicate is skipped by its id.
+        """
+
+        channel = user_channel(user_id)
+        queue = listener.subscribe(channel)
+
+        try:
+            yield str(EventStream(comment="connected"))
 
-        pubsub = bp.redis.pubsub(ignore_subscribe_messages=True)
-        pubsub.subscribe(user_id)
+            last_id = parse_event_id(last_event_id)
+            if last_event_id is not None:
+                for eventstream in bp.replay(user_id, last_event_id):
+                    last_id = parse_event_id(eventstream.id)
+                    yield str(eventstream)
 
-        while True:
-            message = pubsub.get_message()
-            if message is None:
-                yield str(EventStream(comment="ping"))
-            else:
-                yield str(EventStream(**json.loads(message["data"])))
-            time.sleep(2.5)  # be nice to the system :)
+            while True:
+                try:
+                    message = queue.get(timeout=heartbeat)
+                except Empty:
+                    yield str(EventStream(comment="ping"))
+                    continue
+
+                eventstream = EventStream(**json.loads(message))
+                id = parse_event_id(eventstream.id)
+                if last_id is not None and id is not None and id <= last_id:
+                    continue
+
+                last_id = id or last_id
+                yield str(eventstream)
+        finally:
+            listener.unsubscribe(channel, queue)
+
+    listener.start(bp.redis)
 
     res = Response(generate(), mimetype="text/event-stream")
     res.headers["X-Accel-Buffering"] = "no"
 
     return res
+
+
+@bp.route("/stats")
+@login_required
+def stats():
+    """Show the number of live subscribers in this worker process, to admins."""
+
+    if current_user.role != "admin":
+        abort(HTTPStatus.FORBIDDEN)
+
+    return jsonify(
+        pid=os.getpid(),
+        listening=listener.running,
+        subscribers=listener.subscriber_count,
+    )
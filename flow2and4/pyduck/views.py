@@ -10,6 +10,7 @@ from flow2and4.pyduck.auth.views import bp as bp_auth
 from flow2and4.pyduck.auth.views import bp_user
 from flow2and4.pyduck.community.views import bp as bp_community
 from flow2and4.pyduck.notification.views import bp as bp_notification
+from flow2and4.pyduck.pagination import InvalidCursor
 from flow2and4.pyduck.sse.views import bp as bp_sse
 
 bp = Blueprint(
@@ -34,6 +35,11 @@ def not_found_errorhandler(e):
 bp.register_error_handler(HTTPStatus.NOT_FOUND, not_found_errorhandler)
 
 
+@bp.errorhandler(InvalidCursor)
+def invalid_cursor_errorhandler(e):
+    return str(e), HTTPStatus.BAD_REQUEST
+
+
 @bp.route("/")
 def index():
     """Show pyduck main index page."""
@@ -0,0 +1,107 @@
+"""
+This is the module for defining fixtures used across pyduck community tests.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from flow2and4.pyduck.community.models import (
+    Answer,
+    AnswerComment,
+    Post,
+    PostComment,
+    Question
+)
+
+NOW = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def _counts():
+    return dict(view_count=0, vote_count=0, comment_count=0, created_at=NOW)
+
+
+@pytest.fixture(scope="session")
+def community(app, database, create_user):
+    """Create 10 of each list item, written by different users."""
+
+    with app.app_context():
+        question = Question(
+            user=create_user(), title="q", content="q", answered=False, **_counts()
+        )
+        post = Post(
+            user=create_user(),
+            category="tech",
+            title="p",
+            content="p",
+            **_counts(),
+        )
+        answer = Answer(
+            user=create_user(),
+            question=question,
+            content="a",
+            vote_count=0,
+            comment_count=0,
+            answered=False,
+            created_at=NOW,
+        )
+        database.session.add_all([question, post, answer])
+
+        for i in range(1, 11):
+            database.session.add(
+                Question(
+                    user=create_user(),
+                    title=f"q{i}",
+                    content="q",
+                    answered=False,
+                    **_counts(),
+                )
+            )
+            database.session.add(
+                Post(
+                    user=create_user(),
+                    category="tech",
+                    title=f"p{i}",
+                    content="p",
+                    **_counts(),
+                )
+            )
+            database.session.add(
+                Answer(
+                    user=create_user(),
+                    question=question,
+                    content="a",
+                    vote_count=0,
+                    comment_count=0,
+                    answered=False,
+                    created_at=NOW,
+                )
+            )
+            database.session.add(
+                AnswerComment(
+                    user=create_user(),
+                    answer=answer,
+                    content="c",
+                    created_at=NOW,
+                )
+            )
+            post_comment = PostComment(
+                user=create_user(),
+                post=post,
+                content="c",
+                vote_count=0,
+                comment_count=0,
+                created_at=NOW,
+            )
+            database.session.add(post_comment)
+        database.session.commit()
+
+        ids = {
+            "user_id": question.user_id,
+            "question_id": question.id,
+            "post_id": post.id,
+            "answer_id": answer.id,
+            "post_comment_id": post_comment.id,
+        }
+
+    return ids
@@ -0,0 +1,233 @@
+import pytest
+from sqlalchemy import func, select
+
+from flow2and4.pyduck.auth.models import User
+from flow2and4.pyduck.community import tasks
+from flow2and4.pyduck.community.buffer import COUNTS, FLUSHING, LOCK, OPS, buffer
+from flow2and4.pyduck.community.models import Post, PostVote, Question
+from flow2and4.pyduck.community.tasks import (
+    _flush_batch,
+    flush_buffer,
+    flush_views
+)
+
+
+@pytest.fixture
+def unflushed(app, client, monkeypatch):
+    """Start from an empty buffer, flushing it only when asked."""
+
+    monkeypatch.setattr(app.extensions["celery"].conf, "task_always_eager", False)
+
+    with app.app_context():
+        keys = buffer.redis.keys("buffer:*")
+        if keys:
+            buffer.redis.delete(*keys)
+
+    yield
+
+
+@pytest.fixture
+def buffered(app, client, monkeypatch, unflushed):
+    """Buffer votes and reactions in redis, flushing them only when asked."""
+
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+    monkeypatch.setitem(
+        app.config,
+        "REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER",
+        app.config["REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS"],
+    )
+
+    yield
+
+    with client.session_transaction() as session:
+        session.clear()
+
+
+def _voters(app, database, n: int) -> list[int]:
+    with app.app_context():
+        return database.session.scalars(select(User.id).limit(n)).all()
+
+
+def _post_votes(app, database, post_id: int) -> tuple[int, int]:
+    with app.app_context():
+        post = database.session.get(Post, post_id)
+        votes = database.session.scalar(
+            select(func.count()).select_from(PostVote).filter_by(target_id=post_id)
+        )
+        return post.vote_count, votes
+
+
+def test_buffered_votes_are_served_then_flushed(
+    app, database, client, community, buffered
+):
+    url = f"/community/posts/{community['post_id']}/vote"
+    first, second = _voters(app, database, 2)
+    before = _post_votes(app, database, community["post_id"])
+
+    client.sign_in(first)
+    client.post(url)
+    # a double click isn't buffered twice.
+    client.post(url)
+    client.sign_in(second)
+    client.post(url)
+    client.delete(url)
+    res = client.post(url)
+
+    # served from the buffer before anything is written to database.
+    assert f"<span>{before[0] + 2}</span>" in res.text and "active" in res.text
+    assert _post_votes(app, database, community["post_id"]) == before
+    with app.app_context():
+        assert buffer.vote_count_deltas("post", [community["post_id"]]) == {
+            community["post_id"]: 2
+        }
+        assert buffer.redis.llen(OPS) == 4
+
+        assert flush_buffer() == 4
+        assert buffer.redis.exists(OPS, FLUSHING, COUNTS) == 0
+
+    vote_count, votes = _post_votes(app, database, community["post_id"])
+    assert (vote_count, votes) == (before[0] + 2, before[1] + 2)
+
+    client.delete(url)
+    client.sign_in(first)
+    res = client.delete(url)
+
+    assert f"<span>{before[0]}</span>" in res.text and "active" not in res.text
+    with app.app_context():
+        flush_buffer()
+    assert _post_votes(app, database, community["post_id"]) == before
+
+
+def test_unacked_batch_is_replayed_once(app, database, client, community, buffered):
+    url = f"/community/posts/{community['post_id']}/vote"
+    voters = _voters(app, database, 3)
+    before = _post_votes(app, database, community["post_id"])
+
+    for voter in voters:
+        client.sign_in(voter)
+        client.post(url)
+
+    with app.app_context():
+        # a worker died after committing the first batch, before acking it.
+        _flush_batch(buffer.take(2))
+
+        assert flush_buffer() == 3
+
+    vote_count, votes = _post_votes(app, database, community["post_id"])
+    assert (vote_count, votes) == (before[0] + 3, before[1] + 3)
+
+    for voter in voters:
+        client.sign_in(voter)
+        client.delete(url)
+    with app.app_context():
+        flush_buffer()
+
+    assert _post_votes(app, database, community["post_id"]) == before
+
+
+def test_flush_stops_when_its_lock_expires(
+    app, database, client, community, buffered, monkeypatch
+):
+    url = f"/community/posts/{community['post_id']}/vote"
+    voters = _voters(app, database, 2)
+    before = _post_votes(app, database, community["post_id"])
+    flush_batch = tasks._flush_batch
+
+    def slow_flush_batch(ops):
+        # the batch outlived the lock.
+        buffer.redis.delete(LOCK)
+        return flush_batch(ops)
+
+    for voter in voters:
+        client.sign_in(voter)
+        client.post(url)
+
+    monkeypatch.setitem(app.config, "WRITE_BEHIND_BATCH_SIZE", 1)
+    monkeypatch.setattr(tasks, "_flush_batch", slow_flush_batch)
+    with app.app_context():
+        assert flush_buffer() == 1
+        # left for the next flush.
+        assert buffer.redis.llen(FLUSHING) == 1
+        assert flush_buffer() == 1
+
+    vote_count, votes = _post_votes(app, database, community["post_id"])
+    assert (vote_count, votes) == (before[0] + 2, before[1] + 2)
+
+    for voter in voters:
+        client.sign_in(voter)
+        client.delete(url)
+    with app.app_context():
+        while flush_buffer():
+            pass
+
+    assert _post_votes(app, database, community["post_id"]) == before
+
+
+def test_views_are_counted_once_per_viewer_in_one_update(
+    app, database, client, community, buffered, count_queries
+):
+    post_url = f"/community/posts/{community['post_id']}"
+    question_url = f"/community/questions/{community['question_id']}"
+    first, second = _voters(app, database, 2)
+    with app.app_context():
+        before = (
+            database.session.get(Post, community["post_id"]).view_count,
+            database.session.get(Question, community["question_id"]).view_count,
+        )
+
+    with count_queries() as statements:
+        client.get(post_url)
+        client.sign_in(first)
+        client.get(post_url)
+        client.get(post_url)
+        client.get(question_url)
+        client.sign_in(second)
+        client.get(post_url)
+
+    # page reads stay read-only.
+    assert not [s for s in statements if not s.lstrip().startswith("SELECT")]
+
+    with count_queries() as statements:
+        with app.app_context():
+            assert flush_views() == 4
+            assert flush_views() == 0
+
+    assert len([s for s in statements if s.startswith("UPDATE")]) == 2
+    with app.app_context():
+        assert database.session.get(Post, community["post_id"]).view_count == (
+            before[0] + 3
+        )
+        assert database.session.get(Question, community["question_id"]).view_count == (
+            before[1] + 1
+        )
+
+
+def test_views_are_counted_without_buffering_votes(
+    app, database, client, community, unflushed
+):
+    assert app.config["REDIS_CONNECTION_URL_FOR_WRITE_BEHIND_BUFFER"] is None
+    with app.app_context():
+        before = database.session.get(Post, community["post_id"]).view_count
+
+    client.get(f"/community/posts/{community['post_id']}")
+    client.get(f"/community/posts/{community['post_id']}")
+
+    with app.app_context():
+        assert not buffer.enabled
+        assert flush_views() == 1
+        assert database.session.get(Post, community["post_id"]).view_count == (
+            before + 1
+        )
+
+
+def test_buffer_redis_gives_up_rather_than_hangs(app):
+    with app.app_context():
+        pool = buffer.redis_pool
+
+    assert pool.timeout == app.config["REDIS_POOL_TIMEOUT_FOR_WRITE_BEHIND_BUFFER"]
+    assert pool.connection_kwargs["socket_timeout"] == (
+        app.config["REDIS_SOCKET_TIMEOUT_FOR_WRITE_BEHIND_BUFFER"]
+    )
+    assert pool.connection_kwargs["socket_connect_timeout"] == (
+        app.config["REDIS_SOCKET_CONNECT_TIMEOUT_FOR_WRITE_BEHIND_BUFFER"]
+    )
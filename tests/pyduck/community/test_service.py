@@ -0,0 +1,419 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from flow2and4.database import on_commit, unit_of_work
+from flow2and4.pyduck.auth.models import User
+from flow2and4.pyduck.community.models import Post
+from flow2and4.pyduck.community.schemas import (
+    AnswerReactionCreate,
+    AnswerVoteCreate,
+    CommentView,
+    PostCreate,
+    PostReactionCreate,
+    PostRef,
+    PostVoteCreate,
+    QuestionCreate,
+    QuestionUpdate
+)
+from flow2and4.pyduck.community.service import (
+    create_answer_reaction,
+    create_answer_vote,
+    create_post,
+    create_post_reaction,
+    create_post_vote,
+    create_question,
+    delete_answer_reaction,
+    delete_answer_vote,
+    delete_post,
+    delete_post_reaction,
+    delete_post_vote,
+    get_all_posts_by_commons_and_category,
+    get_all_questions_by_commons,
+    get_answer,
+    get_post,
+    get_answer_vote,
+    get_post_comment,
+    get_viewer_state,
+    update_question_adding_history
+)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/community/tech?per_page=10",
+        "/community/tech/posts?per_page=10",
+        "/community/help?per_page=10",
+        "/community/questions?per_page=10",
+        "/community/questions/{question_id}/answers?per_page=20",
+        "/community/answers/{answer_id}/comments?per_page=10",
+        "/community/posts/{post_id}/comments?per_page=10",
+    ],
+)
+def test_list_page_renders_in_constant_queries(
+    client, community, count_queries, url
+):
+    with count_queries() as statements:
+        res = client.get(url.format(**community))
+
+    assert res.status_code == 200
+    # page, viewer, and one per eagerly loaded collection; never one per row.
+    assert len(statements) <= 4, statements
+    assert not any("count(*)" in statement for statement in statements)
+    # votes are looked up only for the viewer, never loaded per item.
+    assert not any(
+        "FROM vote" in statement and "vote.user_id =" not in statement
+        for statement in statements
+    )
+
+
+def test_comment_view_doesnt_serialize_parent_post(app, community):
+    with app.app_context():
+        post_comment = get_post_comment(post_comment_id=community["post_comment_id"])
+
+    assert isinstance(post_comment, CommentView)
+    assert isinstance(post_comment.post, PostRef)
+    assert set(post_comment.post.__fields__) == {"id", "user_id"}
+
+
+def test_viewer_state_looks_up_votes_reactions_and_counts_in_one_query(
+    app, community, count_queries
+):
+    user_id, answer_id = community["user_id"], community["answer_id"]
+    targets = {"answer": [answer_id], "post_comment": [community["post_comment_id"]]}
+
+    with app.app_context():
+        create_answer_vote(AnswerVoteCreate(user_id=user_id, target_id=answer_id))
+        create_answer_reaction(
+            reaction_in=AnswerReactionCreate(
+                user_id=user_id, target_id=answer_id, code="heart"
+            )
+        )
+
+        with count_queries() as statements:
+            viewer = get_viewer_state(user_id=user_id, targets=targets)
+        anonymous = get_viewer_state(user_id=None, targets=targets)
+
+        delete_answer_vote(answer_id=answer_id, user_id=user_id)
+        delete_answer_reaction(answer_id=answer_id, user_id=user_id, code="heart")
+        deleted = get_viewer_state(user_id=None, targets=targets)
+
+    assert len(statements) == 1
+    assert viewer.voted("answer", answer_id)
+    assert viewer.reacted("answer", answer_id, "heart")
+    assert not viewer.reacted("answer", answer_id, "eyes")
+    assert not viewer.voted("post_comment", community["post_comment_id"])
+    assert not anonymous.votes and not anonymous.reactions
+    assert anonymous.reaction_count("answer", answer_id, "heart") == 1
+    assert deleted.reaction_count("answer", answer_id, "heart") == 0
+
+
+def _search_questions(query: str) -> list[int]:
+    pagination = get_all_questions_by_commons(
+        page=1,
+        per_page=10,
+        max_per_page=10,
+        filters=None,
+        sorters=None,
+        periods=None,
+        query=query,
+        cursor=None,
+    )
+    return [q.id for q in pagination.items]
+
+
+def test_search_questions_ranks_title_over_content(app, community):
+    user_id = community["user_id"]
+
+    with app.app_context():
+        in_content = create_question(
+            question_in=QuestionCreate(
+                user_id=user_id, title="q", content="<p>flamingo <b>wings</b></p>"
+            ),
+            tags_in=[],
+        )
+        in_title = create_question(
+            question_in=QuestionCreate(
+                user_id=user_id, title="flamingo wings", content="<p>q</p>"
+            ),
+            tags_in=[],
+        )
+
+        assert _search_questions("all-contains-flamin wings") == [
+            in_title.id,
+            in_content.id,
+        ]
+        assert _search_questions("content-contains-flamingo") == [in_content.id]
+        # html tags are not indexed.
+        assert _search_questions("content-contains-b") == []
+
+        update_question_adding_history(
+            question_in=QuestionUpdate(
+                id=in_title.id,
+                user_id=user_id,
+                title="pelican",
+                content="<p>q</p>",
+                updated_at=datetime.now(timezone.utc),
+            ),
+            tags_in=[],
+        )
+        assert _search_questions("title-contains-flamingo") == []
+        assert _search_questions("title-contains-pelican") == [in_title.id]
+
+
+def test_search_posts_by_nickname_and_forgets_deleted(app, database, community):
+    with app.app_context():
+        nickname = database.session.get(User, community["user_id"]).nickname
+        post = create_post(
+            post_in=PostCreate(
+                user_id=community["user_id"],
+                category="tech",
+                title="toucan",
+                content="<p>toucan</p>",
+            ),
+            tags_in=[],
+        )
+
+        def search(query):
+            pagination = get_all_posts_by_commons_and_category(
+                page=1,
+                per_page=50,
+                max_per_page=50,
+                filters=None,
+                sorters=None,
+                periods=None,
+                query=query,
+                cursor=None,
+                category="tech",
+            )
+            return [p.id for p in pagination.items]
+
+        assert search("all-contains-toucan") == [post.id]
+        assert post.id in search(f"all-contains-{nickname}")
+
+        delete_post(post_id=post.id)
+        assert search("all-contains-toucan") == []
+
+
+@pytest.mark.parametrize("sorters", [None, "vote_count-desc", "title-asc"])
+def test_cursor_pages_through_posts_without_counting(
+    app, community, count_queries, sorters
+):
+    def page(per_page, cursor=None):
+        return get_all_posts_by_commons_and_category(
+            page=1,
+            per_page=per_page,
+            max_per_page=50,
+            filters=None,
+            sorters=sorters,
+            periods=None,
+            query=None,
+            cursor=cursor,
+            category="tech",
+        )
+
+    with app.app_context():
+        expected = [post.id for post in page(50)]
+
+        pagination = page(3)
+        ids = [post.id for post in pagination]
+        while pagination.has_next:
+            with count_queries() as statements:
+                pagination = page(3, pagination.next_cursor)
+            ids += [post.id for post in pagination]
+
+            assert not any("count(*)" in statement for statement in statements)
+
+    assert ids == expected
+    assert pagination.next_cursor is None
+
+
+def test_cursor_falls_back_to_page_when_ordered_by_relevance(app, community):
+    with app.app_context():
+        for i in range(3):
+            create_question(
+                question_in=QuestionCreate(
+                    user_id=community["user_id"], title=f"kingfisher {i}", content="q"
+                ),
+                tags_in=[],
+            )
+
+        pagination = get_all_questions_by_commons(
+            page=1,
+            per_page=2,
+            max_per_page=10,
+            filters=None,
+            sorters=None,
+            periods=None,
+            query="all-contains-kingfisher",
+            cursor=None,
+        )
+        following = get_all_questions_by_commons(
+            page=1,
+            per_page=2,
+            max_per_page=10,
+            filters=None,
+            sorters=None,
+            periods=None,
+            query="all-contains-kingfisher",
+            cursor=pagination.next_cursor,
+        )
+
+    assert following.page == 2
+    assert len(pagination.items) + len(following.items) == 3
+
+
+def test_period_filters_compare_epoch_timestamps(app, database, community):
+    with app.app_context():
+        old = Post(
+            user_id=community["user_id"],
+            category="science",
+            title="old",
+            content="old",
+            view_count=0,
+            vote_count=0,
+            comment_count=0,
+            created_at=datetime.now(timezone.utc) - timedelta(days=8),
+        )
+        database.session.add(old)
+        database.session.commit()
+        recent = create_post(
+            post_in=PostCreate(
+                user_id=community["user_id"],
+                category="science",
+                title="recent",
+                content="recent",
+            ),
+            tags_in=[],
+        )
+
+        def by_period(periods):
+            pagination = get_all_posts_by_commons_and_category(
+                page=1,
+                per_page=10,
+                max_per_page=10,
+                filters=None,
+                sorters=None,
+                periods=periods,
+                query=None,
+                cursor=None,
+                category="science",
+            )
+            return [p.id for p in pagination.items]
+
+        stored = database.session.scalar(
+            select(func.typeof(Post.created_at)).filter_by(id=recent.id)
+        )
+
+        assert by_period("created_at-ge-past_week") == [recent.id]
+        assert by_period("created_at-ge-past_month") == [recent.id, old.id]
+        assert by_period("created_at-ge-all") == [recent.id, old.id]
+
+    assert stored == "integer"
+    assert recent.created_at.tzinfo is not None
+
+
+def test_unit_of_work_rolls_back_every_write_of_the_block(app, community):
+    user_id, answer_id = community["user_id"], community["answer_id"]
+
+    with app.app_context():
+        before = get_answer(answer_id=answer_id)
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                voted, _ = create_answer_vote(
+                    AnswerVoteCreate(user_id=user_id, target_id=answer_id)
+                )
+                raise RuntimeError
+
+        after = get_answer(answer_id=answer_id)
+        vote = get_answer_vote(answer_id=answer_id, user_id=user_id)
+
+    assert voted.vote_count == before.vote_count + 1
+    assert after.vote_count == before.vote_count
+    assert vote is None
+
+
+def test_failing_on_commit_callback_doesnt_skip_the_others(app, community):
+    user_id, answer_id = community["user_id"], community["answer_id"]
+    called = []
+
+    def fail():
+        raise RuntimeError
+
+    with app.app_context():
+        with unit_of_work():
+            create_answer_vote(AnswerVoteCreate(user_id=user_id, target_id=answer_id))
+            on_commit(fail)
+            on_commit(lambda: called.append(True))
+
+        vote = get_answer_vote(answer_id=answer_id, user_id=user_id)
+        delete_answer_vote(answer_id=answer_id, user_id=user_id)
+
+    assert called == [True]
+    assert vote is not None
+
+
+def test_parallel_votes_are_all_counted(
+    app, database, create_user, tmp_path, monkeypatch
+):
+    # a database file, so that every thread votes on its own connection.
+    engine = create_engine(f"sqlite:///{tmp_path / 'pyduck.db'}")
+    database.metadatas["pyduck"].create_all(engine)
+
+    with app.app_context():
+        monkeypatch.setitem(database.engines, "pyduck", engine)
+        users = [create_user() for _ in range(50)]
+        database.session.commit()
+        user_ids = [user.id for user in users]
+        post = create_post(
+            post_in=PostCreate(
+                user_id=user_ids[0], category="tech", title="vote", content="v"
+            ),
+            tags_in=[],
+        )
+
+    def vote(user_id):
+        with app.app_context():
+            create_post_vote(PostVoteCreate(user_id=user_id, target_id=post.id))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(vote, user_ids))
+
+    with app.app_context():
+        assert get_post(post_id=post.id).vote_count == 50
+
+    engine.dispose()
+
+
+def test_vote_and_reaction_toggles_are_idempotent(app, community):
+    user_id, post_id = community["user_id"], community["post_id"]
+    reaction_in = PostReactionCreate(user_id=user_id, target_id=post_id, code="tada")
+
+    with app.app_context():
+        before = get_post(post_id=post_id).vote_count
+
+        voted = [
+            create_post_vote(PostVoteCreate(user_id=user_id, target_id=post_id))
+            for _ in range(2)
+        ]
+        unvoted = [
+            delete_post_vote(target_id=post_id, user_id=user_id) for _ in range(2)
+        ]
+
+        reacted = [create_post_reaction(reaction_in=reaction_in) for _ in range(2)]
+        count = get_viewer_state(user_id=None, targets={"post": [post_id]})
+        unreacted = [
+            delete_post_reaction(post_id=post_id, user_id=user_id, code="tada")
+            for _ in range(2)
+        ]
+
+    assert [changed for _, changed in voted] == [True, False]
+    assert [post.vote_count - before for post, _ in voted] == [1, 1]
+    assert [changed for _, changed in unvoted] == [True, False]
+    assert [post.vote_count - before for post, _ in unvoted] == [0, 0]
+    assert [changed for _, changed in reacted] == [True, False]
+    assert count.reaction_count("post", post_id, "tada") == 1
+    assert [changed for _, changed in unreacted] == [True, False]
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import event
+
+from flow2and4.pyduck.pagination import encode_cursor
+
+
+@pytest.fixture
+def csrf_disabled(app):
+    app.config["WTF_CSRF_ENABLED"] = False
+    yield
+    app.config["WTF_CSRF_ENABLED"] = True
+
+
+def test_post_comment_renders_from_comment_view(client, community, csrf_disabled):
+    client.sign_in(community["user_id"])
+
+    res = client.post(
+        f"/community/posts/{community['post_id']}/comments",
+        data={"post_id": community["post_id"], "content": "choco comment"},
+    )
+
+    assert res.status_code == 200
+    assert "choco comment" in res.text
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "garbage",
+        encode_cursor({"after": [1, 2, 3, 4, 5, 6]}),
+        encode_cursor({"after": [{"a": 1}, [2]]}),
+    ],
+)
+def test_stale_or_malformed_cursor_is_bad_request(client, community, cursor):
+    res = client.get("/community/tech/posts", query_string={"cursor": cursor})
+
+    assert res.status_code == 400
+
+
+def test_vote_and_its_side_effects_commit_once(
+    app, database, client, community, csrf_disabled
+):
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    with app.app_context():
+        engine = database.engines["pyduck"]
+    event.listen(engine, "commit", on_commit)
+
+    client.sign_in(community["user_id"])
+    url = f"/community/posts/{community['post_id']}/vote"
+    try:
+        voted = client.post(url)
+        voted_commits = len(commits)
+        unvoted = client.delete(url)
+    finally:
+        event.remove(engine, "commit", on_commit)
+    # a double click changes nothing, and isn't an error either.
+    revoted = [client.post(url), client.post(url)]
+    client.delete(url)
+
+    assert voted.status_code == 200 and unvoted.status_code == 200
+    assert [res.status_code for res in revoted] == [200, 200]
+    # vote, vote count and user action; then the notification task enqueued
+    # after it(run eagerly in tests). the same for their deletion.
+    assert voted_commits == 2
+    assert len(commits) == 4
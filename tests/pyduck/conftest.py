@@ -0,0 +1,116 @@
+"""
+This is the module for defining fixtures used across pyduck tests.
+"""
+
+import itertools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from flask.testing import FlaskClient
+from sqlalchemy import event
+
+from flow2and4.database import db as db_
+from flow2and4.pyduck.auth.models import User, UserAvatar
+
+NOW = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+class PyduckClient(FlaskClient):
+    """Represent test client requesting pyduck subdomain by default."""
+
+    def open(self, *args, **kwargs):
+        kwargs.setdefault("base_url", "http://pyduck.localhost")
+        return super().open(*args, **kwargs)
+
+    def session_transaction(self, *args, **kwargs):
+        kwargs.setdefault("base_url", "http://pyduck.localhost")
+        return super().session_transaction(*args, **kwargs)
+
+    def sign_in(self, user_id: int):
+        """Sign in as specific user, the way flask-login keeps it in session."""
+
+        with self.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """Represent test client for pyduck."""
+
+    app.config["SERVER_NAME"] = "localhost"
+    app.test_client_class = PyduckClient
+
+    yield app.test_client()
+
+
+@pytest.fixture(scope="session")
+def database(app):
+    """Represent database with tables created.
+
+    Unlike `db`, it doesn't leave an app context pushed, which every request
+    would otherwise share along with `g` and the identity map of the session.
+    """
+
+    with app.app_context():
+        db_.create_all()
+
+    yield db_
+
+    with app.app_context():
+        db_.drop_all()
+
+
+@pytest.fixture(scope="session")
+def create_user(database):
+    """Represent factory adding a new user(with avatar) to the session.
+
+    Every user it creates has a username and nickname of its own.
+    """
+
+    ids = itertools.count()
+
+    def create_user() -> User:
+        i = next(ids)
+        user = User(
+            username=f"choco{i}@pyduck.com",
+            nickname=f"choco{i}",
+            password="choco",
+            active=True,
+            verified=True,
+            role="user",
+            created_at=NOW,
+        )
+        user.avatar = UserAvatar(
+            url=f"/avatar/{i}.png",
+            filename=f"{i}.png",
+            original_filename=f"{i}.png",
+            created_at=NOW,
+        )
+        database.session.add(user)
+
+        return user
+
+    return create_user
+
+
+@pytest.fixture
+def count_queries(app, database):
+    """Represent context manager counting statements executed on pyduck database."""
+
+    @contextmanager
+    def count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = database.engines["pyduck"]
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return count_queries
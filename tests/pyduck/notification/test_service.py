@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from flow2and4.pyduck.notification.models import Notification
+from flow2and4.pyduck.notification.schemas import NotificationForPostVoteCreate
+from flow2and4.pyduck.notification.service import (
+    create_notification,
+    delete_notification,
+    get_unread_notification_count,
+    mark_all_unread_notifications_as_read
+)
+
+
+def _notify(user, from_user, i: int, read: bool = False) -> Notification:
+    return Notification(
+        user=user,
+        from_user=from_user,
+        to_user_id=None,
+        notification_value=str(i),
+        notification_target_id=i,
+        read=read,
+        urgent=False,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _unread(database, user_id: int) -> int:
+    return database.session.scalar(
+        select(func.count())
+        .select_from(Notification)
+        .filter_by(user_id=user_id, read=False)
+    )
+
+
+def test_mark_all_unread_notifications_as_read_in_one_update(
+    app, database, create_user, count_queries
+):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        database.session.add_all(
+            [_notify(user, other, i) for i in range(30)]
+            + [_notify(user, other, 30, read=True), _notify(other, user, 31)]
+        )
+        database.session.commit()
+        user_id, other_id = user.id, other.id
+
+        with count_queries() as statements:
+            marked = mark_all_unread_notifications_as_read(user_id=user_id)
+
+        assert marked == 30
+        # notifications, then the unread count of the user.
+        assert [s.split()[0] for s in statements] == ["UPDATE", "UPDATE"]
+        assert _unread(database, user_id) == 0
+        assert _unread(database, other_id) == 1
+        assert mark_all_unread_notifications_as_read(user_id=user_id) == 0
+
+
+def test_unread_count_follows_notification_writes(app, database, create_user):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        database.session.commit()
+        user_id, other_id = user.id, other.id
+
+        for target_id in (1, 2, 3):
+            create_notification(
+                notification_in=NotificationForPostVoteCreate(
+                    user_id=user_id,
+                    notification_target_id=target_id,
+                    from_user_id=other_id,
+                    to_user_id=user_id,
+                )
+            )
+        assert get_unread_notification_count(user_id=user_id) == 3
+
+        delete_notification(
+            user_id=user_id,
+            notification_type="vote_post",
+            notification_target_id=3,
+            from_user_id=other_id,
+            to_user_id=user_id,
+        )
+        assert get_unread_notification_count(user_id=user_id) == 2
+        assert get_unread_notification_count(user_id=user_id) == _unread(
+            database, user_id
+        )
+
+        mark_all_unread_notifications_as_read(user_id=user_id)
+        # deleting a read notification leaves the count alone.
+        delete_notification(
+            user_id=user_id,
+            notification_type="vote_post",
+            notification_target_id=2,
+            from_user_id=other_id,
+            to_user_id=user_id,
+        )
+        assert get_unread_notification_count(user_id=user_id) == 0
+        assert get_unread_notification_count(user_id=other_id) == 0
@@ -0,0 +1,288 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from flow2and4.database import unit_of_work
+from flow2and4.pyduck.auth.models import User
+from flow2and4.pyduck.community.models import Post, PostReaction, PostVote
+from flow2and4.pyduck.notification.models import Notification
+from flow2and4.pyduck.notification.schemas import (
+    NotificationForPostReactionCreate,
+    NotificationForPostVoteCreate
+)
+from flow2and4.pyduck.notification.tasks import (
+    create_notification,
+    delete_notification,
+    enqueue_create_notification
+)
+from flow2and4.pyduck.sse.views import bp as sse
+
+
+def _count(database, **criteria) -> int:
+    return database.session.scalar(
+        select(func.count()).select_from(Notification).filter_by(**criteria)
+    )
+
+
+@pytest.fixture(scope="module")
+def post_id(app, database, create_user) -> int:
+    """Create a post to be voted and notified of."""
+
+    with app.app_context():
+        post = Post(
+            user=create_user(),
+            category="tech",
+            title="notified",
+            content="notified",
+            view_count=0,
+            vote_count=0,
+            comment_count=0,
+            created_at=datetime.now(timezone.utc),
+        )
+        database.session.add(post)
+        database.session.commit()
+
+        return post.id
+
+
+def _vote(database, post_id: int, *users) -> None:
+    now = datetime.now(timezone.utc)
+    database.session.add_all(
+        [PostVote(user=user, target_id=post_id, created_at=now) for user in users]
+    )
+
+
+def test_notification_tasks_are_idempotent(app, database, post_id, create_user):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        _vote(database, post_id, other)
+        database.session.commit()
+        key = dict(
+            user_id=user.id,
+            notification_target_id=post_id,
+            from_user_id=other.id,
+            to_user_id=user.id,
+        )
+        data = NotificationForPostVoteCreate(**key).dict()
+
+        # the same event delivered twice(e.g. retried) is inserted once.
+        created = [
+            create_notification("NotificationForPostVoteCreate", data),
+            create_notification("NotificationForPostVoteCreate", data),
+        ]
+        assert created == [True, False]
+        assert _count(database, user_id=user.id) == 1
+
+        # deleting what isn't there is a no-op instead of an error.
+        deleted = [
+            delete_notification(notification_type="vote_post", **key),
+            delete_notification(notification_type="vote_post", **key),
+        ]
+        assert deleted == [True, False]
+        assert _count(database, user_id=user.id) == 0
+
+
+def test_notification_is_enqueued_only_after_commit(
+    app, database, post_id, create_user
+):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        _vote(database, post_id, other)
+        database.session.commit()
+        notification_in = NotificationForPostVoteCreate(
+            user_id=user.id,
+            notification_target_id=post_id,
+            from_user_id=other.id,
+            to_user_id=user.id,
+        )
+
+        with pytest.raises(RuntimeError):
+            with unit_of_work():
+                enqueue_create_notification(notification_in=notification_in)
+                raise RuntimeError
+        assert _count(database, user_id=user.id) == 0
+
+        with unit_of_work():
+            enqueue_create_notification(notification_in=notification_in)
+            assert _count(database, user_id=user.id) == 0
+        assert _count(database, user_id=user.id) == 1
+
+
+def test_notification_of_withdrawn_vote_isnt_created(
+    app, database, post_id, create_user
+):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        _vote(database, post_id, other)
+        database.session.commit()
+        key = dict(
+            user_id=user.id,
+            notification_target_id=post_id,
+            from_user_id=other.id,
+            to_user_id=user.id,
+        )
+
+        # unvoted, and its deleting task ran before the retried creating one.
+        database.session.execute(delete(PostVote).filter_by(user_id=other.id))
+        database.session.commit()
+        assert delete_notification(notification_type="vote_post", **key) is False
+        created = create_notification(
+            "NotificationForPostVoteCreate", NotificationForPostVoteCreate(**key).dict()
+        )
+
+        assert created is False
+        assert _count(database, user_id=user.id) == 0
+        assert database.session.get(User, user.id).unread_notification_count == 0
+
+
+def test_votes_on_the_same_target_are_coalesced(
+    app, database, post_id, create_user, monkeypatch
+):
+    monkeypatch.setitem(app.config, "NOTIFICATION_COALESCE_WINDOW", 3600)
+    with app.app_context():
+        user = create_user()
+        actors = [create_user() for _ in range(5)]
+        _vote(database, post_id, *actors)
+        database.session.commit()
+        user_id, actor_ids = user.id, [actor.id for actor in actors]
+
+        def vote(actor_id):
+            return create_notification(
+                "NotificationForPostVoteCreate",
+                NotificationForPostVoteCreate(
+                    user_id=user_id,
+                    notification_target_id=post_id,
+                    from_user_id=actor_id,
+                    to_user_id=user_id,
+                ).dict(),
+            )
+
+        def unvote(actor_id):
+            return delete_notification(
+                user_id=user_id,
+                notification_type="vote_post",
+                notification_target_id=post_id,
+                from_user_id=actor_id,
+                to_user_id=user_id,
+            )
+
+        def coalesced():
+            database.session.expire_all()
+            notification = database.session.scalars(
+                select(Notification).filter_by(user_id=user_id)
+            ).one()
+            unread = database.session.get(User, user_id).unread_notification_count
+            return notification, unread
+
+        assert [vote(actor_id) for actor_id in actor_ids] == [True] * 5
+        # the same event delivered twice is folded once.
+        assert vote(actor_ids[-1]) is False
+
+        notification, unread = coalesced()
+        assert (notification.actor_count, unread) == (5, 1)
+        assert notification.from_user_id == actor_ids[-1]
+        assert notification.recent_actor_ids == actor_ids[:1:-1]
+
+        assert unvote(actor_ids[-1]) is True
+        notification, _ = coalesced()
+        assert notification.actor_count == 4
+        assert notification.from_user_id == actor_ids[-2]
+
+        # a read notification turns unread again by the new actor only.
+        notification.read = True
+        database.session.execute(
+            User.__table__.update().values(unread_notification_count=0)
+        )
+        database.session.commit()
+        assert vote(actor_ids[-1]) is True
+        notification, unread = coalesced()
+        assert (notification.actor_count, notification.read, unread) == (1, False, 1)
+
+        assert unvote(actor_ids[-1]) is True
+        assert _count(database, user_id=user_id) == 0
+
+
+def test_reactions_are_coalesced_by_code(
+    app, database, post_id, create_user, monkeypatch
+):
+    monkeypatch.setitem(app.config, "NOTIFICATION_COALESCE_WINDOW", 3600)
+    with app.app_context():
+        user, a, b = create_user(), create_user(), create_user()
+        now = datetime.now(timezone.utc)
+        database.session.add_all(
+            [
+                PostReaction(user=actor, target_id=post_id, code=code, created_at=now)
+                for actor, code in [(a, "heart"), (b, "tada"), (a, "tada")]
+            ]
+        )
+        database.session.commit()
+        user_id, a_id, b_id = user.id, a.id, b.id
+
+        def key(actor_id, code):
+            return dict(
+                user_id=user_id,
+                notification_value=code,
+                notification_target_id=post_id,
+                from_user_id=actor_id,
+                to_user_id=user_id,
+            )
+
+        def react(actor_id, code):
+            return create_notification(
+                "NotificationForPostReactionCreate",
+                NotificationForPostReactionCreate(**key(actor_id, code)).dict(),
+            )
+
+        def unreact(actor_id, code):
+            return delete_notification(
+                notification_type="reaction_post", **key(actor_id, code)
+            )
+
+        # the same actor with another code isn't a duplicate.
+        reacted = [react(a_id, "heart"), react(b_id, "tada"), react(a_id, "tada")]
+        assert reacted == [True, True, True]
+        assert unreact(a_id, "heart") is True
+        assert unreact(b_id, "tada") is True
+
+        database.session.expire_all()
+        notification = database.session.scalars(
+            select(Notification).filter_by(user_id=user_id)
+        ).one()
+        assert notification.notification_value == "tada"
+        assert (notification.from_user_id, notification.actor_count) == (a_id, 1)
+        assert database.session.get(User, user_id).unread_notification_count == 1
+
+
+def test_coalesced_notification_pushes_are_rate_limited(
+    app, database, post_id, create_user, monkeypatch
+):
+    monkeypatch.setitem(app.config, "NOTIFICATION_COALESCE_WINDOW", 3600)
+    monkeypatch.setattr(app.extensions["celery"].conf, "task_always_eager", False)
+    pushed = []
+    monkeypatch.setattr(sse, "publish", lambda message, channel: pushed.append(channel))
+    with app.app_context():
+        user = create_user()
+        actors = [create_user() for _ in range(3)]
+        _vote(database, post_id, *actors)
+        database.session.commit()
+        keys = sse.redis.keys(f"sse:throttle:{user.id}:*")
+        if keys:
+            sse.redis.delete(*keys)
+
+        for actor in actors:
+            create_notification(
+                "NotificationForPostVoteCreate",
+                NotificationForPostVoteCreate(
+                    user_id=user.id,
+                    notification_target_id=post_id,
+                    from_user_id=actor.id,
+                    to_user_id=user.id,
+                ).dict(),
+                "post:vote",
+            )
+
+        # pushed once at once, and the rest once as the interval ends.
+        assert pushed == [user.id]
+        key = f"sse:throttle:{user.id}:vote_post:{post_id}"
+        assert sse.redis.exists(f"{key}:trailing")
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from flow2and4.pyduck.notification.models import Notification
+
+
+def test_bell_badge_doesnt_touch_notification_table(
+    app, database, client, create_user, count_queries
+):
+    with app.app_context():
+        user, other = create_user(), create_user()
+        user.unread_notification_count = 1
+        database.session.add(
+            Notification(
+                user=user,
+                from_user=other,
+                notification_value="bell",
+                notification_target_id=1,
+                read=False,
+                urgent=False,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+        database.session.commit()
+        user_id = user.id
+
+    client.sign_in(user_id)
+    with count_queries() as statements:
+        bell = client.get("/notifications/bell")
+    items = client.get("/notifications/bell/items")
+    with client.session_transaction() as session:
+        session.clear()
+
+    assert bell.status_code == 200 and "unread: 1 > 0" in bell.text
+    assert not [s for s in statements if "FROM notification" in s]
+    assert items.status_code == 200 and "border-bottom" in items.text
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from flow2and4.config import WebTestConfig
+from flow2and4.pyduck.sse.gateway import SSEGateway
+from flow2and4.pyduck.sse.views import EventStream
+from flow2and4.pyduck.sse.views import bp as sse
+
+
+@pytest.fixture
+def gateway():
+    return SSEGateway(WebTestConfig())
+
+
+def _cookie(gateway: SSEGateway, user_id: int) -> str:
+    session = gateway.serializer.dumps({"_user_id": str(user_id)})
+    return f"{gateway.session_cookie_name}={session}"
+
+
+async def _open(port: int, path: str, headers: dict | None = None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"GET {path} HTTP/1.1", "Host: pyduck.localhost"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+
+    status = await reader.readline()
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+
+    return status, reader, writer
+
+
+async def _read_event(reader: asyncio.StreamReader) -> bytes:
+    return await asyncio.wait_for(reader.readuntil(b"\n\n"), timeout=2)
+
+
+def test_session_user_id(gateway):
+    assert gateway.session_user_id(_cookie(gateway, 7)) == "7"
+    assert gateway.session_user_id(f"{gateway.session_cookie_name}=forged") is None
+    assert gateway.session_user_id(None) is None
+
+
+def test_stats_are_internal_only(gateway):
+    assert gateway.is_internal(("127.0.0.1", 50000))
+    assert gateway.is_internal(("::1", 50000, 0, 0))
+    assert not gateway.is_internal(("172.18.0.5", 50000))
+    assert not gateway.is_internal(None)
+
+
+def test_gateway_streams_and_replays(app, gateway):
+    with app.app_context():
+        sse.redis.delete("sse:streams:users:11")
+        missed = sse.publish(EventStream("missed", event="notification"), channel=11)
+
+    async def run():
+        numpat = await gateway.redis.pubsub_numpat()
+        listening = asyncio.create_task(gateway.listen())
+        server = await asyncio.start_server(gateway.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        status, reader, writer = await _open(port, "/stream/stats")
+        assert b"200" in status and b"subscribers" in await reader.read()
+        writer.close()
+
+        status, _, writer = await _open(port, "/stream/users/11")
+        assert b"403" in status
+        writer.close()
+
+        status, reader, writer = await _open(
+            port,
+            "/stream/users/11",
+            {"Cookie": _cookie(gateway, 11), "Last-Event-ID": "0-0"},
+        )
+        assert b"200" in status
+        assert b":connected" in await _read_event(reader)
+        assert f"data:missed\nid:{missed}".encode() in await _read_event(reader)
+
+        while await gateway.redis.pubsub_numpat() == numpat:
+            await asyncio.sleep(0.05)
+        assert gateway.subscriber_count == 1
+
+        with app.app_context():
+            await asyncio.to_thread(
+                sse.publish, EventStream("live", event="notification"), 11
+            )
+        assert b"data:live" in await _read_event(reader)
+
+        writer.close()
+        server.close()
+        listening.cancel()
+        await gateway.redis.aclose()
+
+    asyncio.run(run())
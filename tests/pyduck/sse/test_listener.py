@@ -0,0 +1,68 @@
+import json
+import time
+
+import pytest
+from redis import Redis
+
+from flow2and4.pyduck.sse.listener import SSEListener, user_channel
+from flow2and4.pyduck.sse.views import EventStream
+from flow2and4.pyduck.sse.views import bp as sse
+
+
+@pytest.fixture(scope="function")
+def redis(app):
+    url = app.config["REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS"]
+    yield Redis.from_url(url)
+
+
+def test_subscriber_count():
+    listener = SSEListener()
+
+    q1 = listener.subscribe(user_channel(1))
+    q2 = listener.subscribe(user_channel(1))
+    q3 = listener.subscribe(user_channel(2))
+    assert listener.subscriber_count == 3
+
+    listener.unsubscribe(user_channel(1), q1)
+    listener.unsubscribe(user_channel(2), q3)
+    assert listener.subscriber_count == 1
+
+    listener.unsubscribe(user_channel(1), q2)
+    assert listener.subscriber_count == 0
+
+
+def test_dispatch_fans_out_to_channel_only():
+    listener = SSEListener()
+
+    q1 = listener.subscribe(user_channel(1))
+    q2 = listener.subscribe(user_channel(1))
+    q3 = listener.subscribe(user_channel(2))
+
+    listener.dispatch(user_channel(1), "choco")
+
+    assert q1.get_nowait() == "choco"
+    assert q2.get_nowait() == "choco"
+    assert q3.empty()
+
+
+def test_listener_shares_one_connection(app, redis):
+    listener = SSEListener()
+    listener.start(redis)
+
+    queues = [listener.subscribe(user_channel(1)) for _ in range(20)]
+
+    # wait for psubscribe to be done.
+    for _ in range(50):
+        if redis.pubsub_numpat() > 0:
+            break
+        time.sleep(0.1)
+
+    with app.app_context():
+        sse.publish(EventStream("choco", event="notification"), channel=1)
+
+    for queue in queues:
+        message = json.loads(queue.get(timeout=2))
+        assert message["data"] == "choco"
+
+    assert listener.subscriber_count == 20
+    assert redis.pubsub_numpat() == 1
@@ -0,0 +1,162 @@
+import threading
+import time
+
+from redis import Redis
+
+from flow2and4.pyduck.sse.listener import listener
+from flow2and4.pyduck.sse.views import EventStream
+from flow2and4.pyduck.sse.views import bp as sse
+
+
+def _wait_until_listening(redis: Redis, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while redis.pubsub_numpat() == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_stream_publish_to_client_latency(app, client):
+    redis = Redis.from_url(app.config["REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS"])
+
+    client.sign_in(1)
+    res = client.get("/stream/users/1", buffered=False)
+    stream = iter(res.response)
+
+    assert b":connected" in next(stream)
+    _wait_until_listening(redis)
+
+    latencies = []
+    for _ in range(5):
+        published_at = []
+
+        def publish():
+            time.sleep(0.1)
+            with app.app_context():
+                published_at.append(time.perf_counter())
+                sse.publish(EventStream("choco", event="notification"), channel=1)
+
+        t = threading.Thread(target=publish)
+        t.start()
+        chunk = next(stream)
+        latencies.append(time.perf_counter() - published_at[0])
+        t.join()
+
+        assert b"data:choco" in chunk
+
+    res.close()
+
+    # used to be up to 2.5 seconds by sleep polling.
+    assert max(latencies) < 0.5
+
+
+def test_stream_heartbeat(app, client):
+    app.config["SSE_HEARTBEAT_INTERVAL"] = 0.2
+    try:
+        client.sign_in(2)
+        res = client.get("/stream/users/2", buffered=False)
+        stream = iter(res.response)
+
+        assert b":connected" in next(stream)
+        assert listener.subscriber_count >= 1
+
+        started = time.perf_counter()
+        assert b":ping" in next(stream)
+        assert time.perf_counter() - started < 1.0
+
+        res.close()
+    finally:
+        app.config["SSE_HEARTBEAT_INTERVAL"] = 25.0
+
+
+def test_publish_reuses_pooled_connections(app):
+    with app.app_context():
+        assert sse.redis.connection_pool is sse.redis.connection_pool
+
+        for _ in range(20):
+            sse.publish(EventStream("choco", event="notification"), channel=3)
+
+        # the listener holds one connection, and publish borrows one at a time.
+        assert len(sse.redis_pool._connections) <= 2
+
+
+def test_stream_replays_missed_events_by_last_event_id(app, client):
+    with app.app_context():
+        ids = [
+            sse.publish(EventStream(f"choco{i}", event="notification"), channel=4)
+            for i in range(3)
+        ]
+
+    assert ids == sorted(ids)
+
+    client.sign_in(4)
+    res = client.get(
+        "/stream/users/4", headers={"Last-Event-ID": ids[0]}, buffered=False
+    )
+    stream = iter(res.response)
+
+    assert b":connected" in next(stream)
+    assert f"data:choco1\nid:{ids[1]}".encode() in next(stream)
+    assert f"data:choco2\nid:{ids[2]}".encode() in next(stream)
+
+    res.close()
+
+
+def test_stream_to_other_user_is_forbidden(client):
+    client.sign_in(1)
+
+    assert client.get("/stream/users/2").status_code == 403
+
+
+def test_stream_stats_are_for_admins_only(app, database, client, create_user):
+    with app.app_context():
+        user, admin = create_user(), create_user()
+        admin.role = "admin"
+        database.session.commit()
+        user_id, admin_id = user.id, admin.id
+
+    with client.session_transaction() as session:
+        session.clear()
+    anonymous = client.get("/stream/stats")
+    client.sign_in(user_id)
+    forbidden = client.get("/stream/stats")
+    client.sign_in(admin_id)
+    allowed = client.get("/stream/stats")
+    with client.session_transaction() as session:
+        session.clear()
+
+    # asked to sign in, the way htmx requests are.
+    assert anonymous.headers["HX-Trigger"] == "login-required"
+    assert "pid" not in anonymous.text
+    assert forbidden.status_code == 403
+    assert allowed.status_code == 200 and "subscribers" in allowed.json
+    app.config["SSE_STREAM_MAXLEN"] = 5
+    try:
+        with app.app_context():
+            for i in range(200):
+                sse.publish(EventStream(f"choco{i}"), channel=5)
+
+            # approximate trimming keeps at most one extra radix tree node.
+            assert sse.redis.xlen("sse:streams:users:5") < 200
+            assert sse.redis.ttl("sse:streams:users:5") > 0
+    finally:
+        app.config["SSE_STREAM_MAXLEN"] = 100
+
+
+def test_publish_is_deferred_until_request_succeeds(app):
+    stream = "sse:streams:users:6"
+    redis = Redis.from_url(app.config["REDIS_CONNECTION_URL_FOR_SERVER_SENT_EVENTS"])
+    redis.delete(stream)
+
+    with app.test_request_context():
+        for i in range(3):
+            assert sse.publish(EventStream(f"choco{i}"), channel=6) is None
+
+        assert redis.xlen(stream) == 0
+        app.process_response(app.response_class(status=200))
+
+    assert redis.xlen(stream) == 3
+
+    with app.test_request_context():
+        sse.publish(EventStream("choco"), channel=6)
+        app.process_response(app.response_class(status=500))
+
+    assert redis.xlen(stream) == 3
@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import func, select, update
+
+from flow2and4.pyduck.auth.models import UserAction
+from flow2and4.pyduck.community.models import (
+    Post,
+    PostVote,
+    Question,
+    Reaction,
+    Vote
+)
+from flow2and4.pyduck.notification.models import Notification
+
+
+def _plan(database, statement, model) -> str:
+    """Return EXPLAIN QUERY PLAN of the statement as one string."""
+
+    connection = database.session.connection(bind_arguments={"mapper": model})
+    sql = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "statement, model, index",
+    [
+        (
+            select(Vote).where(Vote.target == "post", Vote.target_id == 1),
+            Vote,
+            "ix_vote_target_vote_target_id_vote_user_id",
+        ),
+        (
+            select(func.count()).where(
+                Reaction.target == "post",
+                Reaction.target_id == 1,
+                Reaction.code == "heart",
+            ),
+            Reaction,
+            "ix_reaction_target_reaction_target_id_reaction_code",
+        ),
+        (
+            select(UserAction)
+            .where(UserAction.user_id == 1, UserAction.action_type == "vote_post")
+            .order_by(UserAction.created_at.desc()),
+            UserAction,
+            "ix_user_action_user_id_user_action_action_type_user_action_created_at",
+        ),
+        (
+            select(Notification)
+            .where(Notification.user_id == 1, Notification.read.is_(False))
+            .order_by(Notification.created_at.desc()),
+            Notification,
+            "ix_notification_user_id_notification_read_notification_created_at",
+        ),
+        (
+            update(Notification)
+            .where(Notification.user_id == 1, Notification.read.is_(False))
+            .values(read=True),
+            Notification,
+            "ix_notification_user_id_notification_read_notification_created_at",
+        ),
+        (
+            select(Post)
+            .where(Post.category == "tech", Post.deleted_at.is_(None))
+            .order_by(Post.created_at.desc(), Post.id.desc()),
+            Post,
+            "ix_post_category_post_created_at",
+        ),
+        (
+            select(Post)
+            .where(Post.category == "tech", Post.deleted_at.is_(None))
+            .order_by(Post.vote_count.desc(), Post.created_at.desc(), Post.id.desc()),
+            Post,
+            "ix_post_category_post_vote_count_post_created_at",
+        ),
+        (
+            select(Question)
+            .where(Question.answered.is_(False), Question.deleted_at.is_(None))
+            .order_by(Question.created_at.desc(), Question.id.desc()),
+            Question,
+            "ix_question_answered_question_created_at",
+        ),
+        (
+            select(Question)
+            .where(Question.deleted_at.is_(None))
+            .order_by(Question.comment_count.desc(), Question.created_at.desc()),
+            Question,
+            "ix_question_comment_count_question_created_at",
+        ),
+    ],
+)
+def test_lookup_is_served_by_composite_index(app, database, statement, model, index):
+    with app.app_context():
+        plan = _plan(database, statement, model)
+
+    assert index in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_viewer_vote_lookup_doesnt_scan(app, database):
+    statement = select(PostVote).filter_by(target_id=1, user_id=1)
+
+    with app.app_context():
+        plan = _plan(database, statement, Vote)
+
+    assert "USING" in plan and "INDEX" in plan, plan
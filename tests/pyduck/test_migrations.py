@@ -0,0 +1,116 @@
+import importlib.util
+from datetime import datetime, timezone
+from pathlib import Path
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from flow2and4.database import db
+from flow2and4.pyduck.auth.models import User, UserAvatar
+from flow2and4.pyduck.community.models import Post, PostComment, PostVote
+from flow2and4.pyduck.notification import models  # noqa: F401
+
+VERSIONS = Path(__file__).parents[2] / "flow2and4" / "migrations" / "versions"
+
+ISO = "2023-01-01 00:00:00.123000+00:00"
+EPOCH_MS = 1672531200123
+
+
+def _revision(revision: str):
+    spec = importlib.util.spec_from_file_location(
+        revision, VERSIONS / f"{revision}_.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def _populate(engine) -> None:
+    """Create users, a post, its comment and vote, stored as before epoch ms."""
+
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        users = []
+        for i in range(2):
+            user = User(
+                username=f"migration{i}@pyduck.com",
+                nickname=f"migration{i}",
+                password="migration",
+                active=True,
+                verified=True,
+                role="user",
+                created_at=now,
+            )
+            user.avatar = UserAvatar(
+                url=f"/avatar/{i}.png",
+                filename=f"{i}.png",
+                original_filename=f"{i}.png",
+                created_at=now,
+            )
+            users.append(user)
+        post = Post(
+            user=users[0],
+            category="tech",
+            title="p",
+            content="p",
+            view_count=0,
+            vote_count=1,
+            comment_count=1,
+            created_at=now,
+        )
+        session.add_all(
+            [
+                post,
+                PostComment(
+                    user=users[1],
+                    post=post,
+                    content="c",
+                    vote_count=0,
+                    comment_count=0,
+                    created_at=now,
+                ),
+                PostVote(user=users[1], post=post, created_at=now),
+            ]
+        )
+        session.commit()
+
+    with engine.begin() as connection:
+        for table in ("user", "user_avatar", "post", "post_comment", "vote"):
+            connection.execute(
+                text(f'UPDATE "{table}" SET created_at = :iso'), {"iso": ISO}
+            )
+
+
+def test_epoch_ms_migration_rebuilds_tables_referred_to_by_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pyduck.db'}")
+    # as `create_app` does.
+    event.listen(
+        engine, "connect", lambda conn, _: conn.execute("PRAGMA foreign_keys=ON")
+    )
+    db.metadatas["pyduck"].create_all(engine)
+    _populate(engine)
+    migration = _revision("8e5d2b7a4c91")
+
+    def migrate(step):
+        with engine.begin() as connection:
+            with Operations.context(MigrationContext.configure(connection)):
+                step()
+            rows = connection.execute(text("SELECT created_at FROM post")).all()
+            foreign_keys = connection.execute(text("PRAGMA foreign_keys")).scalar()
+            violations = connection.execute(text("PRAGMA foreign_key_check")).all()
+            counts = [
+                connection.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+                for table in ("user", "post", "post_comment", "vote")
+            ]
+
+        return rows, foreign_keys, violations, counts
+
+    assert migrate(migration.upgrade_pyduck) == ([(EPOCH_MS,)], 1, [], [2, 1, 1, 1])
+    # down to milliseconds, which is all the timestamps kept.
+    downgraded = ([("2023-01-01 00:00:00.123+00:00",)], 1, [], [2, 1, 1, 1])
+    assert migrate(migration.downgrade_pyduck) == downgraded
+
+    engine.dispose()